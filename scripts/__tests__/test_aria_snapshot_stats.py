@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from aria_snapshot_stats import parse_snapshot, unquote_key  # noqa: E402
+
+SNAPSHOT = """- banner [ref=e1]:
+  - navigation "Main" [ref=e2]:
+    - 'link "Pricing: plans" [ref=e3]':
+      - /url: /pricing
+      - img [ref=e4]
+    - 'link "Don''t miss: sale"'
+    - link "About" [ref=e5]
+- main [ref=e6]:
+  - 'heading "Step 1: paste a URL" [level=1] [ref=e7]'
+  - "paragraph [ref=e8]": "Quoted text: with colon"
+  - paragraph [ref=e9]: Plain text
+"""
+
+
+def test_unquote_key():
+    assert unquote_key("""'link "a: b"':""") == 'link "a: b":'
+    assert unquote_key("""'link "it''s"'""") == '''link "it's"'''
+    assert unquote_key('"text: \\"x\\""') == 'text: "x"'
+    assert unquote_key('link "a"') == 'link "a"'
+
+
+def test_quoted_keys_keep_their_children(tmp_path):
+    path = tmp_path / "page.yml"
+    path.write_text(SNAPSHOT)
+    tree = parse_snapshot(path)
+
+    nodes = [(tree.role_of(index), tree.names[index], tree.parent[index]) for index in range(len(tree))]
+    assert nodes == [
+        ("banner", "", -1),
+        ("navigation", "Main", 0),
+        ("link", "Pricing: plans", 1),
+        ("img", "", 2),
+        ("link", "Don't miss: sale", 1),
+        ("link", "About", 1),
+        ("main", "", -1),
+        ("heading", "Step 1: paste a URL", 6),
+        ("paragraph", "Quoted text: with colon", 6),
+        ("paragraph", "Plain text", 6),
+    ]
+    assert tree.level[7] == 1
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import flow_diagrams  # noqa: E402
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    path = tmp_path / "diagram-layouts.json"
+    monkeypatch.setattr(flow_diagrams, "CACHE", path)
+    monkeypatch.setattr(flow_diagrams, "_memory", {})
+    monkeypatch.setattr(flow_diagrams, "_disk", None)
+    monkeypatch.setattr(flow_diagrams, "_used", set())
+    monkeypatch.setattr(flow_diagrams, "_seen", set())
+    return path
+
+
+def test_save_keeps_layouts_another_worker_wrote_meanwhile(cache):
+    flow_diagrams.flow_drawing("A -> B -> C", 400)
+    # Another render worker saves its own build between this worker's load and save.
+    cache.write_text(json.dumps({"other-worker": {"nodes": []}}))
+    flow_diagrams.save_layouts()
+    assert set(json.loads(cache.read_text())) == {"other-worker", flow_diagrams.spec_key(["A", "B", "C"], 400, "Helvetica", 7.5)}
+
+    # Once seen, layouts this build did not use are pruned by the next full build.
+    flow_diagrams.flow_drawing("D -> E", 400)
+    flow_diagrams.save_layouts()
+    assert set(json.loads(cache.read_text())) == {flow_diagrams.spec_key(["D", "E"], 400, "Helvetica", 7.5)}
+
+
+def test_partial_build_save_does_not_prune(cache):
+    flow_diagrams.flow_drawing("A -> B", 400)
+    flow_diagrams.save_layouts()
+    flow_diagrams.flow_drawing("C -> D", 400)
+    flow_diagrams.save_layouts(prune=False)
+    assert len(json.loads(cache.read_text())) == 2
+
+
+def test_graph_edges_must_reference_known_nodes():
+    assert flow_diagrams.graph_layers(["a", "b"], [("a", "b")]) == [["a"], ["b"]]
+    with pytest.raises(ValueError, match="not in the node list: c"):
+        flow_diagrams.graph_drawing(["a", "b"], [("a", "c")], 400)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import prompt_budget  # noqa: E402
+from prompt_budget import HEADING_RE, OUTLIER_Z, PREAMBLE, measure, outliers, split_sections  # noqa: E402
+
+PROMPT = """Build a landing page for the brand.
+
+Goal:
+Recreate the page.
+Page structure (preserve order and hierarchy):
+- Header: logo, nav
+- Hero
+Component recipes (follow these values where available):
+Button: 12px radius
+Design constraints:
+Keep colors: #fff, #000
+"""
+
+
+def test_heading_regex_drops_parenthetical_and_skips_inline_labels():
+    assert HEADING_RE.match("Goal:\n").group(1) == "Goal"
+    assert HEADING_RE.match("Page structure (preserve order and hierarchy):\n").group(1) == "Page structure"
+    # Lowercase starts, list items, and labels followed by a value are body lines, not headings.
+    for line in ("- Header: logo, nav\n", "goal:\n", "Keep colors: #fff, #000\n", "Hero\n"):
+        assert HEADING_RE.match(line) is None, line
+
+
+def test_split_sections_keeps_every_line_once():
+    sections = split_sections(PROMPT)
+    assert [name for name, _ in sections] == [PREAMBLE, "Goal", "Page structure", "Component recipes", "Design constraints"]
+    assert "".join(body for _, body in sections) == PROMPT
+    # "Button: 12px radius" starts with a capital but carries a value, so it stays in its section.
+    assert dict(sections)["Component recipes"].endswith("Button: 12px radius\n")
+    assert split_sections("\n\nGoal:\nx\n") == [(PREAMBLE, "\n\n"), ("Goal", "Goal:\nx\n")]
+    assert split_sections("Goal:\nx\n") == [("Goal", "Goal:\nx\n")]
+
+
+def test_measure_sums_sections_and_builds_the_counter_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(prompt_budget, "_count", None)
+    monkeypatch.setattr(prompt_budget, "make_counter", lambda: calls.append(1) or ("words", lambda text: len(text.split())))
+    first = measure(PROMPT.encode())
+    measure(b"Goal:\nagain\n")
+    assert len(calls) == 1
+    assert first["tokens"] == sum(first["sections"].values()) == len(PROMPT.split())
+    assert first["sections"]["Goal"] == 4
+
+
+def targets(tokens: list[int]) -> list[dict]:
+    return [{"slug": f"t{index}", "tokens": value} for index, value in enumerate(tokens)]
+
+
+def test_outliers_use_median_absolute_deviation():
+    flagged = outliers(targets([1000, 1010, 990, 1005, 995, 1020, 2000, 400]))
+    assert [entry["slug"] for entry in flagged] == ["t6", "t7"]
+    assert flagged[0]["z"] > OUTLIER_Z and flagged[1]["z"] < -OUTLIER_Z
+    assert outliers(targets([1000, 1010, 990, 1005, 995])) == []
+    assert outliers(targets([1000, 5000])) == []
+
+
+def test_outliers_fall_back_when_most_prompts_are_the_same_size():
+    # MAD is zero here, so the score uses the mean absolute deviation instead.
+    flagged = outliers(targets([1000] * 9 + [1400]))
+    assert [entry["slug"] for entry in flagged] == ["t9"]
+    assert outliers(targets([1000] * 5)) == []
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from quota_capacity_model import (  # noqa: E402
+    ANONYMOUS_LIFETIME_LIMIT,
+    GUEST_LIMIT,
+    MONTHLY_LIMIT,
+    OUTCOMES,
+    PLAN_LIMITS,
+    RATE_LIMITED,
+    RATE_MAX_PER_WINDOW,
+    RATE_WINDOW_S,
+    fixed_window_allowed,
+    load_trace,
+    simulate,
+)
+
+
+def random_trace(seed: int, actors: int = 40, requests: int = 3000) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    actor = rng.integers(0, actors, requests)
+    # Bursts a few seconds apart at the start of each month, plus requests spread over three months.
+    ts = rng.uniform(0, 90 * 86_400, requests)
+    burst = rng.random(requests) < 0.7
+    ts[burst] = np.floor(ts[burst] / (30 * 86_400)) * 30 * 86_400 + rng.exponential(5.0, burst.sum())
+    plan = (np.arange(actors) % 4).astype(np.int8)[actor]
+    return ts, actor, plan
+
+
+def reference_outcomes(ts: np.ndarray, actor: np.ndarray, plan: np.ndarray) -> np.ndarray:
+    # One request at a time, as src/lib/rate-limit.ts and the quota checks see them.
+    order = np.lexsort((ts, actor))
+    outcome = np.zeros(ts.size, dtype=np.int8)
+    window: dict[int, tuple[float, int]] = {}
+    guest_used: dict[int, int] = {}
+    month_used: dict[tuple[int, str], int] = {}
+    for index in order:
+        who, stamp = int(actor[index]), float(ts[index])
+        start, count = window.get(who, (None, 0))
+        if start is None or stamp >= start + RATE_WINDOW_S:
+            start, count = stamp, 0
+        window[who] = (start, count + 1)
+        if count + 1 > RATE_MAX_PER_WINDOW:
+            outcome[index] = RATE_LIMITED
+            continue
+        if plan[index] == 0:
+            guest_used[who] = guest_used.get(who, 0) + 1
+            if guest_used[who] > ANONYMOUS_LIFETIME_LIMIT:
+                outcome[index] = GUEST_LIMIT
+            continue
+        month = datetime.fromtimestamp(stamp, timezone.utc).strftime("%Y-%m")
+        month_used[(who, month)] = month_used.get((who, month), 0) + 1
+        if month_used[(who, month)] > PLAN_LIMITS[plan[index]]:
+            outcome[index] = MONTHLY_LIMIT
+    return outcome
+
+
+def test_fixed_window_matches_per_request_loop():
+    for seed in range(5):
+        ts, actor, plan = random_trace(seed)
+        order = np.lexsort((ts, actor))
+        expected = reference_outcomes(ts, actor, plan)[order] != RATE_LIMITED
+        assert np.array_equal(fixed_window_allowed(ts[order], actor[order]), expected)
+
+
+def test_simulated_outcomes_match_per_request_loop():
+    for seed in range(5):
+        ts, actor, plan = random_trace(seed)
+        counts = np.bincount(reference_outcomes(ts, actor, plan), minlength=len(OUTCOMES))
+        result = simulate(ts, actor, plan, topup_rate=0.0, max_topups=0, seed=seed)
+        assert result["outcomes"] == {label: int(count) for label, count in zip(OUTCOMES, counts)}
+        assert result["outcomes"]["rate_limited"] > 0 and result["outcomes"]["monthly_limit"] > 0
+
+
+def test_window_restarts_after_sixty_seconds():
+    ts = np.array([0.0] * 9 + [59.9, 60.0] + [60.0] * 8, dtype=np.float64)
+    allowed = fixed_window_allowed(ts, np.zeros(ts.size, dtype=np.int64))
+    assert allowed.tolist() == [True] * 8 + [False, False] + [True] * 8 + [False]
+
+
+def test_csv_and_jsonl_traces_load_the_same(tmp_path):
+    rows = [("2026-03-01T00:00:00Z", "a", "FREE"), ("2026-03-01T00:00:30.500Z", "b", ""), ("2026-03-02T10:00:00+00:00", "a", "FREE")]
+    csv_path = tmp_path / "trace.csv"
+    csv_path.write_text("timestamp,identifier,plan\n" + "".join(f'{stamp},"{who}",{plan}\n' for stamp, who, plan in rows))
+    jsonl_path = tmp_path / "trace.jsonl"
+    jsonl_path.write_text("".join(f'{{"timestamp": "{stamp}", "identifier": "{who}", "plan": "{plan}"}}\n' for stamp, who, plan in rows))
+
+    for path in (csv_path, jsonl_path):
+        ts, actor, plan = load_trace(path)
+        assert ts.tolist() == [1772323200.0, 1772323230.5, 1772445600.0]
+        assert actor.tolist() == [0, 1, 0]
+        assert plan.tolist() == [1, 0, 1]
+    assert simulate(*load_trace(csv_path), 0.0, 0, 1)["outcomes"]["allowed"] == 3
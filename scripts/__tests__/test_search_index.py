@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+pymupdf = pytest.importorskip("pymupdf")
+
+import generate_system_map_pdf as generator  # noqa: E402
+from search_index import SearchIndex, terms  # noqa: E402
+from system_map_content import Text  # noqa: E402
+
+
+def render(monkeypatch, edit=None) -> tuple[SearchIndex, list[str]]:
+    monkeypatch.setattr(generator, "save_layouts", lambda prune=True: None)
+    if edit is not None:
+        build_document = generator.content.build_document
+        monkeypatch.setattr(generator.content, "build_document", lambda: edit(build_document()))
+    index = SearchIndex("map.pdf")
+    target = io.BytesIO()
+    generator.render_system_map(target, index=index)
+    with pymupdf.open(stream=target.getvalue(), filetype="pdf") as pdf:
+        # Wrapped lines break words at arbitrary points, so compare without whitespace.
+        pages = ["".join(page.get_text().split()).lower() for page in pdf]
+    return index, pages
+
+
+def test_indexed_pages_match_extracted_page_text(monkeypatch, tmp_path):
+    index, pages = render(monkeypatch)
+    rows = [entry for section in index.sections for entry in section["entries"] if entry["table"] is not None]
+    assert len(rows) > 100
+    for section in index.sections:
+        for entry in section["entries"]:
+            first_cell = "".join(entry["text"].split(" | ")[0].split()).lower()[:40]
+            assert first_cell in pages[entry["page"] - 1], (section["title"], entry)
+
+    path = tmp_path / "map.index.json"
+    index.write(path)
+    for term, locations in json.loads(path.read_text())["postings"].items():
+        for _, page, table, _ in locations:
+            if table is not None:
+                assert "".join(term.split()) in pages[page - 1], (term, page)
+
+
+def test_incremental_index_matches_a_full_reindex(monkeypatch, tmp_path):
+    path = tmp_path / "map.index.json"
+    render(monkeypatch)[0].write(path)
+
+    def grow_second_to_last_section(blocks: list) -> list:
+        # The last section shares a page with the one before it; growing that one pushes its tail onto the next page.
+        heading = max(number for number, block in enumerate(blocks) if isinstance(block, Text) and block.style == "h1")
+        return blocks[:heading] + [Text("Added paragraph " * 80, "body")] + blocks[heading:]
+
+    index, _ = render(monkeypatch, grow_second_to_last_section)
+    last = index.sections[-1]
+    assert not last["starts_page"] and last["first_page"] < last["last_page"]
+    stats = index.write(path)
+    fresh = tmp_path / "fresh.index.json"
+    index.write(fresh)
+    assert 0 < stats["reused"] < stats["sections"]
+    assert json.loads(path.read_text())["postings"] == json.loads(fresh.read_text())["postings"]
+    assert terms("Added paragraph") <= set(json.loads(path.read_text())["postings"])
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import io
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import generate_system_map_pdf as generator  # noqa: E402
+from section_delta import CHANGED, UNCHANGED, compare_sections, load_manifest, split_sections, write_manifest  # noqa: E402
+from system_map_content import Bullets, PageBreak, Table, Text  # noqa: E402
+
+
+def document(generated: str, beta_text: str, beta_number: int = 2) -> list:
+    return [
+        Text("DesignDNA System Map", "title"),
+        Text(f"Generated: {generated}", "subtitle"),
+        Text("1. Alpha", "h1"),
+        Text("Alpha body", "body"),
+        Bullets(["first", "second"], "bullet"),
+        PageBreak(),
+        Text(f"{beta_number}. Beta", "h1"),
+        Text(beta_text, "body"),
+        Table([["Name", "Value"], ["a", "1"]], [144.0, 144.0]),
+    ]
+
+
+def baseline_for(blocks: list, tmp_path: Path) -> dict:
+    path = tmp_path / "map.sections.json"
+    write_manifest(path, split_sections(blocks, "h1", ignore=generator.is_volatile), "2026-10-01 00:00 UTC")
+    return load_manifest(path)
+
+
+def test_only_the_edited_section_is_changed(tmp_path):
+    baseline = baseline_for(document("2026-10-01 00:00 UTC", "Beta body"), tmp_path)
+
+    same = split_sections(document("2026-10-02 09:30 UTC", "Beta body", beta_number=3), "h1", ignore=generator.is_volatile)
+    compared, removed = compare_sections(same, baseline)
+    assert [(section.title, status) for section, status, _ in compared] == [("Cover", UNCHANGED), ("1. Alpha", UNCHANGED), ("3. Beta", UNCHANGED)]
+    assert not removed
+
+    edited = split_sections(document("2026-10-02 09:30 UTC", "Beta body, edited"), "h1", ignore=generator.is_volatile)
+    compared, _ = compare_sections(edited, baseline)
+    statuses = {section.title: (status, changed) for section, status, changed in compared}
+    assert statuses["Cover"][0] == statuses["1. Alpha"][0] == UNCHANGED
+    assert statuses["2. Beta"][0] == CHANGED and len(statuses["2. Beta"][1]) == 1
+
+
+def test_delta_story_renders_and_marks_only_the_changed_section(tmp_path, monkeypatch):
+    baseline = baseline_for(document("2026-10-01 00:00 UTC", "Beta body"), tmp_path)
+    monkeypatch.setattr(generator.content, "build_document", lambda: document("2026-10-02 09:30 UTC", "Beta body, edited"))
+    rendered = []
+    append_block = generator.append_block
+
+    def recording_append(story, styles, block):
+        rendered.append(block)
+        append_block(story, styles, block)
+
+    monkeypatch.setattr(generator, "append_block", recording_append)
+    monkeypatch.setattr(generator, "save_layouts", lambda prune=True: None)
+    generator.render_system_map(io.BytesIO(), baseline=baseline)
+
+    texts = [block.text for block in rendered if isinstance(block, Text)]
+    # Unchanged sections are compared by fingerprint and never rendered.
+    assert "Alpha body" not in texts and "1. Alpha" not in texts and "DesignDNA System Map" not in texts
+    assert texts == ["2. Beta", "Changed", "Beta body, edited"]
+    assert isinstance(rendered[-1], Table)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pack_snapshots import pack  # noqa: E402
+from snapshot_archive import HEADER, ArchiveError, SnapshotArchive, append_targets, compact  # noqa: E402
+
+INCLUDE = ["*.txt", "*.json"]
+
+
+def write_target(root: Path, slug: str, prompt: str, visual: int = 0, prefix: str = ""):
+    folder = root / slug
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / f"{prefix}stitchPrompt.txt").write_text(prompt)
+    (folder / f"{prefix}tokens.json").write_text(json.dumps({"colors": ["#000000"]}, indent=2))
+    score = {"url": f"https://{slug}/", "captured_at": "2026-02-19T01:28:24.971Z", "runtime_seconds": 1.5, "visual_fidelity_1_to_5": visual}
+    (folder / f"{prefix}score.json").write_text(json.dumps(score, indent=2))
+    (folder / "reference.png").write_bytes(b"\x89PNG")
+
+
+def test_round_trip_and_score_columns(tmp_path):
+    root, archive_path = tmp_path / "regression", tmp_path / "snapshots.ddsnap"
+    write_target(root, "apple-com", "apple prompt\n", visual=4)
+    write_target(root, "Vineyard Vines", "vv prompt\n", visual=3, prefix="vv-")
+
+    changes = pack(root, archive_path, INCLUDE, prune=False)
+    assert changes["added"] == ["Vineyard Vines", "apple-com"]
+
+    with SnapshotArchive(archive_path) as archive:
+        assert archive.slugs() == ["Vineyard Vines", "apple-com"]
+        assert sorted(archive.files("apple-com")) == ["score.json", "stitchPrompt.txt", "tokens.json"]
+        assert archive.read("Vineyard Vines", "vv-stitchPrompt.txt") == b"vv prompt\n"
+        assert archive.json("apple-com", "score.json")["url"] == "https://apple-com/"
+        slugs, scores = archive.scores()
+        stats = archive.stats()
+
+    assert slugs == ["Vineyard Vines", "apple-com"]
+    assert scores["visual_fidelity_1_to_5"].tolist() == [3, 4]
+    assert scores["runtime_seconds"].tolist() == [1.5, 1.5]
+    assert scores["captured_at_ms"][0] == 1771464504971
+    # Both tokens.json files are identical, so they share one blob.
+    assert stats["blobs"] == 5 and stats["dead_bytes"] == 0
+
+
+def test_incremental_append_and_compact(tmp_path):
+    root, archive_path = tmp_path / "regression", tmp_path / "snapshots.ddsnap"
+    write_target(root, "a-com", "first\n")
+    write_target(root, "b-com", "second\n")
+    pack(root, archive_path, INCLUDE, prune=False)
+    size = archive_path.stat().st_size
+
+    assert pack(root, archive_path, INCLUDE, prune=False)["unchanged"] == ["a-com", "b-com"]
+    assert archive_path.stat().st_size == size
+
+    write_target(root, "a-com", "first, edited\n", visual=5)
+    write_target(root, "c-com", "third\n")
+    changes = pack(root, archive_path, INCLUDE, prune=False)
+    assert (changes["added"], changes["updated"], changes["unchanged"]) == (["c-com"], ["a-com"], ["b-com"])
+    with SnapshotArchive(archive_path) as archive:
+        assert archive.text("a-com", "stitchPrompt.txt") == "first, edited\n"
+        assert archive.scores()[1]["visual_fidelity_1_to_5"].tolist() == [5, 0, 0]
+        assert archive.stats()["dead_bytes"] > 0
+
+    shutil.rmtree(root / "b-com")
+    assert pack(root, archive_path, INCLUDE, prune=True)["removed"] == ["b-com"]
+    compact(archive_path)
+    with SnapshotArchive(archive_path) as archive:
+        assert archive.slugs() == ["a-com", "c-com"]
+        assert archive.text("c-com", "stitchPrompt.txt") == "third\n"
+        assert archive.stats()["dead_bytes"] == 0
+
+
+def test_interrupted_append_keeps_previous_index(tmp_path):
+    archive_path = tmp_path / "snapshots.ddsnap"
+    append_targets(archive_path, {"a-com": {"stitchPrompt.txt": (b"first\n", {})}})
+    header = archive_path.read_bytes()[: HEADER.size]
+
+    append_targets(archive_path, {"b-com": {"stitchPrompt.txt": (b"second\n", {})}})
+    with archive_path.open("r+b") as handle:
+        handle.write(header)
+    with SnapshotArchive(archive_path) as archive:
+        assert archive.slugs() == ["a-com"]
+        assert archive.text("a-com", "stitchPrompt.txt") == "first\n"
+
+    archive_path.write_bytes(b"not an archive" * 4)
+    with pytest.raises(ArchiveError):
+        SnapshotArchive(archive_path)
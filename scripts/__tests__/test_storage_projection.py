@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import sys
+from array import array
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from storage_projection import CLASSES, STATUSES, ExtractionIndex, ListingStats, project  # noqa: E402
+
+HOUR = 3600.0
+# 2026-03-02 05:00 UTC: five hours after a daily cron run.
+AS_OF = 1772427600.0
+
+
+def reference_totals(cleanable_by_hour, hourly_bytes, as_of, ttl_hours, cron_hours) -> np.ndarray:
+    # Follow each hour's bytes: present from its arrival until the first cron run after as_of that finds it
+    # at least ttl_hours old.
+    start_hour = int(as_of // 3600)
+    arrivals = [(-age, value) for age, value in enumerate(cleanable_by_hour)]
+    arrivals += [(hour + 1, value) for hour, value in enumerate(hourly_bytes)]
+    totals = np.zeros(hourly_bytes.size + 1)
+    for arrived, value in arrivals:
+        removed = next(run for run in range(1, 10**6) if (start_hour + run) % cron_hours == 0 and run - arrived >= ttl_hours)
+        for t in range(max(arrived, 0), min(removed, totals.size)):
+            totals[t] += value
+    return totals
+
+
+def test_single_arrival_is_removed_by_the_first_run_after_it_expires():
+    hourly = np.zeros(24 * 3)
+    hourly[0] = 1000.0
+    result = project(np.zeros(48 + 1), hourly, 0.0, np.zeros(hourly.size), AS_OF, ttl_hours=24, cron_hours=24)
+    # Arrives in hour 1; runs happen at hours 19, 43, 67. The run at 19 finds it 18 h old, the one at 43 removes it.
+    assert result["daily_end_bytes"] == [0, 1000, 0, 0]
+    assert result["peak_bytes"] == 1000
+    assert result["final_week_mean_bytes"] == (42 * 1000) // 73
+
+
+def test_projection_matches_per_arrival_reference():
+    rng = np.random.default_rng(5)
+    for ttl in (1, 24, 72, 168):
+        for cron in (1, 6, 24, 168):
+            history = ttl + cron
+            cleanable = rng.integers(0, 1000, history + 1).astype(np.float64)
+            hourly = rng.integers(0, 1000, 24 * 10).astype(np.float64)
+            expected = reference_totals(cleanable, hourly, AS_OF, ttl, cron)
+            result = project(cleanable, hourly, 0.0, np.zeros(hourly.size), AS_OF, ttl, cron)
+            assert result["daily_end_bytes"] == [int(value) for value in expected[::24]], (ttl, cron)
+            assert result["peak_bytes"] == int(expected.max())
+            assert result["final_week_mean_bytes"] == int(expected[-24 * 7 :].mean())
+
+
+def test_listing_objects_are_classified_against_the_last_cron_run():
+    stats = ListingStats(AS_OF, cron_hours=24, history_hours=48)
+    last_run = stats.last_tick
+    assert last_run == AS_OF - 5 * HOUR
+
+    rows = [
+        # (extraction key, status, expires_at, object created_at, recognized)
+        (1, "completed", AS_OF + HOUR, AS_OF - 23 * HOUR, True),
+        (2, "completed", AS_OF - HOUR, AS_OF - 25 * HOUR, True),
+        (3, "completed", last_run, AS_OF - 29 * HOUR, True),
+        (4, "completed", last_run - 1, AS_OF - 30 * HOUR, True),
+        (5, "failed", AS_OF - 40 * HOUR, AS_OF - 60 * HOUR, True),
+        (6, None, 0.0, AS_OF - HOUR, True),
+        (0, None, 0.0, AS_OF - HOUR, False),
+    ]
+    known = [row for row in rows if row[1] is not None]
+    index = ExtractionIndex(
+        np.array([row[0] for row in known], dtype=np.uint64),
+        np.array([row[2] for row in known], dtype=np.float64),
+        np.array([STATUSES.index(row[1]) for row in known], dtype=np.int8),
+    )
+    stats.add_chunk(
+        index,
+        array("Q", [row[0] for row in rows]),
+        array("q", [100] * len(rows)),
+        array("d", [row[3] for row in rows]),
+        array("b", [0] * len(rows)),
+        array("b", [row[4] for row in rows]),
+        Counter({"user": 100 * len(rows)}),
+    )
+
+    per_class = dict(zip(CLASSES, stats.objects.sum(axis=1).tolist()))
+    # Expiring exactly at the last run is not "before" it: cleanup only removes expires_at < now.
+    assert per_class == {
+        "live": 1,
+        "expired_pending": 2,
+        "expired_missed": 1,
+        "orphan_incomplete": 1,
+        "orphan_no_row": 1,
+        "unrecognized": 1,
+    }
+    # Only live and expired objects feed the projection, by whole hours of age.
+    assert np.flatnonzero(stats.cleanable_by_hour).tolist() == [23, 25, 29, 30]
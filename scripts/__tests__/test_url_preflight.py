@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from url_preflight import (  # noqa: E402
+    ConnectionPool,
+    PreflightChecker,
+    PreflightError,
+    RobotsCache,
+    normalize_url,
+    parse_robots,
+    robots_allows,
+    url_string,
+)
+
+ROBOTS = {
+    "public.test": "User-agent: *\nDisallow: /private\n",
+    "allowlist.test": "User-agent: *\nDisallow: /\nAllow: /public\n",
+    "agent.test": "User-agent: Googlebot\nAllow: /\n\nUser-agent: Design\nDisallow: /\n",
+    "redirect.test": None,
+    "streamed.test": None,
+}
+ADDRESSES = {
+    "public.test": ["93.184.216.34"],
+    "allowlist.test": ["93.184.216.35"],
+    "agent.test": ["93.184.216.36"],
+    "missing.test": ["93.184.216.37"],
+    "broken.test": ["93.184.216.38"],
+    "redirect.test": ["93.184.216.39"],
+    "streamed.test": ["93.184.216.41"],
+    "private.test": ["192.168.1.10"],
+    "mixed.test": ["93.184.216.40", "10.0.0.8"],
+    "ula.test": ["fd00::1"],
+}
+
+
+class StandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests: list[tuple[str, str, str]] = []
+
+    def log_message(self, *args):
+        pass
+
+    def send(self, status: int, body: bytes = b"", headers: dict[str, str] | None = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def send_streamed(self, parts: list[bytes]):
+        # No Content-Length or chunking: the body runs until the connection closes.
+        self.send_response(200)
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for part in parts:
+            self.wfile.write(part)
+            self.wfile.flush()
+            time.sleep(0.05)
+        self.close_connection = True
+
+    def do_GET(self):
+        host = self.headers["Host"].split(":")[0]
+        StandIn.requests.append((self.command, host, self.path))
+        if self.path == "/robots.txt":
+            if host == "broken.test":
+                self.send(500, b"oops")
+            elif host == "streamed.test":
+                self.send_streamed([b"User-agent: *\n", b"Allow: /public\n", b"Disallow: /private\n"])
+            elif host == "redirect.test":
+                self.send(301, headers={"Location": "/moved-robots.txt"})
+            elif host in ROBOTS:
+                self.send(200, ROBOTS[host].encode())
+            else:
+                self.send(404)
+        elif self.path == "/moved-robots.txt":
+            self.send(200, b"User-agent: *\nDisallow: /blocked\n")
+        else:
+            self.send(200, b"<html></html>")
+
+    do_HEAD = do_GET
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+async def fake_resolve(host: str) -> list[str]:
+    if host not in ADDRESSES:
+        raise OSError(f"getaddrinfo failed for {host}")
+    return ADDRESSES[host]
+
+
+def run_batch(port: int, urls: list[str], probe: bool = False, per_host: int = 2, robots: RobotsCache | None = None):
+    async def batch():
+        pool = ConnectionPool(per_host=per_host, connect_to={host: ("127.0.0.1", port) for host in ADDRESSES})
+        cache = robots or RobotsCache(pool)
+        cache.pool = pool
+        checker = PreflightChecker(pool, cache, resolve=fake_resolve, concurrency=64, probe=probe)
+        try:
+            return await checker.check_all(urls), pool, cache
+        finally:
+            await pool.close()
+
+    StandIn.requests.clear()
+    return asyncio.run(batch())
+
+
+def test_normalize_url_matches_url_security():
+    assert url_string(normalize_url("https://example.com/path")) == "https://example.com/path"
+    assert url_string(normalize_url("example.com/path")) == "https://example.com/path"
+    assert url_string(normalize_url("HTTPS://Example.COM:443")) == "https://example.com/"
+    for raw, code in [
+        ("ftp://example.com", "INVALID_URL"),
+        ("   ", "INVALID_URL"),
+        ("https://", "INVALID_URL"),
+        ("https://example.com:99999", "INVALID_URL"),
+        ("http://localhost:3000", "TARGET_BLOCKED"),
+        ("http://[::1]/", "TARGET_BLOCKED"),
+        ("printer.local", "TARGET_BLOCKED"),
+    ]:
+        with pytest.raises(PreflightError) as error:
+            normalize_url(raw)
+        assert error.value.code == code
+
+
+def test_robots_rules_match_robots_ts():
+    target = normalize_url("https://example.com/private/data")
+    assert not robots_allows(parse_robots("User-agent: *\nDisallow: /private"), target)
+    assert robots_allows(parse_robots("User-agent: *\nDisallow: /\nAllow: /public"), normalize_url("https://example.com/public"))
+    assert robots_allows(parse_robots("User-agent: Googlebot\nDisallow: /"), target)
+    assert not robots_allows(parse_robots("User-agent: *\nDisallow: /private$"), normalize_url("https://example.com/private"))
+    assert robots_allows(parse_robots("User-agent: *\nDisallow: /private$"), target)
+    assert not robots_allows(parse_robots("User-agent: *\nDisallow: /*/data"), target)
+    assert robots_allows(parse_robots("User-agent: *\nDisallow: /search$"), normalize_url("https://example.com/search?q=1"))
+
+
+def test_batch_reports_rejections(server):
+    urls = [
+        "http://public.test/",
+        "http://public.test/private/page",
+        "http://allowlist.test/public/page",
+        "http://allowlist.test/other",
+        "http://agent.test/",
+        "http://missing.test/anything",
+        "http://broken.test/anything",
+        "http://redirect.test/blocked/page",
+        "http://private.test/",
+        "http://mixed.test/",
+        "http://ula.test/",
+        "http://unknown.test/",
+        "ftp://public.test/",
+    ]
+    results, _, _ = run_batch(server, urls)
+    verdicts = {result["url"]: (result["verdict"], result["code"], result["reason"]) for result in results}
+
+    assert verdicts["http://public.test/"][0] == "allowed"
+    assert verdicts["http://public.test/private/page"] == ("rejected", "TARGET_BLOCKED", "robots.txt disallows this path")
+    assert verdicts["http://allowlist.test/public/page"][0] == "allowed"
+    assert verdicts["http://allowlist.test/other"][0] == "rejected"
+    assert verdicts["http://agent.test/"][0] == "rejected"
+    assert verdicts["http://missing.test/anything"][0] == "allowed"
+    assert verdicts["http://broken.test/anything"][0] == "allowed"
+    assert verdicts["http://redirect.test/blocked/page"][0] == "rejected"
+    assert verdicts["http://private.test/"] == ("rejected", "TARGET_BLOCKED", "Target resolves to a private IPv4 address")
+    assert verdicts["http://mixed.test/"][0] == "rejected"
+    assert verdicts["http://ula.test/"][2] == "Target resolves to a private IPv6 address"
+    assert verdicts["http://unknown.test/"][:2] == ("rejected", "INTERNAL_ERROR")
+    assert verdicts["ftp://public.test/"][:2] == ("rejected", "INVALID_URL")
+    assert [result["url"] for result in results] == urls
+
+
+def test_close_delimited_robots_read_to_eof(server):
+    results, _, _ = run_batch(server, ["http://streamed.test/public", "http://streamed.test/private/page"])
+    verdicts = [result["verdict"] for result in results]
+    assert verdicts == ["allowed", "rejected"]
+
+
+def test_robots_fetched_once_per_origin_and_connections_pooled(server):
+    urls = [f"http://public.test/page/{idx}" for idx in range(400)]
+    results, pool, robots = run_batch(server, urls, probe=True, per_host=3)
+
+    assert all(result["verdict"] == "allowed" and result["http_status"] == 200 for result in results)
+    assert robots.fetched == 1
+    assert [request for request in StandIn.requests if request[2] == "/robots.txt"] == [("GET", "public.test", "/robots.txt")]
+    assert sum(1 for request in StandIn.requests if request[0] == "HEAD") == 400
+    assert pool.opened <= 3
+    assert pool.reused >= 398
+
+
+def test_robots_cache_ttl(server, tmp_path):
+    path = tmp_path / "robots.json"
+    _, _, robots = run_batch(server, ["http://public.test/"])
+    robots.save(path)
+
+    cached = RobotsCache.load(path, pool=None, ttl=3600)
+    _, _, cached = run_batch(server, ["http://public.test/", "http://public.test/private/x"], robots=cached)
+    assert cached.fetched == 0 and cached.hits == 2
+    assert not StandIn.requests
+
+    expired = RobotsCache.load(path, pool=None, ttl=0)
+    _, _, expired = run_batch(server, ["http://public.test/"], robots=expired)
+    assert expired.fetched == 1
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from visual_diff import C1, C2, LUMA, align, compare, tile_hashes, tile_scores  # noqa: E402
+
+TILE = 32
+
+
+def screenshot(seed: int = 7, height: int = 96, width: int = 128) -> np.ndarray:
+    # Gradient plus noise, so every tile has its own content and nonzero variance.
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(40, 215, width, dtype=np.float32)[None, :, None]
+    return np.clip(ramp + rng.normal(0, 20, (height, width, 3)), 0, 255).astype(np.uint8)
+
+
+def save(image: np.ndarray, path: Path) -> str:
+    Image.fromarray(image).save(path)
+    return str(path)
+
+
+def test_only_the_edited_tile_changes(tmp_path):
+    reference = screenshot()
+    candidate = reference.copy()
+    # Invert the tile at row 1, column 2.
+    candidate[32:64, 64:96] = 255 - candidate[32:64, 64:96]
+
+    same = tile_hashes(reference, TILE) == tile_hashes(candidate, TILE)
+    assert same.shape == (3, 4)
+    assert np.argwhere(~same).tolist() == [[1, 2]]
+
+    heatmap_path = tmp_path / "heatmap.png"
+    result = compare(save(reference, tmp_path / "ref.png"), save(candidate, tmp_path / "cand.png"), str(heatmap_path), TILE)
+    assert result["size"] == [128, 96]
+    assert result["tiles"] == 12 and result["identical_tiles"] == 11 and result["missing_tiles"] == 0
+    assert result["changed_fraction"] == round(1 / 12, 4)
+    assert result["worst_tiles"][0]["x"] == 64 and result["worst_tiles"][0]["y"] == 32
+    assert result["worst_tiles"][0]["similarity"] < 0.2
+    assert 11 / 12 <= result["similarity"] < 1
+
+    overlay = np.asarray(Image.open(heatmap_path).convert("RGB")).astype(int)
+    assert overlay.shape == reference.shape
+    # The changed tile is tinted red; untouched tiles stay gray.
+    changed_tint = overlay[32:64, 64:96, 0] - overlay[32:64, 64:96, 1]
+    untouched_tint = overlay[:32, :32, 0] - overlay[:32, :32, 1]
+    assert changed_tint.min() > 100 and np.abs(untouched_tint).max() <= 1
+
+
+def test_tile_ssim_matches_the_formula():
+    reference = screenshot(seed=3, height=32, width=64)
+    candidate = reference.copy()
+    candidate[:, 32:] = np.clip(candidate[:, 32:].astype(int) + 30, 0, 255).astype(np.uint8)
+    changed = np.array([[False, True]])
+
+    ssim, diff = tile_scores(reference, candidate, changed, TILE)
+    assert ssim[0, 0] == 1 and diff[0, 0] == 0
+
+    x = (reference[:, 32:].astype(np.float64) @ LUMA).ravel()
+    y = (candidate[:, 32:].astype(np.float64) @ LUMA).ravel()
+    cov = ((x - x.mean()) * (y - y.mean())).mean()
+    expected = ((2 * x.mean() * y.mean() + C1) * (2 * cov + C2)) / ((x.mean() ** 2 + y.mean() ** 2 + C1) * (x.var() + y.var() + C2))
+    assert abs(ssim[0, 1] - expected) < 1e-4
+    expected_diff = np.abs(reference[:, 32:].astype(int) - candidate[:, 32:].astype(int)).mean() / 255
+    assert abs(diff[0, 1] - expected_diff) < 1e-5
+
+
+def test_shorter_candidate_counts_missing_tiles(tmp_path):
+    reference = screenshot()
+    _, _, covered = align(reference, reference[:40], TILE)
+    assert covered.tolist() == [True, True, False]
+
+    result = compare(save(reference, tmp_path / "ref.png"), save(reference[:40], tmp_path / "cand.png"), None, TILE)
+    assert result["missing_tiles"] == 4
+    assert result["similarity"] <= 8 / 12
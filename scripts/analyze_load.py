@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from http_pool import ConnectionPool
+
+OUT = Path("output/reports/analyze-load.json")
+TRACE_DIR = Path("output/load")
+URLS = Path("test/fixtures/urls.json")
+ENDPOINT = "http://localhost:3000/api/analyze"
+ARRIVALS = ("closed", "constant", "poisson")
+PERCENTILES = (50, 90, 99)
+REQUEST_TIMEOUT_S = 180.0
+MAX_RESPONSE_BYTES = 16 * 1024 * 1024
+USER_AGENT = "DesignDNA-load"
+
+# The stand-in mimics the /api/analyze response shape; its step medians (ms) and lognormal sigma are
+# roughly a fast-mode capture with LLM enhancement.
+STAND_IN_PHASES = {"navigation_ms": 2200, "network_idle_ms": 1500, "settle_ms": 600, "snapshot_ms": 900, "screenshot_ms": 700}
+STAND_IN_STEPS = {"preflight_ms": 180, "llm_ms": 4500, "persist_ms": 120}
+STAND_IN_SIGMA = 0.35
+STAND_IN_LLM_PATHS = (("strict_success", 0.8), ("repair_success", 0.1), ("deterministic_fallback", 0.1))
+
+
+class StandIn:
+    def __init__(self, speedup: float = 50.0, failure_rate: float = 0.05, seed: int = 7):
+        self.speedup = speedup
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.server: asyncio.AbstractServer | None = None
+        self.handlers: set[asyncio.Task] = set()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/api/analyze"
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await asyncio.gather(*self.handlers, return_exceptions=True)
+            await self.server.wait_closed()
+
+    def sample(self, median: float) -> int:
+        return round(self.rng.lognormvariate(np.log(median), STAND_IN_SIGMA))
+
+    def timing(self, blocked: bool) -> dict:
+        preflight = self.sample(STAND_IN_STEPS["preflight_ms"])
+        if blocked:
+            empty = {"capture_ms": 0, "llm_ms": 0, "persist_ms": 0, "capture_detail": None, "llm_detail": None}
+            return {"preflight_ms": preflight, "total_ms": preflight, **empty}
+        phases = {key: self.sample(median) for key, median in STAND_IN_PHASES.items()}
+        phases["total_ms"] = sum(phases.values())
+        llm = self.sample(STAND_IN_STEPS["llm_ms"])
+        persist = self.sample(STAND_IN_STEPS["persist_ms"])
+        final_path = self.rng.choices([path for path, _ in STAND_IN_LLM_PATHS], [weight for _, weight in STAND_IN_LLM_PATHS])[0]
+        return {
+            "preflight_ms": preflight,
+            "capture_ms": phases["total_ms"],
+            "llm_ms": llm,
+            "persist_ms": persist,
+            "total_ms": preflight + phases["total_ms"] + llm + persist,
+            "capture_detail": {"mode": "fast", "backstop_used": False, "backstop_reason": None, "phase_ms": phases},
+            "llm_detail": {"final_path": final_path, "total_ms": llm},
+        }
+
+    async def respond(self, body: dict, include_timing: bool) -> tuple[int, dict]:
+        url = str(body.get("url", "")).strip()
+        if not url:
+            return 400, {"status": "failed", "code": "INVALID_REQUEST", "error": "Invalid request"}
+        blocked = self.rng.random() < self.failure_rate
+        timing = self.timing(blocked)
+        await asyncio.sleep(timing["total_ms"] / 1000 / self.speedup)
+        extra = {"timing": timing} if include_timing else {}
+        if blocked:
+            return 400, {"status": "failed", "code": "TARGET_BLOCKED", "error": "robots.txt disallows this path", **extra}
+        return 200, {"status": "completed", "source_url": url, "url": url, "summary": "Stand-in summary.", "prompt": "", "history_id": None, **extra}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self.handlers.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                raw = await reader.readexactly(int(headers.get("content-length", 0)))
+                try:
+                    body = json.loads(raw or b"{}")
+                except ValueError:
+                    body = {}
+                debug = headers.get("x-ddna-debug-timing", "").lower() in ("1", "true")
+                status, payload = await self.respond(body, debug)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Bad Request'}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\nConnection: keep-alive\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.handlers.discard(task)
+            writer.close()
+
+
+def load_targets(path: Path) -> list[str]:
+    data = json.loads(path.read_text())
+    return [item["url"] if isinstance(item, dict) else item for item in data]
+
+
+def parse_headers(values: list[str]) -> dict[str, str]:
+    headers = {}
+    for value in values:
+        name, sep, content = value.partition(":")
+        if not sep:
+            raise SystemExit(f"--header expects NAME:VALUE, got {value!r}")
+        headers[name.strip()] = content.strip()
+    return headers
+
+
+async def send(pool: ConnectionPool, endpoint: str, target: str, headers: dict[str, str], timeout: float) -> dict:
+    record: dict = {"target": target}
+    sent = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(
+            pool.request("POST", endpoint, json.dumps({"url": target}).encode(), headers), timeout
+        )
+    except asyncio.TimeoutError:
+        record["error"] = "timeout"
+    except (OSError, ValueError, asyncio.IncompleteReadError) as error:
+        record["error"] = type(error).__name__
+        record["detail"] = str(error)
+    else:
+        record["http_status"] = response.status
+        try:
+            payload = json.loads(response.body)
+        except ValueError:
+            payload = {}
+        record["status"] = payload.get("status", "unknown")
+        if payload.get("code"):
+            record["code"] = payload["code"]
+        if isinstance(payload.get("timing"), dict):
+            record["timing"] = payload["timing"]
+    record["latency_ms"] = round((time.perf_counter() - sent) * 1000, 1)
+    return record
+
+
+async def run_load(args: argparse.Namespace, endpoint: str, targets: list[str], trace) -> tuple[list[dict], float]:
+    pool = ConnectionPool(per_host=args.concurrency, user_agent=USER_AGENT, max_body=MAX_RESPONSE_BYTES)
+    base_headers = {"Content-Type": "application/json", "x-ddna-debug-timing": "1", **parse_headers(args.header)}
+    limit = asyncio.Semaphore(args.concurrency)
+    rng = random.Random(args.seed)
+    summaries: list[dict] = []
+    started = time.perf_counter()
+    deadline = started + args.duration if args.duration else None
+
+    def due(seq: int, at: float) -> bool:
+        return (args.requests is None or seq < args.requests) and (deadline is None or at < deadline)
+
+    async def one(seq: int, scheduled: float):
+        async with limit:
+            headers = dict(base_headers)
+            if args.rotate_forwarded_for:
+                # 198.18.0.0/15 is reserved for benchmarking, so every request gets its own rate-limit identifier.
+                headers["x-forwarded-for"] = f"198.18.{seq // 256 % 256}.{seq % 256}"
+            queue_ms = (time.perf_counter() - scheduled) * 1000
+            record = await send(pool, endpoint, targets[seq % len(targets)], headers, args.timeout)
+        record = {"seq": seq, "scheduled_ms": round((scheduled - started) * 1000, 1), "queue_ms": round(queue_ms, 1), **record}
+        trace.write(json.dumps(record, separators=(",", ":")) + "\n")
+        summaries.append({key: value for key, value in record.items() if key != "timing"} | {"timed": "timing" in record})
+
+    try:
+        if args.arrival == "closed":
+            counter = itertools.count()
+
+            async def worker():
+                while due(seq := next(counter), time.perf_counter()):
+                    await one(seq, time.perf_counter())
+
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        else:
+            tasks = []
+            next_at = started
+            for seq in itertools.count():
+                if not due(seq, next_at):
+                    break
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(one(seq, next_at)))
+                next_at += rng.expovariate(args.rate) if args.arrival == "poisson" else 1 / args.rate
+            await asyncio.gather(*tasks)
+    finally:
+        await pool.close()
+    return summaries, time.perf_counter() - started
+
+
+def distribution(values: list[float]) -> dict:
+    data = np.asarray(values, dtype=np.float64)
+    if data.size == 0:
+        return {"count": 0}
+    points = np.percentile(data, PERCENTILES)
+    return {
+        "count": int(data.size),
+        "mean": round(float(data.mean()), 1),
+        "max": round(float(data.max()), 1),
+        **{f"p{pct}": round(float(value), 1) for pct, value in zip(PERCENTILES, points)},
+    }
+
+
+def build_report(records: list[dict], wall_s: float, args: argparse.Namespace, endpoint: str, trace: Path) -> dict:
+    responses = [record for record in records if "error" not in record]
+    completed = [record for record in responses if record["status"] == "completed"]
+    return {
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "endpoint": "stand-in" if args.stand_in else endpoint,
+        "trace": trace.as_posix(),
+        "parameters": {
+            "arrival": args.arrival,
+            "rate_per_s": None if args.arrival == "closed" else args.rate,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "duration_s": args.duration,
+            "rotate_forwarded_for": args.rotate_forwarded_for,
+            "seed": args.seed,
+        },
+        "wall_s": round(wall_s, 2),
+        "sent": len(records),
+        "responses": len(responses),
+        "completed": len(completed),
+        "failed": len(responses) - len(completed),
+        "transport_errors": len(records) - len(responses),
+        "throughput_rps": round(len(responses) / wall_s, 3) if wall_s else 0.0,
+        "completed_rps": round(len(completed) / wall_s, 3) if wall_s else 0.0,
+        "latency_ms": distribution([record["latency_ms"] for record in responses]),
+        "queue_ms": distribution([record["queue_ms"] for record in records]),
+        "http_statuses": dict(Counter(str(record["http_status"]) for record in responses)),
+        "failure_codes": dict(Counter(record.get("code", record["status"]) for record in responses if record["status"] != "completed")),
+        "errors": dict(Counter(record["error"] for record in records if "error" in record)),
+        "timing_samples": sum(record["timed"] for record in records),
+    }
+
+
+async def main_async(args: argparse.Namespace, trace_path: Path) -> tuple[list[dict], float, str]:
+    stand_in = StandIn(args.stand_in_speedup, args.stand_in_failure_rate, args.seed) if args.stand_in else None
+    endpoint = await stand_in.start() if stand_in else args.endpoint
+    trace_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with trace_path.open("w", encoding="utf-8", buffering=1) as trace:
+            records, wall_s = await run_load(args, endpoint, load_targets(args.urls), trace)
+    finally:
+        if stand_in:
+            await stand_in.stop()
+    return records, wall_s, endpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test /api/analyze and record its debug timing payloads.")
+    parser.add_argument("--endpoint", default=ENDPOINT, help="Full URL of the analyze route.")
+    parser.add_argument("--urls", type=Path, default=URLS, help="JSON list of target URLs, used round-robin.")
+    parser.add_argument("--arrival", choices=ARRIVALS, default="closed", help="closed: back-to-back per slot; constant/poisson: open loop at --rate.")
+    parser.add_argument("--rate", type=float, default=1.0, help="Requests per second for open-loop arrivals.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Max requests in flight (and pooled connections).")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests (default 50 without --duration).")
+    parser.add_argument("--duration", type=float, help="Stop sending after this many seconds.")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT_S, help="Per-request timeout in seconds.")
+    parser.add_argument("--header", action="append", default=[], help="Extra request header as NAME:VALUE (repeatable).")
+    parser.add_argument("--rotate-forwarded-for", action="store_true", help="Send a distinct x-forwarded-for per request.")
+    parser.add_argument("--stand-in", action="store_true", help="Drive a local stand-in with synthetic timings instead.")
+    parser.add_argument("--stand-in-speedup", type=float, default=50.0, help="Stand-in runs its synthetic timings this much faster.")
+    parser.add_argument("--stand-in-failure-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--trace", type=Path, help="JSONL file for per-request records (default output/load/...).")
+    parser.add_argument("--out", type=Path, default=OUT, help="Where to write the JSON summary report.")
+    args = parser.parse_args()
+    if args.requests is None and args.duration is None:
+        args.requests = 50
+    if args.arrival != "closed" and args.rate <= 0:
+        raise SystemExit("--rate must be positive for open-loop arrivals")
+
+    trace_path = args.trace or TRACE_DIR / f"analyze-load-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}.jsonl"
+    records, wall_s, endpoint = asyncio.run(main_async(args, trace_path))
+
+    report = build_report(records, wall_s, args, endpoint, trace_path)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2) + "\n")
+    latency = report["latency_ms"]
+    print(
+        f"{report['sent']} requests in {report['wall_s']:.1f} s: {report['throughput_rps']:.2f} rps, "
+        f"{report['completed']} completed, {report['failed']} failed, {report['transport_errors']} transport errors"
+    )
+    if latency["count"]:
+        print(f"latency p50 {latency['p50']:.0f} ms, p90 {latency['p90']:.0f} ms, p99 {latency['p99']:.0f} ms")
+    print(f"timing trace: {trace_path.resolve()} (feed it to analyze_timing_report.py)")
+    print(str(args.out.resolve()))
+
+
+if __name__ == "__main__":
+    main()
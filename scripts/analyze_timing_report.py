@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+OUT = Path("output/reports/analyze-timing.json")
+PERCENTILES = (50, 90, 99)
+HISTOGRAM_BINS = 12
+
+STEPS = (
+    ("preflight_ms", "Preflight (public IP + robots)"),
+    ("capture_ms", "Playwright capture"),
+    ("llm_ms", "LLM enhancement"),
+    ("persist_ms", "History save (signed-in users only)"),
+    ("total_ms", "Total pipeline"),
+)
+CAPTURE_PHASES = (
+    ("navigation_ms", "Navigation"),
+    ("network_idle_ms", "Network idle wait"),
+    ("settle_ms", "Capture settle"),
+    ("snapshot_ms", "DOM/style snapshot"),
+    ("screenshot_ms", "Screenshot"),
+)
+
+
+def iter_payloads(paths: list[Path]):
+    for path in paths:
+        if path.is_dir():
+            yield from iter_payloads(sorted(p for p in path.iterdir() if p.suffix in (".json", ".jsonl")))
+        elif path.suffix == ".jsonl":
+            with path.open("r", encoding="utf-8") as handle:
+                for line in handle:
+                    line = line.strip()
+                    if line:
+                        yield json.loads(line)
+        else:
+            yield json.loads(path.read_text())
+
+
+def extract_timing(payload: dict) -> dict | None:
+    timing = payload.get("timing") if isinstance(payload.get("timing"), dict) else payload
+    if not isinstance(timing.get("total_ms"), (int, float)):
+        return None
+    return timing
+
+
+def is_cached(payload: dict, timing: dict) -> bool:
+    # A recent history hit returns before the pipeline runs: completed, all-zero timing, no detail blocks.
+    return payload.get("status") == "completed" and not timing.get("capture_detail") and not timing.get("llm_detail")
+
+
+def steps_run(payload: dict, timing: dict) -> set[str]:
+    # Each step's timer is only written once the step finishes, so 0 ms can mean "finished instantly"
+    # (history save for guests) or "never reached" (failures). Status and detail blocks tell them apart.
+    status = payload.get("status")
+    if status is None and timing.get("capture_detail") and timing.get("llm_detail"):
+        # A bare timing object, as logged with analysis_succeeded.
+        status = "completed"
+    if status == "completed":
+        return {key for key, _ in STEPS}
+    # Failed requests: the total only covers part of the pipeline, so it stays out of the total percentiles.
+    ran = set()
+    if timing.get("capture_detail"):
+        ran.update(("preflight_ms", "capture_ms"))
+    elif timing.get("preflight_ms"):
+        ran.add("preflight_ms")
+    if timing.get("llm_detail"):
+        ran.add("llm_ms")
+    return ran
+
+
+def summarize(values: list[float]) -> dict:
+    data = np.asarray(values, dtype=np.float64)
+    if data.size == 0:
+        return {"count": 0}
+    points = np.percentile(data, PERCENTILES)
+    return {
+        "count": int(data.size),
+        "mean": round(float(data.mean()), 1),
+        "max": round(float(data.max()), 1),
+        **{f"p{pct}": round(float(value), 1) for pct, value in zip(PERCENTILES, points)},
+    }
+
+
+def build_report(paths: list[Path]) -> dict:
+    steps: dict[str, list[float]] = {key: [] for key, _ in STEPS}
+    phases: dict[str, list[float]] = {key: [] for key, _ in CAPTURE_PHASES}
+    not_run: Counter = Counter()
+    statuses: Counter = Counter()
+    llm_paths: Counter = Counter()
+    capture_modes: Counter = Counter()
+    skipped = 0
+    cached = 0
+
+    for payload in iter_payloads(paths):
+        timing = extract_timing(payload)
+        if timing is None:
+            skipped += 1
+            continue
+        if is_cached(payload, timing):
+            cached += 1
+            continue
+        statuses[payload.get("status", "unknown")] += 1
+
+        ran = steps_run(payload, timing)
+        for key, _ in STEPS:
+            if key in ran:
+                steps[key].append(float(timing.get(key) or 0))
+            else:
+                not_run[key] += 1
+
+        capture = timing.get("capture_detail") or {}
+        if capture:
+            capture_modes[capture.get("mode", "unknown")] += 1
+            phase_ms = capture.get("phase_ms") or {}
+            for key, _ in CAPTURE_PHASES:
+                if isinstance(phase_ms.get(key), (int, float)):
+                    phases[key].append(float(phase_ms[key]))
+                else:
+                    not_run[key] += 1
+
+        llm = timing.get("llm_detail") or {}
+        if llm:
+            llm_paths[llm.get("final_path", "unknown")] += 1
+
+    samples = sum(statuses.values())
+    totals = np.asarray(steps["total_ms"], dtype=np.float64)
+    histogram = {"edges": [], "counts": []}
+    if totals.size:
+        counts, edges = np.histogram(totals, bins=HISTOGRAM_BINS)
+        histogram = {"edges": [round(float(edge), 1) for edge in edges], "counts": counts.tolist()}
+
+    return {
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "sources": [str(path) for path in paths],
+        "samples": samples,
+        "skipped": skipped,
+        "cached": cached,
+        "percentiles": list(PERCENTILES),
+        "statuses": dict(statuses),
+        "llm_final_paths": dict(llm_paths),
+        "capture_modes": dict(capture_modes),
+        "steps": [{"key": key, "label": label, "not_run": not_run[key], **summarize(steps[key])} for key, label in STEPS],
+        "capture_phases": [
+            {"key": key, "label": label, "not_run": not_run[key], **summarize(phases[key])} for key, label in CAPTURE_PHASES
+        ],
+        "total_histogram": histogram,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Percentile report over saved /api/analyze debug timing payloads.")
+    parser.add_argument("inputs", nargs="+", type=Path, help="Response JSON files, JSONL files, or directories of either.")
+    parser.add_argument("--out", type=Path, default=OUT, help="Where to write the JSON report.")
+    args = parser.parse_args()
+
+    report = build_report(args.inputs)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2) + "\n")
+    not_run = sum(entry["not_run"] for entry in report["steps"])
+    print(
+        f"{report['samples']} timing samples ({report['skipped']} without timing, {report['cached']} cached history hits, "
+        f"{not_run} steps that did not run left out)"
+    )
+    print(str(args.out.resolve()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+SNAPSHOT_DIR = Path("public/.playwright-cli")
+OUT = Path("output/reports/aria-structure.json")
+INDEX = Path("output/cache/aria-index.json")
+INDEX_VERSION = 2
+
+LINE_RE = re.compile(r"^( *)- (.*)$")
+NODE_RE = re.compile(
+    r'^(?P<role>[a-z][a-z0-9]*)'
+    r'(?: "(?P<name>(?:[^"\\]|\\.)*)")?'
+    r'(?P<attrs>(?: \[[^\]]*\])*)'
+    r'(?::(?: (?P<text>.*))?)?$'
+)
+ATTR_RE = re.compile(r"\[([a-z]+)(?:=([^\]]*))?\]")
+# Keys containing ": " or other YAML indicators are quoted whole, e.g. - 'link "a: b"':
+QUOTED_KEY_RE = re.compile(r"""^(?:'((?:[^']|'')*)'|"((?:[^"\\]|\\.)*)")(:.*)?$""")
+LANDMARK_ROLES = ("banner", "main", "navigation", "contentinfo", "complementary", "region", "search", "form")
+MAX_DIFF_ENTRIES = 8
+
+
+class AriaTree:
+    __slots__ = ("roles", "role_ids", "role", "parent", "depth", "level", "names")
+
+    def __init__(self):
+        self.roles: list[str] = []
+        self.role_ids: dict[str, int] = {}
+        self.role = array("H")
+        self.parent = array("i")
+        self.depth = array("H")
+        self.level = array("B")
+        self.names: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def add(self, role: str, name: str, parent: int, depth: int, level: int) -> int:
+        role_id = self.role_ids.get(role)
+        if role_id is None:
+            role_id = self.role_ids[role] = len(self.roles)
+            self.roles.append(role)
+        self.parent.append(parent)
+        self.depth.append(depth)
+        self.level.append(level)
+        self.names.append(name)
+        self.role.append(role_id)
+        return len(self.parent) - 1
+
+    def role_of(self, index: int) -> str:
+        return self.roles[self.role[index]]
+
+
+def unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def unquote_key(item: str) -> str:
+    match = QUOTED_KEY_RE.match(item)
+    if not match:
+        return item
+    single, double, rest = match.groups()
+    key = single.replace("''", "'") if single is not None else json.loads(f'"{double}"')
+    return key + (rest or "")
+
+
+def parse_snapshot(path: Path) -> AriaTree:
+    tree = AriaTree()
+    stack: list[tuple[int, int]] = []
+
+    with path.open("r", encoding="utf-8", errors="replace") as handle:
+        for raw in handle:
+            match = LINE_RE.match(raw.rstrip("\r\n"))
+            if not match:
+                continue
+            indent = len(match.group(1))
+            node = NODE_RE.match(unquote_key(match.group(2)))
+            if not node:
+                continue
+
+            while stack and stack[-1][0] >= indent:
+                stack.pop()
+
+            level = 0
+            for key, value in ATTR_RE.findall(node.group("attrs") or ""):
+                if key == "level" and value.isdigit():
+                    level = int(value)
+
+            name = node.group("name") or unquote(node.group("text") or "")
+            parent = stack[-1][1] if stack else -1
+            index = tree.add(node.group("role"), name, parent, len(stack), level)
+            stack.append((indent, index))
+
+    return tree
+
+
+def page_key(tree: AriaTree) -> str:
+    headings = [
+        (tree.level[i] or 99, i)
+        for i in range(len(tree))
+        if tree.role_of(i) == "heading" and tree.names[i]
+    ]
+    if headings:
+        return tree.names[min(headings)[1]]
+    top = [tree.role_of(i) for i in range(len(tree)) if tree.depth[i] <= 1]
+    return "root: " + " > ".join(top[:4])
+
+
+def signatures(tree: AriaTree) -> Counter:
+    paths: list[str] = []
+    counts: Counter = Counter()
+    for i in range(len(tree)):
+        role = tree.role_of(i)
+        label = f"{role} \"{tree.names[i]}\"" if tree.names[i] else role
+        parent = tree.parent[i]
+        path = f"{paths[parent]} > {label}" if parent >= 0 else label
+        paths.append(path)
+        counts[path] += 1
+    return counts
+
+
+def summarize(tree: AriaTree) -> dict:
+    histogram = Counter(tree.role)
+    roles = {tree.roles[role_id]: count for role_id, count in sorted(histogram.items(), key=lambda item: -item[1])}
+    return {
+        "page": page_key(tree),
+        "nodes": len(tree),
+        "max_depth": max(tree.depth) + 1 if len(tree) else 0,
+        "leaves": len(tree) - len(set(tree.parent) - {-1}),
+        "roles": roles,
+        "landmarks": {role: roles[role] for role in LANDMARK_ROLES if role in roles},
+        "signatures": dict(signatures(tree)),
+    }
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_index(path: Path) -> dict:
+    if not path.exists():
+        return {"version": INDEX_VERSION, "files": {}, "entries": {}}
+    index = json.loads(path.read_text())
+    if index.get("version") != INDEX_VERSION:
+        return {"version": INDEX_VERSION, "files": {}, "entries": {}}
+    return index
+
+
+def index_snapshot(index: dict, path: Path) -> tuple[str, bool]:
+    stat = path.stat()
+    known = index["files"].get(str(path))
+    if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+        digest = known["sha256"]
+    else:
+        digest = file_digest(path)
+        index["files"][str(path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+
+    if digest in index["entries"]:
+        return digest, False
+    index["entries"][digest] = summarize(parse_snapshot(path))
+    return digest, True
+
+
+def diff_signatures(previous: dict[str, int], current: dict[str, int]) -> dict:
+    before = Counter(previous)
+    after = Counter(current)
+    added = after - before
+    removed = before - after
+    return {
+        "added": sum(added.values()),
+        "removed": sum(removed.values()),
+        "added_paths": [path for path, _ in added.most_common(MAX_DIFF_ENTRIES)],
+        "removed_paths": [path for path, _ in removed.most_common(MAX_DIFF_ENTRIES)],
+    }
+
+
+def build_report(snapshot_dir: Path, index: dict) -> tuple[dict, int]:
+    parsed = 0
+    snapshots = []
+    last_by_page: dict[str, dict] = {}
+
+    for path in sorted(snapshot_dir.glob("page-*.yml")):
+        digest, fresh = index_snapshot(index, path)
+        parsed += int(fresh)
+        entry = index["entries"][digest]
+
+        snapshot = {key: value for key, value in entry.items() if key != "signatures"}
+        snapshot["file"] = path.name
+        snapshot["sha256"] = digest
+        previous = last_by_page.get(entry["page"])
+        if previous:
+            snapshot["previous"] = previous["file"]
+            snapshot["diff"] = diff_signatures(index["entries"][previous["sha256"]]["signatures"], entry["signatures"])
+        snapshots.append(snapshot)
+        last_by_page[entry["page"]] = snapshot
+
+    live = {snapshot["sha256"] for snapshot in snapshots}
+    index["entries"] = {digest: entry for digest, entry in index["entries"].items() if digest in live}
+    index["files"] = {name: meta for name, meta in index["files"].items() if meta["sha256"] in live}
+
+    totals = Counter()
+    for snapshot in snapshots:
+        totals.update(snapshot["roles"])
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "source": str(snapshot_dir),
+        "pages": len(last_by_page),
+        "roles": dict(totals.most_common()),
+        "snapshots": snapshots,
+    }
+    return report, parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize Playwright accessibility snapshots (page-*.yml).")
+    parser.add_argument("--snapshots", type=Path, default=SNAPSHOT_DIR, help="Directory containing page-*.yml files.")
+    parser.add_argument("--index", type=Path, default=INDEX, help="On-disk parse index keyed by file hash.")
+    parser.add_argument("--out", type=Path, default=OUT, help="Where to write the JSON report.")
+    args = parser.parse_args()
+
+    index = load_index(args.index)
+    report, parsed = build_report(args.snapshots, index)
+
+    args.index.parent.mkdir(parents=True, exist_ok=True)
+    args.index.write_text(json.dumps(index, separators=(",", ":")))
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"parsed {parsed} of {len(report['snapshots'])} snapshots")
+    print(str(args.out.resolve()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+LOG_DIR = Path("public/.playwright-cli")
+OUT = Path("output/reports/capture-health.json")
+
+LINE_RE = re.compile(r"^\[\s*(\d+)ms\]\s+\[([A-Z]+)\]\s+(.*)$")
+SOURCE_RE = re.compile(r"\s+@\s+(\S+?)(?::\d+)?$")
+STATUS_RE = re.compile(r"status of (\d{3})")
+SESSION_RE = re.compile(r"console-(\d{4}-\d{2}-\d{2})T(\d{2})-(\d{2})-(\d{2})")
+
+ERROR_LEVELS = {"ERROR"}
+MAX_TRACKED_URLS = 500
+OVERFLOW_URL = "(other)"
+
+
+def normalize_source(url: str) -> str:
+    return url.partition("?")[0].partition("#")[0]
+
+
+def session_label(path: Path) -> str:
+    match = SESSION_RE.search(path.name)
+    if not match:
+        return path.stem
+    day, hour, minute, second = match.groups()
+    return f"{day} {hour}:{minute}:{second}"
+
+
+def count_url(urls: dict[tuple[str, str], int], level: str, url: str):
+    key = (level, url)
+    if key not in urls and len(urls) >= MAX_TRACKED_URLS:
+        key = (level, OVERFLOW_URL)
+    urls[key] = urls.get(key, 0) + 1
+
+
+def scan_session(path: Path, levels: dict[str, int], urls: dict[tuple[str, str], int]) -> dict:
+    session = {
+        "file": path.name,
+        "session": session_label(path),
+        "lines": 0,
+        "unparsed": 0,
+        "levels": {},
+        "first_error_ms": None,
+        "last_ms": 0,
+        "resource_failures": 0,
+        "resource_statuses": {},
+    }
+
+    with path.open("r", encoding="utf-8", errors="replace") as handle:
+        for raw in handle:
+            session["lines"] += 1
+            match = LINE_RE.match(raw.rstrip("\r\n"))
+            if not match:
+                session["unparsed"] += 1
+                continue
+
+            elapsed = int(match.group(1))
+            level = match.group(2)
+            message = match.group(3)
+
+            session["last_ms"] = max(session["last_ms"], elapsed)
+            session["levels"][level] = session["levels"].get(level, 0) + 1
+            levels[level] = levels.get(level, 0) + 1
+
+            if level in ERROR_LEVELS and session["first_error_ms"] is None:
+                session["first_error_ms"] = elapsed
+
+            source = SOURCE_RE.search(message)
+            if source:
+                count_url(urls, level, normalize_source(source.group(1)))
+
+            if message.startswith("Failed to load resource"):
+                session["resource_failures"] += 1
+                status = STATUS_RE.search(message)
+                code = status.group(1) if status else "network"
+                session["resource_statuses"][code] = session["resource_statuses"].get(code, 0) + 1
+
+    return session
+
+
+def build_report(log_dir: Path, top: int) -> dict:
+    levels: dict[str, int] = {}
+    urls: dict[tuple[str, str], int] = {}
+    sessions = [scan_session(path, levels, urls) for path in sorted(log_dir.glob("console-*.log"))]
+
+    first_errors = [s["first_error_ms"] for s in sessions if s["first_error_ms"] is not None]
+    ranked = sorted(urls.items(), key=lambda item: (-item[1], item[0][1], item[0][0]))
+
+    return {
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "source": str(log_dir),
+        "totals": {
+            "sessions": len(sessions),
+            "lines": sum(s["lines"] for s in sessions),
+            "resource_failures": sum(s["resource_failures"] for s in sessions),
+            "sessions_with_errors": len(first_errors),
+            "min_first_error_ms": min(first_errors) if first_errors else None,
+            "max_first_error_ms": max(first_errors) if first_errors else None,
+        },
+        "levels": dict(sorted(levels.items())),
+        "urls": [{"level": level, "url": url, "count": count} for (level, url), count in ranked[:top]],
+        "sessions": sessions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate Playwright console logs into a capture health report.")
+    parser.add_argument("--logs", type=Path, default=LOG_DIR, help="Directory containing console-*.log files.")
+    parser.add_argument("--out", type=Path, default=OUT, help="Where to write the JSON report.")
+    parser.add_argument("--top", type=int, default=15, help="Number of URLs to keep in the ranked list.")
+    args = parser.parse_args()
+
+    report = build_report(args.logs, args.top)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2) + "\n")
+    print(str(args.out.resolve()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+from reportlab.graphics.shapes import Drawing, Polygon, PolyLine, Rect, String
+from reportlab.lib import colors
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves from concurrent render workers are last-writer-wins.
+    fcntl = None
+
+CACHE = Path("output/cache/diagram-layouts.json")
+LAYOUT_VERSION = 1
+
+NODE_MAX_WIDTH = 96
+NODE_MIN_WIDTH = 52
+NODE_PADDING = 5
+H_GAP = 16
+V_GAP = 20
+ARROW = 4
+
+NODE_FILL = "#f1f5f9"
+NODE_STROKE = "#94a3b8"
+EDGE_STROKE = "#475569"
+TEXT_FILL = "#0f172a"
+
+_memory: dict[str, dict] = {}
+_disk: dict[str, dict] | None = None
+_used: set[str] = set()
+# Keys that were on disk when this process last read or wrote the cache.
+_seen: set[str] = set()
+
+
+def parse_chain(spec: str) -> list[str]:
+    return [step.strip() for step in spec.split("->") if step.strip()]
+
+
+def spec_key(steps: list[str], width: float, font: str, size: float) -> str:
+    payload = json.dumps([LAYOUT_VERSION, steps, round(width, 2), font, size])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def compute_layout(steps: list[str], width: float, font: str, size: float) -> dict:
+    leading = size + 2
+    nodes = []
+    for label in steps:
+        lines = simpleSplit(label, font, size, NODE_MAX_WIDTH - 2 * NODE_PADDING) or [label]
+        text_width = max(stringWidth(line, font, size) for line in lines)
+        nodes.append(
+            {
+                "lines": lines,
+                "w": max(NODE_MIN_WIDTH, text_width + 2 * NODE_PADDING),
+                "h": len(lines) * leading + 2 * NODE_PADDING,
+            }
+        )
+
+    rows: list[list[int]] = [[]]
+    row_width = 0.0
+    for index, node in enumerate(nodes):
+        needed = node["w"] + (H_GAP if rows[-1] else 0)
+        if rows[-1] and row_width + needed > width:
+            rows.append([])
+            row_width = 0.0
+            needed = node["w"]
+        rows[-1].append(index)
+        row_width += needed
+
+    row_heights = [max(nodes[i]["h"] for i in row) for row in rows]
+    height = sum(row_heights) + V_GAP * (len(rows) - 1)
+
+    top = height
+    for row, row_height in zip(rows, row_heights):
+        x = 0.0
+        for index in row:
+            node = nodes[index]
+            node["x"] = x
+            node["y"] = top - (row_height + node["h"]) / 2
+            x += node["w"] + H_GAP
+        top -= row_height + V_GAP
+
+    edges = []
+    for index in range(len(nodes) - 1):
+        a, b = nodes[index], nodes[index + 1]
+        if abs((a["y"] + a["h"] / 2) - (b["y"] + b["h"] / 2)) < 0.01 and b["x"] > a["x"]:
+            mid = a["y"] + a["h"] / 2
+            edges.append([[a["x"] + a["w"], mid], [b["x"], mid]])
+            continue
+        bottom = a["y"]
+        channel = bottom - (bottom - (b["y"] + b["h"])) / 2
+        start_x = a["x"] + a["w"] / 2
+        end_x = b["x"] + b["w"] / 2
+        edges.append([[start_x, bottom], [start_x, channel], [end_x, channel], [end_x, b["y"] + b["h"]]])
+
+    return {"width": width, "height": height, "font": font, "size": size, "leading": leading, "nodes": nodes, "edges": edges}
+
+
+def read_cache() -> dict[str, dict]:
+    return json.loads(CACHE.read_text()) if CACHE.exists() else {}
+
+
+def load_disk_cache() -> dict[str, dict]:
+    global _disk
+    if _disk is None:
+        _disk = read_cache()
+        _seen.update(_disk)
+    return _disk
+
+
+@contextmanager
+def cache_lock():
+    CACHE.parent.mkdir(parents=True, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    with CACHE.with_suffix(".lock").open("w") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def save_layouts(prune: bool = True):
+    # Called once per build. A full build keeps only the layouts it used, so edited diagrams do not pile up;
+    # partial builds (prune=False) only add to the cache. Render workers in pdf_server.py save concurrently,
+    # so the file is re-read under a lock and layouts other processes wrote since our last read are kept.
+    global _disk
+    if _disk is None:
+        return
+    if prune:
+        for key in set(_memory) - _used:
+            del _memory[key]
+    with cache_lock():
+        current = read_cache()
+        if prune:
+            others = {key: value for key, value in current.items() if key not in _seen}
+            live = {**others, **{key: _disk[key] for key in sorted(_used) if key in _disk}}
+        else:
+            live = {**current, **_disk}
+        if live != current or not CACHE.exists():
+            staging = CACHE.with_suffix(f".{os.getpid()}.tmp")
+            staging.write_text(json.dumps(live, separators=(",", ":")))
+            os.replace(staging, CACHE)
+    _used.clear()
+    _disk = live
+    _seen.clear()
+    _seen.update(live)
+
+
+def layout_for(steps: list[str], width: float, font: str, size: float) -> dict:
+    key = spec_key(steps, width, font, size)
+    _used.add(key)
+    layout = _memory.get(key)
+    if layout is not None:
+        return layout
+
+    disk = load_disk_cache()
+    layout = disk.get(key)
+    if layout is None:
+        layout = disk[key] = compute_layout(steps, width, font, size)
+    _memory[key] = layout
+    return layout
+
+
+def arrow_head(end: list[float], previous: list[float], color: str = EDGE_STROKE) -> Polygon:
+    x, y = end
+    dx = x - previous[0]
+    dy = y - previous[1]
+    length = math.hypot(dx, dy) or 1.0
+    ux, uy = dx / length, dy / length
+    base_x, base_y = x - ux * ARROW * 1.6, y - uy * ARROW * 1.6
+    points = [x, y, base_x - uy * ARROW, base_y + ux * ARROW, base_x + uy * ARROW, base_y - ux * ARROW]
+    fill = colors.HexColor(color)
+    return Polygon(points, fillColor=fill, strokeColor=fill, strokeWidth=0.5)
+
+
+def flow_drawing(spec: str | list[str], width: float, font: str = "Helvetica", size: float = 7.5) -> Drawing:
+    steps = parse_chain(spec) if isinstance(spec, str) else list(spec)
+    layout = layout_for(steps, width, font, size)
+    drawing = Drawing(layout["width"], layout["height"] + 2)
+
+    for edge in layout["edges"]:
+        flat = [value for point in edge for value in point]
+        drawing.add(PolyLine(flat, strokeColor=colors.HexColor(EDGE_STROKE), strokeWidth=0.8))
+        drawing.add(arrow_head(edge[-1], edge[-2]))
+
+    for node in layout["nodes"]:
+        drawing.add(
+            Rect(
+                node["x"],
+                node["y"],
+                node["w"],
+                node["h"],
+                rx=4,
+                ry=4,
+                fillColor=colors.HexColor(NODE_FILL),
+                strokeColor=colors.HexColor(NODE_STROKE),
+                strokeWidth=0.6,
+            )
+        )
+        text_top = node["y"] + node["h"] - NODE_PADDING - layout["size"]
+        for offset, line in enumerate(node["lines"]):
+            drawing.add(
+                String(
+                    node["x"] + node["w"] / 2,
+                    text_top - offset * layout["leading"] + 1,
+                    line,
+                    fontName=layout["font"],
+                    fontSize=layout["size"],
+                    fillColor=colors.HexColor(TEXT_FILL),
+                    textAnchor="middle",
+                )
+            )
+    return drawing
+
+
+def graph_layers(nodes: list[str], edges: list[tuple[str, str]]) -> list[list[str]]:
+    unknown = sorted({end for edge in edges for end in edge} - set(nodes))
+    if unknown:
+        raise ValueError(f"Graph edges reference nodes that are not in the node list: {', '.join(unknown)}")
+    parents: dict[str, list[str]] = {node: [] for node in nodes}
+    for source, target in edges:
+        parents[target].append(source)
+
+    depth: dict[str, int] = {}
+
+    def visit(node: str, active: set[str]) -> int:
+        if node in depth:
+            return depth[node]
+        active.add(node)
+        level = 1 + max((visit(parent, active) for parent in parents[node] if parent not in active), default=-1)
+        active.discard(node)
+        depth[node] = level
+        return level
+
+    for node in nodes:
+        visit(node, set())
+
+    layers: list[list[str]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for node in nodes:
+        layers[depth[node]].append(node)
+
+    position: dict[str, float] = {}
+    for layer in layers:
+        def barycenter(node: str) -> float:
+            placed = [position[parent] for parent in parents[node] if parent in position]
+            return sum(placed) / len(placed) if placed else 0.5
+
+        layer.sort(key=lambda node: (barycenter(node), node))
+        for index, node in enumerate(layer):
+            position[node] = (index + 0.5) / len(layer)
+    return layers
+
+
+def graph_drawing(
+    nodes: list[str],
+    edges: list[tuple[str, str]],
+    width: float,
+    font: str = "Helvetica",
+    size: float = 7,
+    highlight: set[str] | None = None,
+) -> Drawing:
+    highlight = highlight or set()
+    box_h = size + 2 * NODE_PADDING
+    widths = {node: max(NODE_MIN_WIDTH * 0.8, stringWidth(node, font, size) + 2 * NODE_PADDING) for node in nodes}
+
+    rows: list[list[str]] = []
+    for layer in graph_layers(nodes, edges):
+        row: list[str] = []
+        used = 0.0
+        for node in layer:
+            if row and used + H_GAP + widths[node] > width:
+                rows.append(row)
+                row, used = [], 0.0
+            used += widths[node] + (H_GAP if row else 0)
+            row.append(node)
+        rows.append(row)
+
+    row_gap = V_GAP * 1.6
+    height = len(rows) * box_h + (len(rows) - 1) * row_gap
+    placed: dict[str, tuple[float, float]] = {}
+    for index, row in enumerate(rows):
+        y = height - box_h - index * (box_h + row_gap)
+        spare = width - sum(widths[node] for node in row)
+        gap = spare / (len(row) + 1)
+        x = gap
+        for node in row:
+            placed[node] = (x, y)
+            x += widths[node] + gap
+
+    drawing = Drawing(width, height + 2)
+    for source, target in edges:
+        (sx, sy), (tx, ty) = placed[source], placed[target]
+        start = [sx + widths[source] / 2, sy if ty < sy else sy + box_h]
+        end = [tx + widths[target] / 2, ty + box_h if ty < sy else ty]
+        if abs(ty - sy) < 0.01:
+            start = [sx + widths[source] / 2, sy]
+            end = [tx + widths[target] / 2, ty]
+        color = EDGE_STROKE if source in highlight else NODE_STROKE
+        drawing.add(PolyLine([*start, *end], strokeColor=colors.HexColor(color), strokeWidth=0.5))
+        drawing.add(arrow_head(end, start, color))
+
+    for node, (x, y) in placed.items():
+        drawing.add(
+            Rect(
+                x,
+                y,
+                widths[node],
+                box_h,
+                rx=3,
+                ry=3,
+                fillColor=colors.HexColor("#dbeafe" if node in highlight else NODE_FILL),
+                strokeColor=colors.HexColor(NODE_STROKE),
+                strokeWidth=0.6,
+            )
+        )
+        drawing.add(
+            String(
+                x + widths[node] / 2,
+                y + NODE_PADDING + 1,
+                node,
+                fontName=font,
+                fontSize=size,
+                fillColor=colors.HexColor(TEXT_FILL),
+                textAnchor="middle",
+            )
+        )
+    return drawing
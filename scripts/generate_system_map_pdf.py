@@ -1,10 +1,18 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import argparse
+import os
 from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
 from xml.sax.saxutils import escape
 
+from reportlab.graphics.charts.barcharts import HorizontalBarChart, VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.widgets.markers import makeMarker
+from reportlab.graphics.shapes import Drawing
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
@@ -18,17 +26,45 @@ from reportlab.platypus import (
     TableStyle,
 )
 
+from flow_diagrams import flow_drawing, graph_drawing, save_layouts
+from memory_profile import (
+    MemoryProfiler,
+    SectionStory,
+    add_profile_arguments,
+    finish_profile,
+    profiled_canvas,
+    profiler_from_args,
+)
+from pdf_output import BASE_FONTS, describe_optimization, resolve_fonts, write_pdf
+from search_index import SearchIndex, describe_index, index_path
+from section_delta import (
+    ADDED,
+    FRONT_MATTER,
+    UNCHANGED,
+    Section,
+    compare_sections,
+    load_manifest,
+    manifest_path,
+    marked_blocks,
+    split_sections,
+    write_manifest,
+)
+import system_map_content as content
+
+ROOT = Path(__file__).resolve().parent.parent
 OUT = Path("output/pdf/designdna-system-map.pdf")
-OUT.parent.mkdir(parents=True, exist_ok=True)
+DELTA_OUT = Path("output/pdf/designdna-system-map-delta.pdf")
+CHART_COLORS = ["#94a3b8", "#3b82f6", "#0f172a"]
+SERIES_COLORS = ["#0f172a", "#3b82f6", "#10b981", "#f59e0b", "#ef4444", "#8b5cf6"]
 
 
-def build_styles():
+def build_styles(fonts: dict[str, str] = BASE_FONTS):
     base = getSampleStyleSheet()
 
     title = ParagraphStyle(
         "TitleMain",
         parent=base["Title"],
-        fontName="Helvetica-Bold",
+        fontName=fonts["bold"],
         fontSize=24,
         leading=28,
         textColor=colors.HexColor("#0f172a"),
@@ -37,7 +73,7 @@ def build_styles():
     subtitle = ParagraphStyle(
         "Subtitle",
         parent=base["Normal"],
-        fontName="Helvetica",
+        fontName=fonts["regular"],
         fontSize=11,
         leading=15,
         textColor=colors.HexColor("#334155"),
@@ -46,7 +82,7 @@ def build_styles():
     h1 = ParagraphStyle(
         "H1",
         parent=base["Heading1"],
-        fontName="Helvetica-Bold",
+        fontName=fonts["bold"],
         fontSize=16,
         leading=20,
         textColor=colors.HexColor("#0f172a"),
@@ -56,7 +92,7 @@ def build_styles():
     h2 = ParagraphStyle(
         "H2",
         parent=base["Heading2"],
-        fontName="Helvetica-Bold",
+        fontName=fonts["bold"],
         fontSize=12.5,
         leading=16,
         textColor=colors.HexColor("#0f172a"),
@@ -66,7 +102,7 @@ def build_styles():
     body = ParagraphStyle(
         "Body",
         parent=base["Normal"],
-        fontName="Helvetica",
+        fontName=fonts["regular"],
         fontSize=10,
         leading=14,
         textColor=colors.HexColor("#111827"),
@@ -81,7 +117,7 @@ def build_styles():
     code = ParagraphStyle(
         "Code",
         parent=body,
-        fontName="Courier",
+        fontName=fonts["mono"],
         fontSize=8.6,
         leading=11,
         textColor=colors.HexColor("#111827"),
@@ -89,7 +125,7 @@ def build_styles():
     table_header = ParagraphStyle(
         "TableHeader",
         parent=body,
-        fontName="Helvetica-Bold",
+        fontName=fonts["bold"],
         fontSize=9,
         leading=11,
         textColor=colors.HexColor("#0f172a"),
@@ -97,11 +133,23 @@ def build_styles():
     table_cell = ParagraphStyle(
         "TableCell",
         parent=body,
-        fontName="Helvetica",
+        fontName=fonts["regular"],
         fontSize=8.6,
         leading=11,
         textColor=colors.HexColor("#111827"),
     )
+    change = ParagraphStyle(
+        "ChangeMarker",
+        parent=body,
+        fontName=fonts["bold"],
+        fontSize=7.5,
+        leading=9,
+        textColor=colors.HexColor("#92400e"),
+        backColor=colors.HexColor("#fef3c7"),
+        borderPadding=(2, 4, 2, 4),
+        spaceBefore=4,
+        spaceAfter=6,
+    )
 
     return {
         "title": title,
@@ -113,6 +161,7 @@ def build_styles():
         "code": code,
         "table_header": table_header,
         "table_cell": table_cell,
+        "change": change,
     }
 
 
@@ -157,822 +206,311 @@ def add_table(
     story.append(Spacer(1, 0.14 * inch))
 
 
-def draw_footer(canvas, doc):
+def percentile_chart(entries: list[dict], percentiles: list[int], width: float, font: str = "Helvetica") -> Drawing:
+    height = 52 + 26 * len(entries)
+    drawing = Drawing(width, height)
+    series = list(reversed(list(enumerate(percentiles))))
+    chart = HorizontalBarChart()
+    chart.x = 1.9 * inch
+    chart.y = 42
+    chart.width = width - chart.x - 0.2 * inch
+    chart.height = height - 52
+    chart.data = [[entry.get(f"p{pct}", 0) / 1000 for entry in reversed(entries)] for _, pct in series]
+    chart.categoryAxis.categoryNames = [entry["label"] for entry in reversed(entries)]
+    chart.categoryAxis.labels.fontName = font
+    chart.categoryAxis.labels.fontSize = 7.5
+    chart.categoryAxis.labels.boxAnchor = "e"
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontName = font
+    chart.valueAxis.labels.fontSize = 7.5
+    chart.valueAxis.labelTextFormat = "%.1f s"
+    chart.barSpacing = 1
+    chart.groupSpacing = 6
+    for bar, (idx, _) in enumerate(series):
+        chart.bars[bar].fillColor = colors.HexColor(CHART_COLORS[idx % len(CHART_COLORS)])
+        chart.bars[bar].strokeColor = None
+    drawing.add(chart)
+
+    legend = Legend()
+    legend.x = chart.x
+    legend.y = 10
+    legend.alignment = "right"
+    legend.columnMaximum = 1
+    legend.dx = legend.dy = 7
+    legend.deltax = 48
+    legend.fontName = font
+    legend.fontSize = 7.5
+    legend.colorNamePairs = [
+        (colors.HexColor(CHART_COLORS[idx % len(CHART_COLORS)]), f"p{pct}") for idx, pct in enumerate(percentiles)
+    ]
+    drawing.add(legend)
+    return drawing
+
+
+def histogram_chart(edges: list[float], counts: list[int], width: float, font: str = "Helvetica") -> Drawing:
+    drawing = Drawing(width, 1.6 * inch)
+    chart = VerticalBarChart()
+    chart.x = 0.45 * inch
+    chart.y = 22
+    chart.width = width - 0.65 * inch
+    chart.height = 1.6 * inch - 32
+    chart.data = [counts]
+    chart.categoryAxis.categoryNames = [f"{edge / 1000:.1f}" for edge in edges[:-1]]
+    chart.categoryAxis.labels.fontName = font
+    chart.categoryAxis.labels.fontSize = 7
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontName = font
+    chart.valueAxis.labels.fontSize = 7
+    chart.bars[0].fillColor = colors.HexColor(CHART_COLORS[1])
+    chart.bars[0].strokeColor = None
+    drawing.add(chart)
+    return drawing
+
+
+def worker_curves(
+    report: dict,
+    value,
+    width: float,
+    font: str,
+    y_format: str,
+    y_max: float | None = None,
+    reference: tuple[str, list[tuple[float, float]]] | None = None,
+) -> Drawing:
+    # One line per worker count against arrival rate, plus an optional dashed reference line.
+    height = 2.3 * inch
+    drawing = Drawing(width, height)
+    chart = LinePlot()
+    chart.x = 0.55 * inch
+    chart.y = 42
+    chart.width = width - 0.75 * inch
+    chart.height = height - 52
+    chart.data = [
+        [(scenario["arrivals_per_min"], value(scenario)) for scenario in report["scenarios"] if scenario["workers"] == workers]
+        for workers in report["workers"]
+    ]
+    if reference is not None:
+        chart.data.append(reference[1])
+    chart.xValueAxis.valueMin = 0
+    chart.xValueAxis.labels.fontName = font
+    chart.xValueAxis.labels.fontSize = 7.5
+    chart.yValueAxis.valueMin = 0
+    if y_max is not None:
+        chart.yValueAxis.valueMax = y_max
+    chart.yValueAxis.labels.fontName = font
+    chart.yValueAxis.labels.fontSize = 7.5
+    chart.yValueAxis.labelTextFormat = y_format
+    pairs = []
+    for idx, workers in enumerate(report["workers"]):
+        color = colors.HexColor(SERIES_COLORS[idx % len(SERIES_COLORS)])
+        chart.lines[idx].strokeColor = color
+        chart.lines[idx].strokeWidth = 1.4
+        chart.lines[idx].symbol = makeMarker("FilledCircle", size=3, fillColor=color)
+        pairs.append((color, f"{workers} worker{'s' if workers != 1 else ''}"))
+    if reference is not None:
+        line = chart.lines[len(report["workers"])]
+        line.strokeColor = colors.HexColor(CHART_COLORS[0])
+        line.strokeWidth = 1
+        line.strokeDashArray = (3, 2)
+        pairs.append((line.strokeColor, reference[0]))
+    drawing.add(chart)
+
+    legend = Legend()
+    legend.x = chart.x
+    legend.y = 10
+    legend.alignment = "right"
+    legend.columnMaximum = 1
+    legend.dx = legend.dy = 7
+    legend.deltax = 62
+    legend.fontName = font
+    legend.fontSize = 7.5
+    legend.colorNamePairs = pairs
+    drawing.add(legend)
+    return drawing
+
+
+def wait_curve_chart(report: dict, width: float, font: str = "Helvetica") -> Drawing:
+    cap = content.WAIT_CHART_CAP_S
+    return worker_curves(report, lambda scenario: min(scenario["wait_p95_s"], cap), width, font, "%d s", y_max=cap)
+
+
+def throughput_curve_chart(report: dict, width: float, font: str = "Helvetica") -> Drawing:
+    offered = [(rate, rate) for rate in sorted(report["arrivals_per_min"])]
+    return worker_curves(
+        report, lambda scenario: scenario["throughput_per_min"], width, font, "%g/min", reference=("Arrival rate", offered)
+    )
+
+
+FIGURES = {
+    "flow": flow_drawing,
+    "module_graph": graph_drawing,
+    "percentile": percentile_chart,
+    "histogram": histogram_chart,
+    "wait_curve": wait_curve_chart,
+    "throughput_curve": throughput_curve_chart,
+}
+
+
+def append_block(story: list, styles: dict[str, ParagraphStyle], block):
+    if isinstance(block, content.Text):
+        story.append(p(block.text, styles[block.style]))
+    elif isinstance(block, content.Bullets):
+        add_bullets(story, block.items, styles[block.style])
+    elif isinstance(block, content.Table):
+        add_table(story, styles, block.rows, block.widths)
+    elif isinstance(block, content.Figure):
+        story.append(FIGURES[block.kind](**block.data, width=block.width, font=styles["table_cell"].fontName))
+    elif isinstance(block, content.Spacer):
+        story.append(Spacer(block.width, block.height))
+    elif isinstance(block, content.PageBreak):
+        story.append(PageBreak())
+    else:
+        raise TypeError(f"Unsupported block: {type(block).__name__}")
+
+
+def is_volatile(block) -> bool:
+    return isinstance(block, content.Text) and block.text.startswith("Generated: ")
+
+
+def build_story(styles: dict[str, ParagraphStyle], blocks: list, story: list | None = None) -> list:
+    story = [] if story is None else story
+    for block in blocks:
+        append_block(story, styles, block)
+    return story
+
+
+def draw_footer(canvas, doc, font_name: str = "Helvetica"):
     canvas.saveState()
     canvas.setStrokeColor(colors.HexColor("#cbd5e1"))
     canvas.setLineWidth(0.6)
     canvas.line(doc.leftMargin, 0.68 * inch, doc.pagesize[0] - doc.rightMargin, 0.68 * inch)
-    canvas.setFont("Helvetica", 8)
+    canvas.setFont(font_name, 8)
     canvas.setFillColor(colors.HexColor("#475569"))
     canvas.drawString(doc.leftMargin, 0.48 * inch, "DesignDNA System Map - generated from repository files")
     canvas.drawRightString(doc.pagesize[0] - doc.rightMargin, 0.48 * inch, f"Page {doc.page}")
     canvas.restoreState()
 
 
-def build_story(styles: dict[str, ParagraphStyle]) -> list:
+def build_delta_story(styles: dict[str, ParagraphStyle], sections: list[Section], baseline: dict) -> list:
+    compared, removed = compare_sections(sections, baseline)
     story: list = []
-    generated_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
-
-    story.append(p("DesignDNA System Map", styles["title"]))
-    story.append(p("A plain-language guide to how the full codebase works", styles["subtitle"]))
-    story.append(p(f"Generated: {generated_at}", styles["subtitle"]))
+    story.append(p("DesignDNA System Map: What Changed", styles["title"]))
+    story.append(p(f"Compared with the full build from {baseline['generated_at']}", styles["subtitle"]))
+    story.append(p(f"Generated: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')}", styles["subtitle"]))
     story.append(Spacer(1, 0.16 * inch))
 
-    story.append(p("What this document is for", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "Give a non-technical owner a complete map of how DesignDNA works, from page click to database write.",
-            "Show where each responsibility lives in the repository, so you can ask targeted questions and review changes with confidence.",
-            "Translate code-level behavior into business-level language without hiding the technical truth.",
-            "Provide file paths for every major subsystem so this can also be used by technical teammates as a shared source of truth.",
-        ],
-        styles["bullet"],
-    )
-    story.append(Spacer(1, 0.14 * inch))
-
-    story.append(p("Read this first: one-sentence model", styles["h2"]))
-    story.append(
-        p(
-            "DesignDNA is a Next.js web application that takes a public webpage URL, runs a capture and analysis pipeline, "
-            "and returns reusable design outputs (prompt, summary, tokens, structure), while enforcing auth, limits, pricing, and storage policies.",
-            styles["body"],
-        )
-    )
-
-    story.append(p("Evidence baseline", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "Architecture docs: docs/architecture.md, docs/api-reference.md, docs/data-model.md, docs/configuration.md, docs/operations.md, docs/repository-map.md",
-            "Runtime code: src/app/*, src/app/api/*, src/lib/*, src/worker/*",
-            "Database schema: supabase/migrations/*.sql and src/types/database.ts",
-            "Deployment config: next.config.ts, vercel.json, package.json",
-        ],
-        styles["bullet"],
-    )
-
-    story.append(PageBreak())
-
-    story.append(p("1. System Boundaries", styles["h1"]))
-    story.append(
-        p(
-            "This section defines what is inside the DesignDNA system and what sits outside of it.",
-            styles["body"],
-        )
-    )
-    add_table(
-        story,
-        styles,
-        [
-            ["Boundary", "Inside DesignDNA", "Outside DesignDNA"],
-            [
-                "User experience",
-                "Next.js pages/components and static HTML pages that users interact with.",
-                "Any external website a user submits for analysis.",
-            ],
-            [
-                "Analysis engine",
-                "Playwright capture, token extraction, prompt compiler, optional LLM refinement.",
-                "Third-party model providers and their availability/performance.",
-            ],
-            [
-                "Data storage",
-                "Supabase tables and private captures storage bucket.",
-                "User devices, browser local cache, third-party databases.",
-            ],
-            [
-                "Auth and identity",
-                "Supabase auth session handling and callback endpoints.",
-                "Google identity platform and email delivery providers.",
-            ],
-            [
-                "Rate limiting and queues",
-                "Upstash Redis calls from app and worker code.",
-                "Upstash service reliability and regional network behavior.",
-            ],
-            [
-                "Operations",
-                "Vercel cron endpoint, cleanup script, worker loop, test harness.",
-                "Vercel scheduler runtime guarantees and platform-level outages.",
-            ],
-        ],
-        [1.35 * inch, 2.45 * inch, 2.45 * inch],
-    )
-
-    story.append(p("External dependency map", styles["h2"]))
-    add_table(
-        story,
-        styles,
-        [
-            ["Dependency", "Role in the system", "Where it is integrated"],
-            ["Next.js 16", "Web runtime and API routing", "src/app, src/app/api, src/proxy.ts"],
-            ["Supabase", "Auth, Postgres database, private file storage", "src/lib/supabase/*, src/lib/db.ts, migrations"],
-            ["Upstash Redis", "Rate limit counters and extraction job queue", "src/lib/rate-limit.ts, src/lib/queue.ts"],
-            ["Playwright", "Capture DOM/CSS/screenshot and build design pack", "src/lib/extractor/playwright-extractor.ts"],
-            ["OpenAI-compatible chat API", "Optional semantic enhancement and structured JSON output", "src/lib/openai-enhance.ts"],
-            ["Vercel", "Hosting + scheduled cleanup cron execution", "vercel.json, src/app/api/cron/cleanup/route.ts"],
-        ],
-        [1.35 * inch, 2.65 * inch, 2.25 * inch],
-    )
-
-    story.append(PageBreak())
-
-    story.append(p("2. Product Surface: What Users Can Open", styles["h1"]))
-    story.append(
-        p(
-            "DesignDNA currently combines static marketing pages with app routes and API routes. "
-            "A key detail: the root route redirects to a static HTML experience.",
-            styles["body"],
-        )
-    )
-    add_table(
-        story,
-        styles,
-        [
-            ["URL / Route", "Who uses it", "What it does", "Primary files"],
-            [
-                "/",
-                "All visitors",
-                "Immediate redirect to the static landing runtime page.",
-                "src/app/page.tsx, public/designdna-exact.html",
-            ],
-            [
-                "/designdna-exact.html",
-                "All visitors",
-                "Main static landing/app shell served from public assets.",
-                "public/designdna-exact.html",
-            ],
-            [
-                "/prototype",
-                "Guests or logged-in users",
-                "Paste URL, run analysis, see summary/prompt/pack, copy and download outputs.",
-                "src/app/prototype/page.tsx, src/app/prototype/PrototypeClient.tsx",
-            ],
-            [
-                "/login",
-                "Users who need auth",
-                "Email/password signup/login and entry to Google OAuth flow.",
-                "src/app/login/page.tsx, src/app/login/LoginForm.tsx",
-            ],
-            [
-                "/login/reset-password",
-                "Users from reset email links",
-                "Set a new password inside an authenticated recovery session.",
-                "src/app/login/reset-password/*",
-            ],
-            [
-                "/extractions/[id]",
-                "Logged-in users",
-                "Poll extraction status and download prompt/pack when completed.",
-                "src/app/extractions/[id]/*",
-            ],
-            [
-                "/dashboard",
-                "Intended logged-in users",
-                "Currently redirects to root, but a full DashboardClient exists in code.",
-                "src/app/dashboard/page.tsx, src/app/dashboard/DashboardClient.tsx",
-            ],
-            [
-                "/policy",
-                "All visitors",
-                "Static acceptable-use policy summary.",
-                "src/app/policy/page.tsx",
-            ],
-            [
-                "/pricing.html, /documentation.html, /about.html",
-                "All visitors",
-                "Static marketing and informational pages.",
-                "public/pricing.html, public/documentation.html, public/about.html",
-            ],
-        ],
-        [1.05 * inch, 1.25 * inch, 2.45 * inch, 2.35 * inch],
-    )
-
-    story.append(p("Frontend state model (non-technical translation)", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "Prototype page state: the URL field, loading spinner, result payload, and copy/download feedback messages.",
-            "Extraction status page state: current extraction row, prompt text, pack JSON, polling timer, and failure message.",
-            "Login page state: mode toggle (login/signup), credential fields, forgot-password path, resend verification path, and messages.",
-            "Dashboard client state (currently dormant route): extraction history list, selected extraction, tabs, prompt/pack artifacts, and sign-out action.",
-        ],
-        styles["bullet"],
-    )
-    story.append(
-        p(
-            "Why this matters: these client states tell you where user confusion can happen (loading, failed states, stale data) even if no backend bug exists.",
-            styles["body"],
-        )
-    )
-
-    story.append(PageBreak())
-
-    story.append(p("3. API Inventory and Ownership", styles["h1"]))
-    story.append(
-        p(
-            "All HTTP APIs live under src/app/api/**/route.ts. The table below groups them by business purpose.",
-            styles["body"],
-        )
-    )
-
-    add_table(
-        story,
-        styles,
-        [
-            ["Endpoint", "Method", "Auth", "Business purpose"],
-            ["/api/analyze", "POST", "Optional", "Run synchronous analysis pipeline and return summary/prompt/export payload."],
-            ["/api/prototype/extract", "POST", "Optional", "Alias that delegates directly to /api/analyze."],
-            ["/api/me/entitlements", "GET", "Optional", "Return guest or logged-in usage/plan state."],
-            ["/api/history", "GET", "Required", "Return analysis history for logged-in user, optional URL query filter."],
-            ["/api/export/json", "POST", "Required", "Return full export JSON for one analysis if plan allows exports."],
-            ["/api/topup", "POST", "Required", "Add +40 analyses only when user has zero remaining analyses."],
-            ["/api/upgrade/pro", "POST", "Required", "Test-mode upgrade to PRO_ACTIVE plan."],
-            ["/api/extractions", "GET", "Required", "List queued extraction jobs for logged-in user."],
-            ["/api/extractions", "POST", "Required", "Consume daily quota, create job row, enqueue Redis payload."],
-            ["/api/extractions/[id]", "GET", "Required", "Fetch one extraction row owned by the user."],
-            ["/api/extractions/[id]/prompt", "GET", "Required", "Fetch prompt artifact for one extraction."],
-            ["/api/extractions/[id]/pack", "GET", "Required", "Fetch design pack artifact for one extraction."],
-            ["/api/auth/password", "POST", "Optional", "Email/password login or signup flow."],
-            ["/api/auth/password/forgot", "POST", "Optional", "Send reset email with callback path."],
-            ["/api/auth/password/resend", "POST", "Optional", "Resend signup verification email."],
-            ["/api/auth/password/update", "POST", "Reset session", "Set a new password."],
-            ["/api/auth/oauth/google", "GET", "Optional", "Start Google OAuth flow."],
-            ["/auth/callback", "GET", "OAuth/email callback", "Exchange code for session and redirect to next path."],
-            ["/api/auth/signout", "POST", "Required", "Sign out current user session."],
-            ["/api/auth/events", "POST", "Optional", "Record a small allowlist of auth-related analytics events."],
-            ["/api/benchmark/snapshot", "POST", "Mixed", "Save regression artifacts to test/regression (blocked in production)."],
-            ["/api/cron/cleanup", "POST", "Secret header/token", "Delete expired artifact files and rows."],
-        ],
-        [1.9 * inch, 0.6 * inch, 0.95 * inch, 1.95 * inch],
-    )
-
-    story.append(p("Important API behavior details", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "/api/analyze sets cookie designdna_anon_uses for guests and enforces 1 lifetime guest analysis.",
-            "/api/analyze supports x-ddna-debug-timing header to include step timing in the response payload.",
-            "/api/export/json returns status 402 with PAID_REQUIRED_JSON_EXPORT for non-paid users.",
-            "/api/topup returns status 409 TOPUP_NOT_AVAILABLE_YET if user still has remaining analyses.",
-            "/api/cron/cleanup requires either x-cron-secret or Authorization: Bearer token matching CRON_CLEANUP_SECRET.",
-        ],
-        styles["bullet"],
-    )
-
-    story.append(PageBreak())
-
-    story.append(p("4. End-to-End Flow A: Synchronous Analysis", styles["h1"]))
-    story.append(
-        p(
-            "This is the main path used by /prototype and /api/analyze. It is designed to return useful output even if LLM enhancement fails.",
-            styles["body"],
-        )
-    )
-
-    story.append(p("Flow diagram (plain text)", styles["h2"]))
-    story.append(
-        p(
-            "User submits URL -> /api/analyze -> rate limit check -> URL normalization -> public IP / robots checks -> "
-            "Playwright capture -> deterministic prompt/tokens build -> optional LLM refinement -> "
-            "entitlement-aware response + optional history save",
-            styles["code"],
-        )
-    )
-
-    story.append(p("Detailed step breakdown", styles["h2"]))
-    add_table(
-        story,
-        styles,
-        [
-            ["Step", "What happens", "Where in code"],
-            ["1. Parse request", "Validate request body has URL string.", "src/app/api/analyze/route.ts"],
-            ["2. Identify caller", "If logged in use user ID, else use x-forwarded-for IP for rate limiting.", "src/app/api/analyze/route.ts"],
-            ["3. Rate limit", "Upstash counter allows max 8 analyze requests per 60 seconds per identifier.", "src/lib/rate-limit.ts"],
-            ["4. Normalize URL", "Trim input, auto-add https:// if missing, allow only http/https.", "src/lib/url-security.ts"],
-            ["5. Block unsafe targets", "Reject localhost/.local/private IP results to prevent SSRF-like internal scans.", "src/lib/url-security.ts"],
-            ["6. robots policy", "Fetch robots.txt, only block on explicit disallow for DesignDNA user agent.", "src/lib/robots.ts"],
-            ["7. Capture page", "Playwright captures DOM/style signals, screenshot, and trace package.", "src/lib/extractor/playwright-extractor.ts"],
-            ["8. Deterministic output", "Build prompt and semantic tokens without LLM dependence.", "src/lib/prompt.ts, src/lib/compile-stitch.ts, src/lib/tokens-json.ts"],
-            ["9. Optional LLM enhancement", "Call chat completions endpoint with strict JSON schema and retry logic.", "src/lib/openai-enhance.ts"],
-            ["10. Pricing and history", "Consume quota for logged-in users and persist history payloads.", "src/lib/pricing.ts, src/lib/analyze-service.ts"],
-            ["11. Return response", "Return completed/failed payload with entitlement flags and optional timing.", "src/app/api/analyze/route.ts"],
-        ],
-        [0.85 * inch, 3.1 * inch, 2.05 * inch],
-    )
-
-    story.append(p("Resilience model", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "If no LLM key exists, analysis still succeeds with deterministic output path no_api_key.",
-            "If strict LLM JSON validation fails, the code attempts one repair request (max attempts capped at 2).",
-            "If enhancement still fails, final path is deterministic_fallback and user still receives usable output.",
-            "Telemetry writes are wrapped in trackEventSafe so analytics failures do not fail user analysis.",
-        ],
-        styles["bullet"],
-    )
-
-    story.append(PageBreak())
-
-    story.append(p("5. End-to-End Flow B: Queue + Worker Extraction", styles["h1"]))
-    story.append(
-        p(
-            "This is the asynchronous path behind /api/extractions and extraction status pages.",
-            styles["body"],
-        )
-    )
-
-    story.append(p("Flow diagram (plain text)", styles["h2"]))
-    story.append(
-        p(
-            "Client POST /api/extractions -> require login -> consume daily queue quota -> create extraction row (queued) -> "
-            "push Redis job -> worker loop pops job -> run capture pipeline -> upload screenshot/trace -> "
-            "write prompt/pack artifact row -> mark completed or failed",
-            styles["code"],
-        )
-    )
-
-    story.append(p("Worker state progression", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "Queued row starts at status queued and progress 0.",
-            "setExtractionRunning sets status running and progress 10.",
-            "After public target check progress moves to 20.",
-            "After robots check progress moves to 35.",
-            "After capture progress moves to 75.",
-            "completeExtraction sets status completed and progress 100.",
-            "Any error path writes status failed, error code/message, and completed timestamp.",
-        ],
-        styles["bullet"],
-    )
-
-    story.append(p("Queue and worker internals", styles["h2"]))
-    add_table(
-        story,
-        styles,
-        [
-            ["Concern", "Behavior", "Code files"],
-            ["Queue format", "JSON payload with extractionId, userId, url stored in Redis list designdna:extraction_jobs.", "src/lib/queue.ts"],
-            ["Polling interval", "Worker checks queue every 2000 ms when empty.", "src/worker/index.ts"],
-            ["Artifact storage", "Screenshot and trace upload to private captures bucket path userId/extractionId/...", "src/lib/worker.ts"],
-            ["Bucket bootstrap", "Worker auto-creates captures bucket if missing (20MB file size limit, private).", "src/lib/worker.ts"],
-            ["Public error handling", "Internal errors are translated to user-safe messages before persistence.", "src/lib/errors.ts, src/lib/worker.ts"],
-        ],
-        [1.2 * inch, 2.9 * inch, 1.9 * inch],
-    )
-
-    story.append(PageBreak())
-
-    story.append(p("6. Data Model and Data Lifecycle", styles["h1"]))
-    story.append(
-        p(
-            "The project uses Supabase Postgres with row-level security and a small set of core business tables.",
-            styles["body"],
-        )
-    )
-
-    story.append(p("Core table map", styles["h2"]))
-    add_table(
-        story,
-        styles,
-        [
-            ["Table", "Business meaning", "Key fields"],
-            ["extractions", "Queue job record for async extraction flow.", "status, progress_pct, url, started_at, completed_at, expires_at"],
-            ["extraction_artifacts", "Output artifacts linked 1:1 with extraction.", "prompt_text, pack_json, screenshot_path, trace_path"],
-            ["usage_counters", "Daily extraction counter per user for queue cap.", "user_id + date_utc primary key, extractions_count"],
-            ["rate_limit_config", "Daily cap config table (free plan seed).", "plan, daily_cap"],
-            ["user_entitlements", "Monthly plan and allowances for synchronous analysis features.", "plan, analyses_used_this_period, analyses_limit_this_period, topup_balance, period bounds"],
-            ["analysis_history", "Saved outputs of synchronous analysis for logged-in users.", "source_url, preview_payload, export_payload, created_at"],
-            ["analytics_events", "Telemetry event stream, service-role written.", "event_name, event_payload, created_at"],
-        ],
-        [1.25 * inch, 2.35 * inch, 2.4 * inch],
-    )
-
-    story.append(p("Relationships in plain language", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "A user can have many extraction jobs and many history rows.",
-            "Each extraction job can have exactly one artifact row.",
-            "Each user has one entitlement row that tracks current monthly period state.",
-            "Daily queue usage is stored per user per UTC date.",
-            "Analytics rows may or may not tie to a known user ID.",
-        ],
-        styles["bullet"],
-    )
-
-    story.append(p("Security and RLS model", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "User-facing tables have row-level security enabled.",
-            "Common policy pattern: authenticated user can only read/write rows where auth.uid() equals user_id.",
-            "analytics_events intentionally blocks client inserts (with check false) so normal clients cannot write telemetry directly.",
-            "consume_user_quota is a security-definer RPC with execute granted to authenticated and service_role only.",
-        ],
-        styles["bullet"],
-    )
-
-    story.append(p("Data lifecycle timeline", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "Creation: analysis or extraction request inserts rows in history/extractions.",
-            "Enrichment: artifacts and export payloads are attached once capture/enhancement completes.",
-            "Use phase: users query history or extraction status through user-scoped endpoints.",
-            "Expiry: extraction rows have expires_at and cleanup removes storage files + artifact rows after TTL.",
-            "Retention detail: cleanup removes artifacts/files but does not delete extraction metadata rows.",
-        ],
-        styles["bullet"],
-    )
-
-    story.append(PageBreak())
-
-    story.append(p("7. Pricing, Entitlements, and Usage Rules", styles["h1"]))
-    story.append(
-        p(
-            "There are two different quota systems in the codebase. This is a common source of confusion, so it is called out explicitly.",
-            styles["body"],
-        )
-    )
-
-    add_table(
-        story,
-        styles,
-        [
-            ["Quota type", "Scope", "Default rule", "Where enforced"],
-            ["Guest lifetime quota", "Anonymous synchronous analysis", "1 lifetime analysis via cookie designdna_anon_uses.", "src/lib/analyze-service.ts, /api/analyze"],
-            ["Monthly entitlement quota", "Logged-in synchronous analysis", "FREE = 10/month, PRO = 100/month (+ topups).", "src/lib/pricing.ts, user_entitlements table"],
-            ["Daily queue quota", "Logged-in async extraction queue", "EXTRACTION_DAILY_CAP default 10/day.", "consume_user_quota RPC, src/lib/db.ts"],
-        ],
-        [1.4 * inch, 1.4 * inch, 1.75 * inch, 1.8 * inch],
-    )
-
-    story.append(p("Plan behavior summary", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "ANONYMOUS plan is computed in API responses and cannot export JSON or view history.",
-            "FREE users can analyze and view history but cannot export JSON.",
-            "PRO_ACTIVE and PRO_CANCELED_GRACE can export JSON and have higher monthly limits.",
-            "Topups add +40 analyses and are only allowed once remaining analyses reaches zero.",
-            "Monthly reset logic recalculates period bounds and can reset used/topup counts when period expires.",
-        ],
-        styles["bullet"],
-    )
-
-    story.append(p("Pricing-related endpoints", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "/api/me/entitlements returns the user or guest entitlement object for UI gating.",
-            "/api/export/json checks can_export_json and returns 402 for non-paid plans.",
-            "/api/topup grants +40 analyses with guard TOPUP_NOT_AVAILABLE_YET.",
-            "/api/upgrade/pro sets plan to PRO_ACTIVE in test mode.",
-        ],
-        styles["bullet"],
-    )
-
-    story.append(PageBreak())
-
-    story.append(p("8. Security and Trust Boundaries", styles["h1"]))
-    story.append(
-        p(
-            "The system includes practical protections to reduce abuse and accidental unsafe behavior.",
-            styles["body"],
-        )
-    )
-
-    add_table(
-        story,
-        styles,
-        [
-            ["Risk area", "Protection implemented", "Files"],
-            ["Input validation", "zod schemas parse JSON bodies and reject malformed payloads early.", "src/app/api/*/route.ts"],
-            ["Request flooding", "Upstash rate limit on /api/analyze: 8 requests per 60 seconds per user/IP key.", "src/lib/rate-limit.ts"],
-            ["SSRF / internal scan risk", "URL normalization blocks localhost/.local and DNS-resolved private IPs.", "src/lib/url-security.ts"],
-            ["Crawl policy compliance", "robots.txt checked for DesignDNA user agent and blocks explicit disallow paths.", "src/lib/robots.ts"],
-            ["Error leakage", "Internal stack/runtime details are mapped to safe public error text.", "src/lib/errors.ts"],
-            ["Privileged writes", "Service role Supabase client used for privileged DB and storage operations.", "src/lib/supabase/admin.ts"],
-            ["Cron endpoint abuse", "Secret required in x-cron-secret or Bearer token for cleanup endpoint.", "src/app/api/cron/cleanup/route.ts"],
-        ],
-        [1.25 * inch, 2.8 * inch, 2.0 * inch],
-    )
-
-    story.append(p("Security caveats to understand", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "robots logic is fail-open for transient network/DNS issues; only explicit disallow blocks a target.",
-            "If Upstash env vars are missing, rate-limit helper allows requests (fallback allowed: true).",
-            "Guest usage is cookie-based and therefore browser/device scoped, not global identity scoped.",
-            "Service role key exposure would be high risk because it bypasses user-scoped restrictions.",
-        ],
-        styles["bullet"],
-    )
-
-    story.append(PageBreak())
-
-    story.append(p("9. Configuration and Secrets", styles["h1"]))
-    story.append(
-        p(
-            "Environment variables are split between strict required config and optional tuning flags.",
-            styles["body"],
-        )
-    )
-
-    story.append(p("Validated required variables (zod in src/lib/env.ts)", styles["h2"]))
-    add_table(
-        story,
-        styles,
-        [
-            ["Variable", "Required", "Default", "Purpose"],
-            ["NEXT_PUBLIC_SUPABASE_URL", "Yes", "None", "Supabase URL for browser/server clients."],
-            ["NEXT_PUBLIC_SUPABASE_PUBLISHABLE_KEY", "Yes", "None", "Publishable key for browser/server clients."],
-            ["SUPABASE_SERVICE_ROLE_KEY", "Yes", "None", "Privileged server-side DB/storage writes."],
-            ["UPSTASH_REDIS_REST_URL", "Yes", "None", "Redis connection for rate limit and queue."],
-            ["UPSTASH_REDIS_REST_TOKEN", "Yes", "None", "Redis auth token."],
-            ["EXTRACTION_DAILY_CAP", "No", "10", "Daily async extraction quota cap."],
-            ["ARTIFACT_TTL_HOURS", "No", "24", "Expiration window for extraction artifacts."],
-            ["CRON_CLEANUP_SECRET", "Yes", "None", "Authorization secret for cleanup endpoint."],
-        ],
-        [1.9 * inch, 0.7 * inch, 0.8 * inch, 2.0 * inch],
-    )
-
-    story.append(p("LLM and capture tuning knobs", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "LLM_API_KEY or OPENAI_API_KEY enables enhancement; if absent, deterministic fallback is used.",
-            "LLM_API_BASE_URL defaults to https://api.openai.com/v1.",
-            "LLM_MODEL defaults to gpt-4.1-mini unless overridden.",
-            "ANALYZE_FAST_MODE_ENABLED switches capture timing profile.",
-            "ANALYZE_LLM_TIMEOUT_MS and ANALYZE_LLM_MAX_ATTEMPTS control enhancement latency/retry policy.",
-            "APP_ORIGIN is used to build callback URLs for auth and reset flows.",
-        ],
-        styles["bullet"],
-    )
-
-    story.append(p("Secrets handling guidance", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "Do not commit .env.local.",
-            "Treat SUPABASE_SERVICE_ROLE_KEY and CRON_CLEANUP_SECRET as high-sensitivity secrets.",
-            "If CRON_CLEANUP_SECRET is rotated, scheduler and environment must be updated at the same time.",
-            "Only expose publishable keys to browser code.",
-        ],
-        styles["bullet"],
-    )
-
-    story.append(PageBreak())
-
-    story.append(p("10. Operations and Deployment", styles["h1"]))
-    story.append(
-        p(
-            "The app is built for local dev + serverless deployment with an optional separate worker process.",
-            styles["body"],
-        )
-    )
-
-    story.append(p("Command map", styles["h2"]))
-    add_table(
-        story,
-        styles,
-        [
-            ["Command", "Purpose", "Notes"],
-            ["npm run dev", "Start Next.js dev server", "Main local runtime at http://localhost:3000."],
-            ["npm run build", "Create production build", "Pre-deploy compile step."],
-            ["npm run start", "Start production server", "Runs compiled app."],
-            ["npm run lint", "ESLint checks", "Code quality gate."],
-            ["npm run typecheck", "TypeScript no-emit check", "Type safety gate."],
-            ["npm run test", "Run vitest suite", "Unit tests for core logic."],
-            ["npm run worker", "Run extraction worker loop", "Needed for async /api/extractions flow."],
-            ["npm run cleanup:expired", "Manual cleanup of expired artifacts", "Script wrapper over src/scripts/cleanup-expired.ts."],
-            ["npm run docs:check", "Ensure docs changed with docs-required code paths", "Enforced by scripts/check-docs-sync.sh."],
-        ],
-        [1.3 * inch, 2.0 * inch, 2.1 * inch],
-    )
-
-    story.append(p("Deployment behavior", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "vercel.json configures cron path /api/cron/cleanup on schedule 0 0 * * * (daily at 00:00).",
-            "next.config.ts includes @sparticuz/chromium binaries for /api/analyze and /api/prototype/extract.",
-            "The cleanup endpoint is safe to expose publicly only because it enforces CRON_CLEANUP_SECRET.",
-            "Benchmark snapshot endpoint is intentionally disabled when NODE_ENV=production.",
-        ],
-        styles["bullet"],
-    )
-
-    story.append(PageBreak())
-
-    story.append(p("11. Testing, Quality Controls, and Regression Assets", styles["h1"]))
+    rows = [["Section", "Status", "Changed blocks"]]
+    for section, status, changed in compared:
+        rows.append([section.title, status, f"{len(changed)} of {len(section.blocks)}" if status != UNCHANGED else "-"])
+    rows.extend([title, "removed", "-"] for title in removed)
+    add_table(story, styles, rows, [4.2 * inch, 0.9 * inch, 1.2 * inch])
     story.append(
         p(
-            "Testing is a mix of unit tests for logic and file-based regression snapshots for output stability.",
-            styles["body"],
-        )
-    )
-
-    story.append(p("Unit test coverage map", styles["h2"]))
-    add_table(
-        story,
-        styles,
-        [
-            ["Test file", "Primary concern validated"],
-            ["src/lib/__tests__/auth-resume.test.ts", "Safe next-path handling in auth resume flows."],
-            ["src/lib/__tests__/compile-stitch.test.ts", "Prompt compiler output structure and sections."],
-            ["src/lib/__tests__/errors.test.ts", "Public error mapping and sanitization behavior."],
-            ["src/lib/__tests__/openai-enhance.test.ts", "LLM enhancement and fallback handling."],
-            ["src/lib/__tests__/playwright-extractor-config.test.ts", "Extractor timing/config selection behavior."],
-            ["src/lib/__tests__/prompt.test.ts", "Prompt generation fallback and formatting."],
-            ["src/lib/__tests__/robots.test.ts", "robots parsing and allow/disallow resolution."],
-            ["src/lib/__tests__/style-normalize.test.ts", "Style value normalization behavior."],
-            ["src/lib/__tests__/url-security.test.ts", "URL normalization and blocked target checks."],
-            ["src/lib/__tests__/vision.test.ts", "Vision helper behavior for extracted metadata."],
-        ],
-        [2.7 * inch, 2.7 * inch],
-    )
-
-    story.append(p("Regression snapshot harness", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "Snapshots live in test/regression/<slug>/ with stitchPrompt.txt, tokens.json, and score.json.",
-            "Stable URL inputs are listed in test/fixtures/urls.json.",
-            "POST /api/benchmark/snapshot can write snapshot files in non-production mode.",
-            "This gives a practical before/after diff surface when extraction logic changes.",
-        ],
-        styles["bullet"],
-    )
-
-    story.append(PageBreak())
-
-    story.append(p("12. Repository Ownership Map", styles["h1"]))
-    story.append(
-        p(
-            "This is the folder-level map of responsibilities. Use it when deciding where changes belong.",
-            styles["body"],
-        )
-    )
-
-    add_table(
-        story,
-        styles,
-        [
-            ["Path", "Responsibility"],
-            ["src/app/", "App Router pages, route handlers, and route-level UI composition."],
-            ["src/app/api/", "HTTP API contracts and edge/server entry points."],
-            ["src/lib/", "Business logic and service integrations (pricing, security, extraction, queue helpers)."],
-            ["src/lib/extractor/", "Capture pipeline internals and style/token extraction algorithms."],
-            ["src/lib/supabase/", "Supabase client wrappers for browser/server/admin contexts."],
-            ["src/worker/", "Standalone worker process for async queue jobs."],
-            ["src/scripts/", "Small operational scripts run via package scripts."],
-            ["supabase/migrations/", "Source of truth for DB schema and RLS policies."],
-            ["docs/", "Human-readable project documentation that must evolve with code changes."],
-            ["public/", "Static runtime pages/assets and marketing artifacts."],
-            ["test/", "Fixtures and regression snapshots."],
-            ["scripts/", "Meta scripts such as docs sync enforcement."],
-        ],
-        [2.0 * inch, 3.4 * inch],
-    )
-
-    story.append(p("High-impact files index", styles["h2"]))
-    add_table(
-        story,
-        styles,
-        [
-            ["File", "Why it matters"],
-            ["src/lib/analyze-service.ts", "Main orchestrator for analysis flow and entitlement integration."],
-            ["src/lib/openai-enhance.ts", "LLM enhancement contract, strict schema validation, deterministic fallback."],
-            ["src/lib/extractor/playwright-extractor.ts", "Capture engine and output pack generation."],
-            ["src/lib/pricing.ts", "Plan limits, monthly resets, topups, history/export permissions."],
-            ["src/lib/db.ts", "Queue extraction persistence and artifact write helpers."],
-            ["src/lib/worker.ts", "Job execution logic and storage upload behavior."],
-            ["src/app/api/analyze/route.ts", "Main synchronous API entrypoint and guest cookie handling."],
-            ["src/app/api/extractions/route.ts", "Async queue API entrypoint and quota enforcement."],
-            ["src/app/api/export/json/route.ts", "Paid JSON export gate behavior."],
-            ["src/lib/url-security.ts", "Target safety checks against private/internal hosts."],
-            ["src/lib/robots.ts", "robots policy enforcement model."],
-            ["supabase/migrations/20260216233000_init_designdna.sql", "Initial queue/data/security schema."],
-            ["supabase/migrations/20260217195000_pricing_entitlements.sql", "Entitlement/history/analytics schema."],
-            ["supabase/migrations/20260219120000_update_pricing_model.sql", "Plan limit adjustments (Free 10, Pro 100)."],
-            ["scripts/check-docs-sync.sh", "Prevents shipping core code changes without docs updates."],
-        ],
-        [2.65 * inch, 2.75 * inch],
-    )
-
-    story.append(PageBreak())
-
-    story.append(p("13. Operational Debug Map for Non-Technical Owners", styles["h1"]))
-    story.append(
-        p(
-            "If you hear a problem report, use this table to route the issue to the right subsystem quickly.",
-            styles["body"],
-        )
-    )
-
-    add_table(
-        story,
-        styles,
-        [
-            ["Symptom", "Likely subsystem", "First files to inspect"],
-            ["User says URL analysis is blocked immediately", "URL safety or robots policy", "src/lib/url-security.ts, src/lib/robots.ts, /api/analyze response"],
-            ["User gets temporary failure messages often", "Capture runtime or upstream instability", "src/lib/errors.ts, src/lib/extractor/playwright-extractor.ts"],
-            ["Guest user says they are blocked after first try", "Anonymous lifetime usage rule", "src/lib/analyze-service.ts, /api/me/entitlements"],
-            ["Paid user cannot export JSON", "Entitlement gate or plan state", "src/app/api/export/json/route.ts, src/lib/pricing.ts, user_entitlements"],
-            ["Extraction stuck in queued/running", "Worker not running or queue issue", "src/worker/index.ts, src/lib/queue.ts, src/lib/worker.ts"],
-            ["Cleanup did not remove old artifacts", "Cron auth or cleanup selection logic", "vercel.json, src/app/api/cron/cleanup/route.ts, src/lib/cleanup.ts"],
-            ["Login/reset link sends user to wrong page", "Path sanitization/callback origin", "src/lib/auth-resume.ts, src/lib/app-origin.ts, auth route handlers"],
-            ["Docs check fails in CI/PR", "Docs-required paths changed without docs updates", "scripts/check-docs-sync.sh, docs/*, README.md"],
-        ],
-        [2.2 * inch, 1.55 * inch, 1.7 * inch],
-    )
-
-    story.append(p("Current architecture quirks worth noting", styles["h2"]))
-    add_bullets(
-        story,
-        [
-            "Route /dashboard currently redirects to /, even though DashboardClient includes a full extraction workspace implementation.",
-            "Root route / redirects to a static HTML file in public instead of rendering a React page.",
-            "The repository contains both synchronous and asynchronous analysis paths; this can confuse roadmap and support discussions if not named explicitly.",
-        ],
-        styles["bullet"],
-    )
-
-    story.append(PageBreak())
-
-    story.append(p("14. Glossary", styles["h1"]))
-    add_table(
-        story,
-        styles,
-        [
-            ["Term", "Meaning in this codebase"],
-            ["Analysis", "Synchronous URL processing path that returns output in one API call."],
-            ["Extraction", "Asynchronous queued job tracked by status in the extractions table."],
-            ["Pack / DesignDnaPack", "Structured capture payload containing tokens, sections, components, and metadata."],
-            ["Preview payload", "Smaller object used for cards/history summaries in the product."],
-            ["Export JSON", "Versioned full output schema (schema_version 1.0) for downstream use."],
-            ["Entitlement", "Plan and usage state that defines what the user can do right now."],
-            ["Topup", "Additional paid analysis credits added after monthly limit is exhausted."],
-            ["RLS", "Row-level security: DB policy that prevents users reading/writing other users' rows."],
-            ["Service role client", "Privileged server-side Supabase client for trusted writes."],
-            ["Fail-open robots behavior", "If robots file cannot be fetched due to transient errors, request is not blocked."],
-            ["Deterministic fallback", "Guaranteed output path used when LLM enhancement is missing or invalid."],
-        ],
-        [1.9 * inch, 3.5 * inch],
-    )
-
-    story.append(p("15. Quick Executive Walkthrough", styles["h1"]))
-    story.append(
-        p(
-            "If a non-technical stakeholder asks 'what happens after the user clicks Analyze?', this is the concise script:",
-            styles["body"],
-        )
-    )
-    add_bullets(
-        story,
-        [
-            "The system checks that requests are not too frequent and that the URL is safe to scan.",
-            "It confirms the target website policy does not explicitly block DesignDNA.",
-            "It captures the page structure and visual language using Playwright.",
-            "It builds design outputs in a deterministic way and optionally refines them with an LLM.",
-            "It applies plan rules (guest, free, paid), stores user history when appropriate, and returns outputs.",
-            "If anything fails, users receive safe error messages while internal details stay hidden.",
-        ],
-        styles["bullet"],
-    )
-    story.append(Spacer(1, 0.12 * inch))
-    story.append(
-        p(
-            "Output artifact: output/pdf/designdna-system-map.pdf. This file is meant to be regenerated whenever major architecture, pricing, or data model changes occur.",
+            "Only added and changed sections follow. Inside a changed section, each block that differs from the "
+            "previous build is preceded by a yellow marker.",
             styles["body"],
         )
     )
 
+    # Unchanged sections are never turned into flowables, only compared by fingerprint.
+    for section, status, changed in compared:
+        if status == UNCHANGED:
+            continue
+        blocks = marked_blocks(section, changed if status != ADDED else set(), lambda: content.Text("Changed", "change"))
+        banner = "New section since the previous build" if status == ADDED else f"Changed since the previous build: {len(changed)} block(s)"
+        if section.title == FRONT_MATTER:
+            blocks = [content.Text("Cover page", "h1"), *blocks]
+        story.append(PageBreak())
+        append_block(story, styles, blocks[0])
+        story.append(p(banner, styles["change"]))
+        build_story(styles, [block for block in blocks[1:] if not isinstance(block, content.PageBreak)], story)
     return story
 
 
-def main():
-    styles = build_styles()
+def render_system_map(
+    target,
+    fonts: dict[str, str] | None = None,
+    index: SearchIndex | None = None,
+    profiler: MemoryProfiler | None = None,
+    baseline: dict | None = None,
+) -> list[Section]:
+    profiler = profiler or MemoryProfiler(OUT.name, enabled=False)
+    fonts = fonts or resolve_fonts()
     doc = SimpleDocTemplate(
-        str(OUT),
+        target,
         pagesize=letter,
         leftMargin=0.62 * inch,
         rightMargin=0.62 * inch,
         topMargin=0.68 * inch,
         bottomMargin=0.84 * inch,
-        title="DesignDNA System Map",
+        title="DesignDNA System Map" if baseline is None else "DesignDNA System Map - Changes",
         author="Codex",
     )
-    story = build_story(styles)
-    doc.build(story, onFirstPage=draw_footer, onLaterPages=draw_footer)
-    print(str(OUT.resolve()))
+    with profiler.phase("story build"):
+        styles = build_styles(fonts)
+        blocks = content.build_document()
+        sections = split_sections(blocks, "h1", ignore=is_volatile)
+        if baseline is None:
+            story = build_story(styles, blocks, SectionStory(profiler, styles["h1"].name) if profiler.enabled else None)
+        else:
+            story = build_delta_story(styles, sections, baseline)
+        # A delta build only lays out changed sections, so it must not drop the other sections' layouts.
+        save_layouts(prune=baseline is None)
+        profiler.close("section")
+    if index is not None:
+        index.add_story(story, styles["h1"].name)
+        doc.afterFlowable = lambda flowable: index.resolve(flowable, doc.page)
+    footer = partial(draw_footer, font_name=fonts["regular"])
+    options = {"canvasmaker": profiled_canvas(profiler)} if profiler.enabled else {}
+    profiler.switch("phase", "layout")
+    doc.build(story, onFirstPage=footer, onLaterPages=footer, **options)
+    return sections
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the DesignDNA system map PDF.")
+    parser.add_argument("--font-dir", help="Directory with brand TTFs (Manrope, Space Mono) to embed as subsets.")
+    parser.add_argument("--no-optimize", action="store_true", help="Write the raw ReportLab output.")
+    parser.add_argument("--no-linearize", action="store_true", help="Optimize without fast web view linearization.")
+    parser.add_argument("--delta", action="store_true", help="Render only sections changed since the last full build.")
+    parser.add_argument("--delta-from", type=Path, help="Section manifest to compare against (default: last full build).")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    # Paths on the command line are relative to the caller; output/, reports, and sources to the repo root.
+    for name in ("font_dir", "delta_from", "memory_baseline"):
+        if getattr(args, name):
+            setattr(args, name, Path(getattr(args, name)).resolve())
+    os.chdir(ROOT)
+    OUT.parent.mkdir(parents=True, exist_ok=True)
+
+    baseline = None
+    out = OUT
+    if args.delta or args.delta_from:
+        source = args.delta_from or manifest_path(OUT)
+        baseline = load_manifest(source)
+        if baseline is None:
+            raise SystemExit(f"No section manifest at {source}; run a full build first.")
+        out = DELTA_OUT
+
+    profiler = profiler_from_args(out.name, args)
+    fonts = resolve_fonts(args.font_dir)
+    index = SearchIndex(out.name)
+    sections: list[Section] = []
+    stats = write_pdf(
+        lambda target: sections.extend(render_system_map(target, fonts, index, profiler, baseline)),
+        out,
+        optimize=not args.no_optimize,
+        linearize=not args.no_linearize,
+        profiler=profiler,
+    )
+    if stats:
+        print(describe_optimization(stats))
+    with profiler.phase("search index"):
+        index_stats = index.write(index_path(out))
+    print(describe_index(index_stats))
+    if baseline is None:
+        write_manifest(manifest_path(OUT), sections, datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"))
+    print(str(out.resolve()))
+    finish_profile(profiler, out, args)
 
 
 if __name__ == "__main__":
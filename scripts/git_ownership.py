@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+OUT = Path("output/reports/ownership.json")
+CACHE = Path("output/cache/git-ownership.json")
+CACHE_VERSION = 1
+
+# Same folders as the hand-written responsibility table in section 12; files go to the deepest match.
+DIRECTORIES = (
+    "src/app/",
+    "src/app/api/",
+    "src/lib/",
+    "src/lib/extractor/",
+    "src/lib/supabase/",
+    "src/worker/",
+    "src/scripts/",
+    "supabase/migrations/",
+    "docs/",
+    "public/",
+    "test/",
+    "scripts/",
+)
+OTHER = "(other)"
+RECENT_DAYS = 90
+TOP_AUTHORS = 3
+
+RECORD = "\x1e"
+FIELD = "\x1f"
+LOG_FORMAT = f"{RECORD}%H{FIELD}%an{FIELD}%at"
+
+
+def git(*args: str) -> str:
+    return subprocess.run(["git", *args], check=True, capture_output=True, text=True).stdout.strip()
+
+
+def directory_for(path: str) -> str:
+    matches = [prefix for prefix in DIRECTORIES if path.startswith(prefix)]
+    return max(matches, key=len) if matches else OTHER
+
+
+def empty_cache() -> dict:
+    return {"version": CACHE_VERSION, "layout": list(DIRECTORIES), "head": None, "commits": 0, "directories": {}}
+
+
+def load_cache(path: Path) -> dict:
+    if not path.exists():
+        return empty_cache()
+    cache = json.loads(path.read_text())
+    if cache.get("version") != CACHE_VERSION or cache.get("layout") != list(DIRECTORIES):
+        return empty_cache()
+    return cache
+
+
+def is_ancestor(sha: str, head: str) -> bool:
+    return subprocess.run(["git", "merge-base", "--is-ancestor", sha, head], capture_output=True).returncode == 0
+
+
+def stream_log(revision_range: str):
+    process = subprocess.Popen(
+        ["git", "log", "--numstat", "--no-renames", f"--format={LOG_FORMAT}", revision_range],
+        stdout=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    commit = None
+    for line in process.stdout:
+        line = line.rstrip("\n")
+        if line.startswith(RECORD):
+            if commit:
+                yield commit
+            sha, author, stamp = line[1:].split(FIELD)
+            commit = {"sha": sha, "author": author, "at": int(stamp), "files": []}
+        elif line and commit is not None:
+            added, deleted, path = line.split("\t", 2)
+            commit["files"].append((0 if added == "-" else int(added), 0 if deleted == "-" else int(deleted), path))
+    if commit:
+        yield commit
+    if process.wait() != 0:
+        raise subprocess.CalledProcessError(process.returncode, "git log")
+
+
+def apply_commit(directories: dict, commit: dict):
+    touched: dict[str, list[int]] = {}
+    for added, deleted, path in commit["files"]:
+        churn = touched.setdefault(directory_for(path), [0, 0, 0])
+        churn[0] += added
+        churn[1] += deleted
+        churn[2] += 1
+
+    month = datetime.fromtimestamp(commit["at"], timezone.utc).strftime("%Y-%m")
+    for name, (added, deleted, files) in touched.items():
+        entry = directories.setdefault(
+            name,
+            {"commits": 0, "added": 0, "deleted": 0, "file_changes": 0, "last_at": 0, "last_sha": None, "authors": {}, "monthly": {}},
+        )
+        entry["commits"] += 1
+        entry["added"] += added
+        entry["deleted"] += deleted
+        entry["file_changes"] += files
+        if commit["at"] >= entry["last_at"]:
+            entry["last_at"] = commit["at"]
+            entry["last_sha"] = commit["sha"]
+        author = entry["authors"].setdefault(commit["author"], [0, 0])
+        author[0] += 1
+        author[1] += added + deleted
+        entry["monthly"][month] = entry["monthly"].get(month, 0) + added + deleted
+
+
+def summarize(cache: dict, now: float) -> list[dict]:
+    cutoff = datetime.fromtimestamp(now - RECENT_DAYS * 86_400, timezone.utc).strftime("%Y-%m")
+    rows = []
+    for name in [*DIRECTORIES, OTHER]:
+        entry = cache["directories"].get(name)
+        if entry is None:
+            continue
+        authors = Counter({author: stats[1] for author, stats in entry["authors"].items()})
+        total = sum(authors.values()) or 1
+        rows.append(
+            {
+                "path": name,
+                "commits": entry["commits"],
+                "added": entry["added"],
+                "deleted": entry["deleted"],
+                "churn": entry["added"] + entry["deleted"],
+                "recent_churn": sum(count for month, count in entry["monthly"].items() if month >= cutoff),
+                "file_changes": entry["file_changes"],
+                "last_touched": datetime.fromtimestamp(entry["last_at"], timezone.utc).strftime("%Y-%m-%d"),
+                "last_sha": entry["last_sha"][:10],
+                "top_authors": [
+                    {"author": author, "churn": churn, "share": round(churn / total, 3), "commits": entry["authors"][author][0]}
+                    for author, churn in authors.most_common(TOP_AUTHORS)
+                ],
+            }
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate git history into per-directory churn and ownership.")
+    parser.add_argument("--rev", default="HEAD", help="Revision to index up to.")
+    parser.add_argument("--full", action="store_true", help="Ignore the cache and rescan the full history.")
+    parser.add_argument("--cache", type=Path, default=CACHE)
+    parser.add_argument("--out", type=Path, default=OUT, help="Where to write the JSON report.")
+    args = parser.parse_args()
+
+    head = git("rev-parse", args.rev)
+    cache = empty_cache() if args.full else load_cache(args.cache)
+    if cache["head"] and not is_ancestor(cache["head"], head):
+        cache = empty_cache()
+
+    started = time.perf_counter()
+    processed = 0
+    if cache["head"] != head:
+        revision_range = f"{cache['head']}..{head}" if cache["head"] else head
+        for commit in stream_log(revision_range):
+            apply_commit(cache["directories"], commit)
+            processed += 1
+        cache.update({"head": head, "commits": cache["commits"] + processed})
+        args.cache.parent.mkdir(parents=True, exist_ok=True)
+        args.cache.write_text(json.dumps(cache, separators=(",", ":")))
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "head": head,
+        "commits": cache["commits"],
+        "recent_days": RECENT_DAYS,
+        "directories": summarize(cache, time.time()),
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"{processed} new commits indexed in {time.perf_counter() - started:.2f}s ({cache['commits']} total)")
+    print(str(args.out.resolve()))
+
+
+if __name__ == "__main__":
+    main()
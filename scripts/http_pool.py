@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import ssl
+from dataclasses import dataclass
+from urllib.parse import quote, urljoin, urlsplit
+
+MAX_REDIRECTS = 5
+MAX_BODY_BYTES = 512 * 1024
+REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+DEFAULT_PORTS = {"http": 80, "https": 443}
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD"})
+
+
+class StaleConnection(ConnectionError):
+    pass
+
+
+@dataclass
+class Response:
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        per_host: int = 4,
+        user_agent: str = "DesignDNA",
+        connect_to: dict[str, tuple[str, int]] | None = None,
+        max_body: int = MAX_BODY_BYTES,
+    ):
+        self.per_host = per_host
+        self.user_agent = user_agent
+        self.connect_to = connect_to or {}
+        self.max_body = max_body
+        self.idle: dict[tuple[str, str, int], list[tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+        self.limits: dict[tuple[str, str, int], asyncio.Semaphore] = {}
+        self.tls = ssl.create_default_context()
+        self.opened = 0
+        self.reused = 0
+
+    async def fetch(self, url: str, method: str = "GET") -> Response:
+        for _ in range(MAX_REDIRECTS + 1):
+            response = await self.request(method, url)
+            location = response.headers.get("location")
+            if response.status not in REDIRECT_STATUSES or not location:
+                return response
+            url = urljoin(url, location)
+        raise ConnectionError(f"More than {MAX_REDIRECTS} redirects")
+
+    async def request(self, method: str, url: str, body: bytes | None = None, headers: dict[str, str] | None = None) -> Response:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in DEFAULT_PORTS or not parts.hostname:
+            raise ValueError(f"Unsupported URL: {url}")
+        key = (scheme, parts.hostname, parts.port or DEFAULT_PORTS[scheme])
+        target = quote((parts.path or "/") + (f"?{parts.query}" if parts.query else ""), safe="/:@!$&'()*+,;=?%~-._")
+        head = self.request_head(method, key, target, body, headers or {})
+
+        async with self.limits.setdefault(key, asyncio.Semaphore(self.per_host)):
+            while True:
+                idle = self.idle.get(key)
+                connection = idle.pop() if idle else None
+                reused = connection is not None
+                if connection is None:
+                    connection = await self.open(key)
+                else:
+                    self.reused += 1
+                try:
+                    response, keep = await self.exchange(connection, method, head, body)
+                except (ConnectionError, asyncio.IncompleteReadError) as error:
+                    connection[1].close()
+                    # The server dropped an idle keep-alive connection; retry once on a fresh one unless
+                    # the request may already have been processed.
+                    if reused and (method in IDEMPOTENT_METHODS or isinstance(error, StaleConnection)):
+                        continue
+                    raise
+                except BaseException:
+                    connection[1].close()
+                    raise
+                if keep:
+                    self.idle.setdefault(key, []).append(connection)
+                else:
+                    connection[1].close()
+                return response
+
+    def request_head(self, method: str, key: tuple[str, str, int], target: str, body: bytes | None, headers: dict[str, str]) -> bytes:
+        scheme, host, port = key
+        host_header = f"[{host}]" if ":" in host else host
+        if port != DEFAULT_PORTS[scheme]:
+            host_header += f":{port}"
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {host_header}", f"User-Agent: {self.user_agent}", "Accept: */*"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        lines.append("Connection: keep-alive")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def open(self, key: tuple[str, str, int]) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        scheme, host, port = key
+        address, connect_port = self.connect_to.get(host, (host, port))
+        tls = {"ssl": self.tls, "server_hostname": host} if scheme == "https" else {}
+        connection = await asyncio.open_connection(address, connect_port, **tls)
+        self.opened += 1
+        return connection
+
+    async def exchange(self, connection, method: str, head: bytes, body: bytes | None) -> tuple[Response, bool]:
+        reader, writer = connection
+        writer.write(head + (body or b""))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise StaleConnection("Connection closed before a response")
+        version, status, *_ = status_line.decode("latin-1").split(None, 2)
+        headers: dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        code = int(status)
+        keep = version.upper() == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if method == "HEAD" or code in (204, 304) or code < 200:
+            content = b""
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            content = await read_chunked(reader, self.max_body)
+        elif "content-length" in headers:
+            length = int(headers["content-length"])
+            content = await reader.readexactly(min(length, self.max_body))
+            keep = keep and length <= self.max_body
+        else:
+            content = await read_to_eof(reader, self.max_body)
+            keep = False
+        return Response(code, headers, content), keep
+
+    async def close(self):
+        writers = [writer for connections in self.idle.values() for _, writer in connections]
+        self.idle.clear()
+        for writer in writers:
+            writer.close()
+        await asyncio.gather(*(writer.wait_closed() for writer in writers), return_exceptions=True)
+
+
+async def read_to_eof(reader: asyncio.StreamReader, limit: int = MAX_BODY_BYTES) -> bytes:
+    # The body ends when the server closes the connection; read() returns whatever has arrived so far.
+    chunks = []
+    size_total = 0
+    while size_total < limit:
+        chunk = await reader.read(limit - size_total)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size_total += len(chunk)
+    return b"".join(chunks)
+
+
+async def read_chunked(reader: asyncio.StreamReader, limit: int = MAX_BODY_BYTES) -> bytes:
+    chunks = []
+    size_total = 0
+    while True:
+        size = int((await reader.readline()).split(b";", 1)[0].strip() or b"0", 16)
+        if size == 0:
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            return b"".join(chunks)
+        chunk = await reader.readexactly(size)
+        await reader.readline()
+        if size_total < limit:
+            chunks.append(chunk[: limit - size_total])
+        size_total += size
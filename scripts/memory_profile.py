@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from reportlab.pdfgen.canvas import Canvas
+
+PROFILE_VERSION = 1
+TOP_SITES = 3
+
+
+def profile_path(pdf: Path) -> Path:
+    return pdf.with_suffix(".memory.json")
+
+
+class MemoryProfiler:
+    def __init__(self, document: str, enabled: bool = True, sites: bool = False):
+        self.document = document
+        self.enabled = enabled
+        self.sites = sites
+        self.records: dict[tuple[str, str], dict] = {}
+        self.stack: list[list[int]] = []
+        self.current: dict[str, tuple[str, object]] = {}
+        self.overall_peak = 0
+
+    def start(self):
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def measure(self, kind: str, name: str, sites: bool = False):
+        if not self.enabled:
+            yield
+            return
+
+        # Take the site snapshot first so its own memory is part of the baseline, not the phase.
+        snapshot = tracemalloc.take_snapshot() if sites and self.sites else None
+        before_current, before_peak = tracemalloc.get_traced_memory()
+        if self.stack:
+            self.stack[-1][0] = max(self.stack[-1][0], before_peak)
+        tracemalloc.reset_peak()
+        self.stack.append([0])
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            after_current, after_peak = tracemalloc.get_traced_memory()
+            peak = max(self.stack.pop()[0], after_peak)
+            if self.stack:
+                self.stack[-1][0] = max(self.stack[-1][0], peak)
+            self.overall_peak = max(self.overall_peak, peak)
+
+            record = self.records.setdefault(
+                (kind, name),
+                {"kind": kind, "name": name, "calls": 0, "net_bytes": 0, "peak_bytes": 0, "peak_above_start_bytes": 0, "ms": 0.0},
+            )
+            record["calls"] += 1
+            record["net_bytes"] += after_current - before_current
+            record["peak_bytes"] = max(record["peak_bytes"], peak)
+            record["peak_above_start_bytes"] = max(record["peak_above_start_bytes"], peak - before_current)
+            record["ms"] += elapsed * 1000
+            if snapshot is not None:
+                ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen *>")]
+                diff = tracemalloc.take_snapshot().filter_traces(ignore).compare_to(snapshot.filter_traces(ignore), "lineno")
+                record["top_sites"] = [
+                    {"site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", "bytes": stat.size_diff}
+                    for stat in diff[:TOP_SITES]
+                ]
+
+    def phase(self, name: str):
+        return self.measure("phase", name, sites=True)
+
+    def switch(self, kind: str, name: str):
+        if not self.enabled:
+            return
+        self.close(kind)
+        context = self.measure(kind, name, sites=kind == "phase")
+        context.__enter__()
+        self.current[kind] = (name, context)
+
+    def close(self, kind: str):
+        active = self.current.pop(kind, None)
+        if active is not None:
+            active[1].__exit__(None, None, None)
+
+    def report(self) -> dict:
+        return {
+            "version": PROFILE_VERSION,
+            "document": self.document,
+            "python": sys.version.split()[0],
+            "peak_bytes": self.overall_peak,
+            "records": list(self.records.values()),
+        }
+
+    def write(self, path: Path) -> dict:
+        report = self.report()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2) + "\n")
+        tracemalloc.stop()
+        return report
+
+
+class SectionStory(list):
+    def __init__(self, profiler: MemoryProfiler, heading_style: str):
+        super().__init__()
+        self.profiler = profiler
+        self.heading_style = heading_style
+
+    def append(self, flowable):
+        style = getattr(flowable, "style", None)
+        if getattr(style, "name", None) == self.heading_style:
+            self.profiler.switch("section", flowable.getPlainText())
+        elif "section" not in self.profiler.current:
+            self.profiler.switch("section", "Cover")
+        super().append(flowable)
+
+
+def profiled_canvas(profiler: MemoryProfiler):
+    class ProfiledCanvas(Canvas):
+        def drawImage(self, *args, **kwargs):
+            with profiler.measure("phase", "image handling"):
+                return super().drawImage(*args, **kwargs)
+
+        def drawInlineImage(self, *args, **kwargs):
+            with profiler.measure("phase", "image handling"):
+                return super().drawInlineImage(*args, **kwargs)
+
+        def save(self):
+            profiler.close("phase")
+            with profiler.phase("pdf serialization"):
+                super().save()
+
+    return ProfiledCanvas
+
+
+def format_table(report: dict) -> str:
+    lines = [f"{'Kind':<8} {'Name':<52} {'Net KB':>10} {'Peak KB':>10} {'ms':>9}"]
+    for record in sorted(report["records"], key=lambda record: record["kind"] != "phase"):
+        lines.append(
+            f"{record['kind']:<8} {record['name'][:52]:<52} {record['net_bytes'] / 1024:>10.1f} "
+            f"{record['peak_above_start_bytes'] / 1024:>10.1f} {record['ms']:>9.1f}"
+        )
+    lines.append(f"Overall traced peak: {report['peak_bytes'] / 1024 / 1024:.2f} MB")
+    return "\n".join(lines)
+
+
+def compare_to_baseline(report: dict, baseline_path: Path, tolerance: float) -> list[str]:
+    baseline = json.loads(baseline_path.read_text())
+    previous = {(record["kind"], record["name"]): record for record in baseline["records"]}
+    regressions = []
+    checks = [(("total", "overall"), baseline["peak_bytes"], report["peak_bytes"])]
+    for record in report["records"]:
+        old = previous.get((record["kind"], record["name"]))
+        if old is not None:
+            checks.append(((record["kind"], record["name"]), old["peak_above_start_bytes"], record["peak_above_start_bytes"]))
+
+    for (kind, name), before, after in checks:
+        # Tiny sections fluctuate by a few KB between runs; only flag growth that matters.
+        if after > before * (1 + tolerance) and after - before > 64 * 1024:
+            regressions.append(f"{kind} {name}: peak {before / 1024:.1f} KB -> {after / 1024:.1f} KB")
+    return regressions
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--profile-memory", action="store_true", help="Trace allocations per section and render phase.")
+    parser.add_argument("--memory-sites", action="store_true", help="Also record the top allocation sites per phase.")
+    parser.add_argument("--memory-baseline", type=Path, help="Earlier .memory.json to compare peaks against.")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10, help="Allowed peak growth over the baseline.")
+
+
+def profiler_from_args(document: str, args: argparse.Namespace) -> MemoryProfiler:
+    profiler = MemoryProfiler(document, enabled=args.profile_memory or args.memory_baseline is not None, sites=args.memory_sites)
+    profiler.start()
+    return profiler
+
+
+def finish_profile(profiler: MemoryProfiler, pdf: Path, args: argparse.Namespace):
+    if not profiler.enabled:
+        return
+    report = profiler.write(profile_path(pdf))
+    print(format_table(report))
+    print(str(profile_path(pdf).resolve()))
+    if args.memory_baseline is None:
+        return
+    regressions = compare_to_baseline(report, args.memory_baseline, args.memory_tolerance)
+    for line in regressions:
+        print(f"memory regression: {line}")
+    if regressions:
+        raise SystemExit(1)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+from snapshot_archive import SnapshotArchive, append_targets, compact
+
+REGRESSION_DIR = Path("test/regression")
+ARCHIVE = Path("output/regression/snapshots.ddsnap")
+INCLUDE = ("*.txt", "*.json")
+# Share of the archive that may be superseded blobs and indexes before it is compacted.
+AUTO_COMPACT = 0.5
+
+
+def scan(root: Path, include: list[str]) -> dict[str, dict[str, Path]]:
+    targets = {}
+    for folder in sorted(path for path in root.iterdir() if path.is_dir()):
+        files = {
+            path.name: path
+            for path in sorted(folder.iterdir())
+            if path.is_file() and any(fnmatch.fnmatch(path.name, pattern) for pattern in include)
+        }
+        if files:
+            targets[folder.name] = files
+    return targets
+
+
+def unchanged(packed: dict[str, dict], files: dict[str, Path]) -> bool:
+    if packed.keys() != files.keys():
+        return False
+    for name, path in files.items():
+        stat = path.stat()
+        if packed[name].get("size") != stat.st_size or packed[name].get("mtime_ns") != stat.st_mtime_ns:
+            return False
+    return True
+
+
+def same_content(packed: dict[str, dict], files: dict[str, tuple[bytes, dict]]) -> bool:
+    return packed.keys() == files.keys() and all(
+        packed[name]["sha256"] == hashlib.sha256(content).hexdigest() for name, (content, _) in files.items()
+    )
+
+
+def pack(root: Path, archive_path: Path, include: list[str], prune: bool) -> dict[str, list[str]]:
+    found = scan(root, include)
+    existing: dict[str, dict] = {}
+    if archive_path.exists():
+        with SnapshotArchive(archive_path) as archive:
+            existing = {slug: archive.files(slug) for slug in archive.slugs()}
+
+    changes: dict[str, list[str]] = {"added": [], "updated": [], "unchanged": [], "removed": []}
+    targets = {}
+    for slug, files in found.items():
+        if slug in existing and unchanged(existing[slug], files):
+            changes["unchanged"].append(slug)
+            continue
+        targets[slug] = {
+            name: (path.read_bytes(), {"size": path.stat().st_size, "mtime_ns": path.stat().st_mtime_ns})
+            for name, path in files.items()
+        }
+        if slug not in existing:
+            changes["added"].append(slug)
+        elif same_content(existing[slug], targets[slug]):
+            # Only the mtimes moved (checkout, copy); the repack reuses every blob and refreshes the stats.
+            changes["unchanged"].append(slug)
+        else:
+            changes["updated"].append(slug)
+    if prune:
+        changes["removed"] = sorted(set(existing) - set(found))
+
+    if targets or changes["removed"] or not archive_path.exists():
+        append_targets(archive_path, targets, remove=set(changes["removed"]))
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack regression snapshots into one memory-mapped archive.")
+    parser.add_argument("--root", type=Path, default=REGRESSION_DIR, help="Folder of <slug>/ regression targets.")
+    parser.add_argument("--archive", type=Path, default=ARCHIVE)
+    parser.add_argument("--include", action="append", help=f"File name glob to pack (default: {', '.join(INCLUDE)}).")
+    parser.add_argument("--prune", action="store_true", help="Drop targets whose folder no longer exists.")
+    parser.add_argument("--compact", action="store_true", help="Rewrite the archive without superseded blobs.")
+    parser.add_argument("--list", action="store_true", help="List packed targets and scores instead of packing.")
+    parser.add_argument("--cat", nargs=2, metavar=("SLUG", "FILE"), help="Print one packed file.")
+    parser.add_argument("--extract", metavar="SLUG", help="Write one packed target back out as files.")
+    parser.add_argument("--to", type=Path, help="Destination folder for --extract (default: <root>/<slug>).")
+    args = parser.parse_args()
+
+    if args.cat or args.extract or args.list:
+        with SnapshotArchive(args.archive) as archive:
+            if args.cat:
+                sys.stdout.buffer.write(archive.read(*args.cat))
+                return
+            if args.extract:
+                destination = args.to or args.root / args.extract
+                destination.mkdir(parents=True, exist_ok=True)
+                for name in archive.files(args.extract):
+                    (destination / name).write_bytes(archive.read(args.extract, name))
+                print(str(destination.resolve()))
+                return
+            slugs, scores = archive.scores()
+            for row, slug in enumerate(slugs):
+                fidelity = "/".join(str(scores[name][row]) for name in ("visual_fidelity_1_to_5", "component_fidelity_1_to_5", "token_quality_1_to_5"))
+                print(f"{slug}: {len(archive.files(slug))} files, fidelity visual/component/token {fidelity}")
+            print(json.dumps(archive.stats()))
+        return
+
+    changes = pack(args.root, args.archive, args.include or list(INCLUDE), args.prune)
+    with SnapshotArchive(args.archive) as archive:
+        stats = archive.stats()
+    # Every append leaves the previous index behind, so rewrite once superseded bytes pass the threshold.
+    if args.compact or stats["dead_bytes"] > stats["bytes"] * AUTO_COMPACT:
+        compact(args.archive)
+        with SnapshotArchive(args.archive) as archive:
+            stats = archive.stats()
+    print(
+        f"{len(changes['added'])} added, {len(changes['updated'])} updated, {len(changes['unchanged'])} unchanged, "
+        f"{len(changes['removed'])} removed"
+    )
+    print(
+        f"{stats['targets']} targets, {stats['blobs']} unique blobs, {stats['raw_bytes']} bytes packed into "
+        f"{stats['bytes']} ({stats['dead_bytes']} superseded)"
+    )
+    print(str(args.archive.resolve()))
+
+
+if __name__ == "__main__":
+    main()
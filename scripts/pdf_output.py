@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import nullcontext
+from pathlib import Path
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+try:
+    import pikepdf
+except ImportError:
+    pikepdf = None
+
+FONT_DIR_ENV = "DDNA_PDF_FONT_DIR"
+
+BASE_FONTS = {
+    "regular": "Helvetica",
+    "bold": "Helvetica-Bold",
+    "italic": "Helvetica-Oblique",
+    "mono": "Courier",
+}
+
+# Static TTFs from the site's brand families (Manrope body text, Space Mono code).
+BRAND_FONT_FILES = {
+    "regular": ("Manrope-Regular.ttf",),
+    "bold": ("Manrope-Bold.ttf", "Manrope-SemiBold.ttf"),
+    "italic": ("Manrope-Regular.ttf",),
+    "mono": ("SpaceMono-Regular.ttf",),
+}
+
+
+def resolve_fonts(font_dir: Path | str | None = None) -> dict[str, str]:
+    font_dir = font_dir or os.environ.get(FONT_DIR_ENV)
+    fonts = dict(BASE_FONTS)
+    if not font_dir:
+        return fonts
+
+    for role, candidates in BRAND_FONT_FILES.items():
+        for filename in candidates:
+            path = Path(font_dir) / filename
+            if not path.exists():
+                continue
+            name = f"DDNA-{path.stem}"
+            if name not in pdfmetrics.getRegisteredFontNames():
+                pdfmetrics.registerFont(TTFont(name, str(path)))
+            fonts[role] = name
+            break
+    return fonts
+
+
+def object_digest(obj) -> str:
+    digest = hashlib.sha256()
+    if isinstance(obj, pikepdf.Stream):
+        for key in sorted(obj.keys()):
+            if key != "/Length":
+                digest.update(key.encode() + obj[key].unparse(resolved=False))
+        digest.update(obj.read_raw_bytes())
+    else:
+        digest.update(obj.unparse(resolved=False))
+    return digest.hexdigest()
+
+
+def dedupe_resources(pdf) -> int:
+    canonical: dict[str, object] = {}
+    replaced = 0
+    for page in pdf.pages:
+        resources = page.obj.get("/Resources")
+        if resources is None:
+            continue
+        for kind in ("/XObject", "/Font", "/ExtGState"):
+            table = resources.get(kind)
+            if table is None:
+                continue
+            for name in list(table.keys()):
+                obj = table[name]
+                if not obj.is_indirect:
+                    continue
+                key = object_digest(obj)
+                seen = canonical.setdefault(key, obj)
+                if seen.objgen != obj.objgen:
+                    table[name] = seen
+                    replaced += 1
+    return replaced
+
+
+def optimize_with_pikepdf(data: bytes, linearize: bool) -> tuple[bytes, dict]:
+    with pikepdf.open(io.BytesIO(data)) as pdf:
+        deduped = dedupe_resources(pdf)
+        out = io.BytesIO()
+        pdf.save(
+            out,
+            compress_streams=True,
+            recompress_flate=True,
+            stream_decode_level=pikepdf.StreamDecodeLevel.generalized,
+            object_stream_mode=pikepdf.ObjectStreamMode.generate,
+            linearize=linearize,
+        )
+    return out.getvalue(), {"tool": "pikepdf", "deduped_resources": deduped, "linearized": linearize}
+
+
+def optimize_with_qpdf(data: bytes, linearize: bool) -> tuple[bytes, dict]:
+    with tempfile.TemporaryDirectory() as workdir:
+        source = Path(workdir) / "in.pdf"
+        target = Path(workdir) / "out.pdf"
+        source.write_bytes(data)
+        command = [
+            "qpdf",
+            "--object-streams=generate",
+            "--recompress-flate",
+            "--compression-level=9",
+            str(source),
+            str(target),
+        ]
+        if linearize:
+            command.insert(1, "--linearize")
+        subprocess.run(command, check=True, capture_output=True)
+        return target.read_bytes(), {"tool": "qpdf", "deduped_resources": 0, "linearized": linearize}
+
+
+def optimize_pdf(data: bytes, linearize: bool = True) -> tuple[bytes, dict]:
+    if pikepdf is not None:
+        optimized, stats = optimize_with_pikepdf(data, linearize)
+    elif shutil.which("qpdf"):
+        optimized, stats = optimize_with_qpdf(data, linearize)
+    else:
+        return data, {"tool": None, "deduped_resources": 0, "linearized": False, "before": len(data), "after": len(data)}
+
+    stats.update({"before": len(data), "after": len(optimized)})
+    return optimized, stats
+
+
+def describe_optimization(stats: dict) -> str:
+    if stats["tool"] is None:
+        return "PDF optimization skipped: install pikepdf or qpdf to compress and linearize output."
+    saved = stats["before"] - stats["after"]
+    share = saved / stats["before"] if stats["before"] else 0
+    parts = [
+        f"PDF size {stats['before'] / 1024:.1f} KB -> {stats['after'] / 1024:.1f} KB ({share:.1%} smaller)",
+        f"via {stats['tool']}",
+    ]
+    if stats["deduped_resources"]:
+        parts.append(f"{stats['deduped_resources']} duplicate resources merged")
+    if stats["linearized"]:
+        parts.append("linearized for fast web view")
+    return ", ".join(parts)
+
+
+def write_pdf(render, out: Path, optimize: bool = True, linearize: bool = True, profiler=None) -> dict | None:
+    buffer = io.BytesIO()
+    render(buffer)
+    data = buffer.getvalue()
+    stats = None
+    if optimize:
+        with profiler.phase("optimization") if profiler else nullcontext():
+            data, stats = optimize_pdf(data, linearize)
+    out.write_bytes(data)
+    return stats
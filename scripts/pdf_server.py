@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import ast
+import hashlib
+import importlib
+import importlib.util
+import io
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import ModuleType
+
+ROOT = Path(__file__).resolve().parent.parent
+REPORTS_DIR = Path("output/reports")
+SCRIPTS_DIR = Path("scripts")
+RENDER_TIMEOUT_S = 120
+
+
+@dataclass(frozen=True)
+class Document:
+    route: str
+    source: Path
+    render: str
+    filename: str
+    reads_reports: bool
+
+
+DOCUMENTS = {
+    "system-map": Document(
+        route="/system-map.pdf",
+        source=Path("scripts/generate_system_map_pdf.py"),
+        render="render_system_map",
+        filename="designdna-system-map.pdf",
+        reads_reports=True,
+    ),
+    "summary": Document(
+        route="/summary.pdf",
+        source=Path("tmp/pdfs/generate_designdna_summary_pdf.py"),
+        render="render_summary",
+        filename="designdna-app-summary.pdf",
+        reads_reports=False,
+    ),
+}
+ROUTES = {document.route: name for name, document in DOCUMENTS.items()}
+
+_modules: dict[str, tuple[str, ModuleType]] = {}
+
+
+def digest_file(digest, path: Path):
+    digest.update(str(path).encode())
+    digest.update(b"\0")
+    digest.update(path.read_bytes())
+    digest.update(b"\0")
+
+
+def local_imports(source: Path) -> dict[str, Path]:
+    # Every module the generator pulls in from its own folder or scripts/, found by walking the imports.
+    found: dict[str, Path] = {}
+    pending = [source]
+    while pending:
+        path = pending.pop()
+        for node in ast.walk(ast.parse(path.read_bytes(), filename=str(path))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for module in (name.split(".")[0] for name in names):
+                if module in found:
+                    continue
+                for folder in (source.parent, SCRIPTS_DIR):
+                    candidate = folder / f"{module}.py"
+                    if candidate.is_file():
+                        found[module] = candidate
+                        pending.append(candidate)
+                        break
+    return dict(sorted(found.items()))
+
+
+def input_key(name: str) -> tuple[str, str, tuple[str, ...]]:
+    document = DOCUMENTS[name]
+    modules = local_imports(document.source)
+    code = hashlib.sha256(name.encode())
+    for path in (document.source, *modules.values()):
+        digest_file(code, path)
+    code_digest = code.hexdigest()
+    digest = hashlib.sha256(code_digest.encode())
+    if document.reads_reports:
+        for path in sorted(REPORTS_DIR.glob("*.json")):
+            digest_file(digest, path)
+    return digest.hexdigest(), code_digest, tuple(modules)
+
+
+def warm_worker():
+    import reportlab.platypus  # noqa: F401
+
+
+def render_document(name: str, code_digest: str, modules: tuple[str, ...], optimize: bool) -> bytes:
+    document = DOCUMENTS[name]
+    loaded = _modules.get(name)
+    if loaded is None or loaded[0] != code_digest:
+        # Drop the cached helper modules too, so the generator re-imports the edited copies.
+        for module in modules:
+            sys.modules.pop(module, None)
+        spec = importlib.util.spec_from_file_location(f"ddna_{name.replace('-', '_')}", document.source)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        loaded = _modules[name] = (code_digest, module)
+
+    buffer = io.BytesIO()
+    getattr(loaded[1], document.render)(buffer)
+    if not optimize:
+        return buffer.getvalue()
+    data, _ = importlib.import_module("pdf_output").optimize_pdf(buffer.getvalue())
+    return data
+
+
+class RenderCache:
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[str, bytes] = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: bytes):
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = value
+            self.size += len(value)
+            while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class PdfServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, executor: ProcessPoolExecutor, cache: RenderCache, optimize: bool):
+        super().__init__(address, PdfRequestHandler)
+        self.executor = executor
+        self.cache = cache
+        self.optimize = optimize
+        self.inflight: dict[str, Future] = {}
+        self.inflight_lock = threading.Lock()
+
+    def fetch(self, name: str, key: str, code_digest: str, modules: tuple[str, ...]) -> tuple[bytes, str]:
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, "hit"
+
+        with self.inflight_lock:
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self.executor.submit(render_document, name, code_digest, modules, self.optimize)
+                self.inflight[key] = future
+
+        try:
+            body = future.result(timeout=RENDER_TIMEOUT_S)
+        finally:
+            if owner:
+                with self.inflight_lock:
+                    self.inflight.pop(key, None)
+
+        if owner:
+            self.cache.put(key, body)
+        return body, "miss" if owner else "shared"
+
+
+class PdfRequestHandler(BaseHTTPRequestHandler):
+    server: PdfServer
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/healthz":
+            self.send_text(HTTPStatus.OK, "ok\n")
+            return
+
+        name = ROUTES.get(path)
+        if name is None:
+            self.send_text(HTTPStatus.NOT_FOUND, "not found\n")
+            return
+
+        key, code_digest, modules = input_key(name)
+        etag = f'"{key[:32]}"'
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return
+
+        started = time.perf_counter()
+        try:
+            body, cache_state = self.server.fetch(name, key, code_digest, modules)
+        except Exception as error:
+            self.send_text(HTTPStatus.INTERNAL_SERVER_ERROR, f"render failed: {error}\n")
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Content-Disposition", f'inline; filename="{DOCUMENTS[name].filename}"')
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Render-Cache", cache_state)
+        self.send_header("Server-Timing", f"render;dur={(time.perf_counter() - started) * 1000:.1f}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_text(self, status: HTTPStatus, text: str):
+        body = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the system map and summary PDFs from a long-lived render pool.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2, help="Render processes kept warm in the pool.")
+    parser.add_argument("--cache-entries", type=int, default=16, help="Maximum rendered PDFs kept in memory.")
+    parser.add_argument("--cache-mb", type=int, default=64, help="Maximum memory used by the render cache.")
+    parser.add_argument("--no-optimize", action="store_true", help="Serve raw ReportLab output without compression/linearization.")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    cache = RenderCache(args.cache_entries, args.cache_mb * 1024 * 1024)
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=warm_worker) as executor:
+        server = PdfServer((args.host, args.port), executor, cache, optimize=not args.no_optimize)
+        print(f"Serving {', '.join(ROUTES)} on http://{args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from snapshot_archive import SnapshotArchive
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+REGRESSION_DIR = Path("test/regression")
+ARCHIVE = Path("output/regression/snapshots.ddsnap")
+OUT = Path("output/reports/prompt-budget.json")
+CACHE = Path("output/cache/prompt-budget.json")
+CACHE_VERSION = 2
+PROMPT_SUFFIX = "stitchPrompt.txt"
+PERCENTILES = (50, 90, 99)
+TREND_REVISIONS = 20
+# Modified z-score (median/MAD) above which a target's prompt size is reported as an outlier.
+OUTLIER_Z = 3.5
+
+# Defaults from src/lib/openai-enhance.ts (LLM_MODEL fallback, max_tokens without starter HTML) and the
+# published gpt-4.1-mini per-token prices. Throughput figures are planning assumptions, not measurements.
+MODEL = "gpt-4.1-mini"
+ENCODING = "o200k_base"
+MAX_OUTPUT_TOKENS = 1800
+INPUT_USD_PER_MTOK = 0.40
+OUTPUT_USD_PER_MTOK = 1.60
+INPUT_TOKENS_PER_S = 2000.0
+OUTPUT_TOKENS_PER_S = 75.0
+
+HEADING_RE = re.compile(r"^([A-Z][^:\n]*?)(?:\s*\([^)\n]*\))?:\s*$")
+PREAMBLE = "(before first heading)"
+# Rough stand-in for BPE pre-tokenization when tiktoken is not installed.
+PIECE_RE = re.compile(r" ?[A-Za-z]+| ?\d{1,3}| ?[^\sA-Za-z\d]+|\s+")
+
+# Token counter for this process, built once by init_worker; loading a tiktoken encoding is not free.
+_count = None
+
+
+def make_counter():
+    if tiktoken is not None:
+        encoding = tiktoken.get_encoding(ENCODING)
+        return f"tiktoken {ENCODING}", lambda text: len(encoding.encode(text, disallowed_special=()))
+    return "estimate", estimate_tokens
+
+
+def init_worker():
+    global _count
+    _, _count = make_counter()
+
+
+def estimate_tokens(text: str) -> int:
+    tokens = 0
+    for piece in PIECE_RE.findall(text):
+        core = piece.lstrip(" ")
+        if not core:
+            tokens += 1
+        elif core.isspace():
+            tokens += 1 if "\n" in core or len(core) > 1 else 0
+        elif core[0].isalpha():
+            tokens += math.ceil(len(core) / 6)
+        elif core[0].isdigit():
+            tokens += 1
+        else:
+            tokens += math.ceil(len(core) / 2)
+    return tokens
+
+
+def git_blob_hash(data: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def split_sections(text: str) -> list[tuple[str, str]]:
+    sections: list[tuple[str, list[str]]] = [(PREAMBLE, [])]
+    for line in text.splitlines(keepends=True):
+        match = HEADING_RE.match(line)
+        if match:
+            sections.append((match.group(1).strip(), []))
+        sections[-1][1].append(line)
+    # Keep blank lines before the first heading too, so the sections always add up to the whole prompt.
+    return [(name, "".join(lines)) for name, lines in sections if lines]
+
+
+def measure(data: bytes) -> dict:
+    if _count is None:
+        init_worker()
+    count = _count
+    text = data.decode("utf-8", errors="replace")
+    sections: dict[str, int] = {}
+    for name, body in split_sections(text):
+        sections[name] = sections.get(name, 0) + count(body)
+    # Sections split on line boundaries, where BPE tokens do not cross, so the sum is the prompt total.
+    return {"tokens": sum(sections.values()), "chars": len(text), "lines": text.count("\n") + 1, "sections": sections}
+
+
+def current_prompts(root: Path, archive_path: Path | None) -> tuple[str, dict[str, bytes]]:
+    prompts = {}
+    if archive_path and archive_path.exists():
+        with SnapshotArchive(archive_path) as archive:
+            for slug in archive.slugs():
+                for name in archive.files(slug):
+                    if name.endswith(PROMPT_SUFFIX):
+                        prompts[slug] = archive.read(slug, name)
+        return archive_path.as_posix(), prompts
+    for path in sorted(root.glob(f"*/*{PROMPT_SUFFIX}")):
+        prompts[path.parent.name] = path.read_bytes()
+    return root.as_posix(), prompts
+
+
+def git(*args: str) -> str:
+    return subprocess.run(["git", *args], check=True, capture_output=True, text=True).stdout
+
+
+def revision_prompts(root: Path, limit: int) -> list[tuple[str, str, dict[str, str]]]:
+    revisions = []
+    # Only commits that changed a prompt file, so every trend point is a real before/after pair.
+    for line in git("log", f"-n{limit}", "--format=%H%x09%cI", "--", f"{root.as_posix()}/*{PROMPT_SUFFIX}").splitlines():
+        sha, date = line.split("\t")
+        blobs = {}
+        for entry in git("ls-tree", "-r", "-z", sha, "--", root.as_posix()).split("\0"):
+            if not entry:
+                continue
+            meta, path = entry.split("\t", 1)
+            if path.endswith(PROMPT_SUFFIX):
+                blobs[Path(path).parent.name] = meta.split()[2]
+        revisions.append((sha, date, blobs))
+    return revisions
+
+
+def read_blobs(shas: list[str]) -> dict[str, bytes]:
+    if not shas:
+        return {}
+    output = subprocess.run(
+        ["git", "cat-file", "--batch"], input="\n".join(shas).encode() + b"\n", check=True, capture_output=True
+    ).stdout
+    blobs = {}
+    offset = 0
+    for sha in shas:
+        header_end = output.index(b"\n", offset)
+        _, _, size = output[offset:header_end].split()
+        start = header_end + 1
+        blobs[sha] = output[start : start + int(size)]
+        offset = start + int(size) + 1
+    return blobs
+
+
+def distribution(values: list[int]) -> dict:
+    array = np.asarray(values, dtype=np.float64)
+    if not array.size:
+        return {"count": 0}
+    summary = {"count": int(array.size), "mean": round(float(array.mean()), 1), "min": int(array.min()), "max": int(array.max())}
+    for pct, value in zip(PERCENTILES, np.percentile(array, PERCENTILES)):
+        summary[f"p{pct}"] = round(float(value), 1)
+    return summary
+
+
+def outliers(targets: list[dict]) -> list[dict]:
+    tokens = np.asarray([target["tokens"] for target in targets], dtype=np.float64)
+    if tokens.size < 3:
+        return []
+    median = np.median(tokens)
+    mad = np.median(np.abs(tokens - median))
+    if mad:
+        scores = 0.6745 * (tokens - median) / mad
+    else:
+        # More than half the prompts are the same size; fall back to the mean absolute deviation.
+        mean_ad = np.mean(np.abs(tokens - median))
+        if not mean_ad:
+            return []
+        scores = (tokens - median) / (1.253314 * mean_ad)
+    flagged = [
+        {"slug": target["slug"], "tokens": target["tokens"], "z": round(float(score), 2)}
+        for target, score in zip(targets, scores)
+        if abs(score) > OUTLIER_Z
+    ]
+    return sorted(flagged, key=lambda entry: -abs(entry["z"]))
+
+
+def cost_model(tokens: float, args) -> dict:
+    # The deterministic prompt goes out in the request payload and the refined prompt comes back in the
+    # response, so its size is paid once as input and roughly once again as output.
+    input_usd = tokens * args.input_price / 1e6
+    output_usd = tokens * args.output_price / 1e6
+    return {
+        "tokens": round(tokens, 1),
+        "input_usd": round(input_usd, 6),
+        "output_usd": round(output_usd, 6),
+        "usd_per_1000": round((input_usd + output_usd) * 1000, 4),
+        "prefill_s": round(tokens / args.input_tps, 3),
+        "generation_s": round(tokens / args.output_tps, 2),
+        "max_tokens_share": round(tokens / args.max_output_tokens, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token budget of stitchPrompt.txt across regression targets.")
+    parser.add_argument("--root", type=Path, default=REGRESSION_DIR, help="Folder of <slug>/ regression targets.")
+    parser.add_argument("--archive", type=Path, default=ARCHIVE, help="Packed snapshot archive, read when present.")
+    parser.add_argument("--no-archive", action="store_true", help="Read prompt files even if an archive exists.")
+    parser.add_argument("--revisions", type=int, default=TREND_REVISIONS, help="Commits touching --root to trend (0 to skip).")
+    parser.add_argument("--input-price", type=float, default=INPUT_USD_PER_MTOK, help="USD per million input tokens.")
+    parser.add_argument("--output-price", type=float, default=OUTPUT_USD_PER_MTOK, help="USD per million output tokens.")
+    parser.add_argument("--input-tps", type=float, default=INPUT_TOKENS_PER_S, help="Assumed prompt processing tokens/s.")
+    parser.add_argument("--output-tps", type=float, default=OUTPUT_TOKENS_PER_S, help="Assumed generation tokens/s.")
+    parser.add_argument("--max-output-tokens", type=int, default=MAX_OUTPUT_TOKENS)
+    parser.add_argument("--model", default=MODEL, help="Model name recorded with the prices.")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 2, help="Worker processes for uncached prompts.")
+    parser.add_argument("--cache", type=Path, default=CACHE)
+    parser.add_argument("--out", type=Path, default=OUT, help="Where to write the JSON report.")
+    args = parser.parse_args()
+
+    tokenizer, _ = make_counter()
+    cache = json.loads(args.cache.read_text()) if args.cache.exists() else {}
+    if cache.get("version") != CACHE_VERSION or cache.get("tokenizer") != tokenizer:
+        cache = {"version": CACHE_VERSION, "tokenizer": tokenizer, "files": {}}
+    files = cache["files"]
+
+    source, prompts = current_prompts(args.root, None if args.no_archive else args.archive)
+    blobs = {slug: git_blob_hash(data) for slug, data in prompts.items()}
+    pending = {blob: prompts[slug] for slug, blob in blobs.items() if blob not in files}
+
+    revisions = []
+    if args.revisions > 0:
+        try:
+            revisions = revision_prompts(args.root, args.revisions)
+        except (OSError, subprocess.CalledProcessError):
+            revisions = []
+        history = {blob for _, _, tree in revisions for blob in tree.values()} - files.keys() - pending.keys()
+        pending.update(read_blobs(sorted(history)))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=max(1, args.jobs), initializer=init_worker) as executor:
+            chunksize = max(1, len(pending) // (args.jobs * 4))
+            for blob, result in zip(pending, executor.map(measure, pending.values(), chunksize=chunksize)):
+                files[blob] = result
+
+    targets = [{"slug": slug, "blob": blobs[slug], **files[blobs[slug]]} for slug in sorted(prompts)]
+    trend = [
+        {"revision": sha, "date": date, **distribution([files[blob]["tokens"] for blob in tree.values()])}
+        for sha, date, tree in reversed(revisions)
+    ]
+
+    live = set(blobs.values()) | {blob for _, _, tree in revisions for blob in tree.values()}
+    cache["files"] = {blob: entry for blob, entry in files.items() if blob in live}
+    args.cache.parent.mkdir(parents=True, exist_ok=True)
+    args.cache.write_text(json.dumps(cache, separators=(",", ":")))
+
+    names: list[str] = []
+    for target in targets:
+        names.extend(name for name in target["sections"] if name not in names)
+    total_tokens = sum(target["tokens"] for target in targets) or 1
+    sections = [
+        {
+            "name": name,
+            "present_in": sum(1 for target in targets if name in target["sections"]),
+            "share": round(sum(target["sections"].get(name, 0) for target in targets) / total_tokens, 4),
+            **distribution([target["sections"][name] for target in targets if name in target["sections"]]),
+        }
+        for name in names
+    ]
+    totals = distribution([target["tokens"] for target in targets])
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "source": source,
+        "tokenizer": tokenizer,
+        "percentiles": list(PERCENTILES),
+        "totals": totals,
+        "sections": sections,
+        "outliers": outliers(targets),
+        "targets": [{key: value for key, value in target.items() if key != "blob"} for target in targets],
+        "trend": trend,
+        "cost": {
+            "model": args.model,
+            "input_usd_per_mtok": args.input_price,
+            "output_usd_per_mtok": args.output_price,
+            "input_tokens_per_s": args.input_tps,
+            "output_tokens_per_s": args.output_tps,
+            "max_output_tokens": args.max_output_tokens,
+            "median": cost_model(totals.get("p50", 0), args),
+            "p90": cost_model(totals.get("p90", 0), args),
+            "max": cost_model(totals.get("max", 0), args),
+        },
+        "measured": len(pending),
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2) + "\n")
+
+    print(f"{len(targets)} prompts from {source} ({tokenizer}), {len(pending)} measured, {len(cache['files']) - len(pending)} from cache")
+    if targets:
+        print(f"Tokens per prompt: p50 {totals['p50']:.0f}, p90 {totals['p90']:.0f}, max {totals['max']}")
+    for section in sorted(sections, key=lambda entry: -entry["share"])[:5]:
+        print(f"  {section['name']}: {section['share']:.0%} of tokens, p50 {section['p50']:.0f}")
+    if trend:
+        print(f"Trend over {len(trend)} revisions: {trend[0].get('mean', 0):.0f} -> {trend[-1].get('mean', 0):.0f} mean tokens")
+    print(str(args.out.resolve()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import math
+import random
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+OUT = Path("output/reports/queue-capacity.json")
+
+QUEUE_KEY = "designdna:extraction_jobs"
+POLL_INTERVAL_MS = 2000
+
+ARRIVAL = 0
+WORKER_WAKE = 1
+
+
+class MemoryRedis:
+    def __init__(self):
+        self.lists: dict[str, deque[str]] = {}
+
+    def rpush(self, key: str, value: str) -> int:
+        items = self.lists.setdefault(key, deque())
+        items.append(value)
+        return len(items)
+
+    def lpop(self, key: str) -> str | None:
+        items = self.lists.get(key)
+        if not items:
+            return None
+        return items.popleft()
+
+    def llen(self, key: str) -> int:
+        return len(self.lists.get(key, ()))
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def simulate(
+    arrivals_per_min: float,
+    workers: int,
+    horizon_min: float,
+    capture_median_ms: float,
+    capture_sigma: float,
+    poll_interval_ms: float,
+    seed: int,
+) -> dict:
+    rng = random.Random(seed)
+    redis = MemoryRedis()
+    horizon_ms = horizon_min * 60_000
+    mean_gap_ms = 60_000 / arrivals_per_min
+    mu = math.log(capture_median_ms)
+
+    events: list[tuple[float, int, int, int]] = []
+    sequence = 0
+
+    def schedule(at: float, kind: int, worker: int = -1):
+        nonlocal sequence
+        heapq.heappush(events, (at, sequence, kind, worker))
+        sequence += 1
+
+    schedule(rng.expovariate(1 / mean_gap_ms), ARRIVAL)
+    for worker in range(workers):
+        schedule(rng.uniform(0, poll_interval_ms), WORKER_WAKE, worker)
+
+    waits: list[float] = []
+    busy_ms = 0.0
+    completed = 0
+    submitted = 0
+    idle_polls = 0
+
+    while events:
+        now, _, kind, worker = heapq.heappop(events)
+        if now > horizon_ms:
+            break
+
+        if kind == ARRIVAL:
+            redis.rpush(QUEUE_KEY, json.dumps({"extractionId": f"job-{submitted}", "enqueuedAt": now}))
+            submitted += 1
+            schedule(now + rng.expovariate(1 / mean_gap_ms), ARRIVAL)
+            continue
+
+        payload = redis.lpop(QUEUE_KEY)
+        if payload is None:
+            idle_polls += 1
+            schedule(now + poll_interval_ms, WORKER_WAKE, worker)
+            continue
+
+        job = json.loads(payload)
+        duration = rng.lognormvariate(mu, capture_sigma)
+        waits.append(now - job["enqueuedAt"])
+        busy_ms += min(duration, horizon_ms - now)
+        if now + duration <= horizon_ms:
+            completed += 1
+        schedule(now + duration, WORKER_WAKE, worker)
+
+    waits.sort()
+    return {
+        "arrivals_per_min": arrivals_per_min,
+        "workers": workers,
+        "submitted": submitted,
+        "started": len(waits),
+        "completed": completed,
+        "backlog_at_end": redis.llen(QUEUE_KEY),
+        "throughput_per_min": round(completed / horizon_min, 2),
+        "utilization": round(busy_ms / (workers * horizon_ms), 3),
+        "idle_polls": idle_polls,
+        "wait_p50_s": round(percentile(waits, 50) / 1000, 2),
+        "wait_p95_s": round(percentile(waits, 95) / 1000, 2),
+        "wait_max_s": round(waits[-1] / 1000, 2) if waits else 0.0,
+    }
+
+
+def parse_list(raw: str, cast) -> list:
+    return [cast(item) for item in raw.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the Redis extraction queue and worker polling loop.")
+    parser.add_argument("--arrivals", default="1,2,4,6,8,12", help="Comma-separated job arrival rates per minute.")
+    parser.add_argument("--workers", default="1,2,3,4", help="Comma-separated worker counts to compare.")
+    parser.add_argument("--horizon-min", type=float, default=240, help="Simulated minutes per scenario.")
+    parser.add_argument("--capture-median-ms", type=float, default=9000, help="Median capture duration per job.")
+    parser.add_argument("--capture-sigma", type=float, default=0.45, help="Lognormal sigma of capture duration.")
+    parser.add_argument("--poll-interval-ms", type=float, default=POLL_INTERVAL_MS, help="Worker sleep when the queue is empty.")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", type=Path, default=OUT, help="Where to write the JSON report.")
+    args = parser.parse_args()
+
+    arrivals = parse_list(args.arrivals, float)
+    workers = parse_list(args.workers, int)
+    scenarios = [
+        simulate(
+            rate,
+            count,
+            args.horizon_min,
+            args.capture_median_ms,
+            args.capture_sigma,
+            args.poll_interval_ms,
+            args.seed,
+        )
+        for count in workers
+        for rate in arrivals
+    ]
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "parameters": {
+            "horizon_min": args.horizon_min,
+            "capture_median_ms": args.capture_median_ms,
+            "capture_sigma": args.capture_sigma,
+            "poll_interval_ms": args.poll_interval_ms,
+            "seed": args.seed,
+        },
+        "arrivals_per_min": arrivals,
+        "workers": workers,
+        "scenarios": scenarios,
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2) + "\n")
+    print(str(args.out.resolve()))
+
+
+if __name__ == "__main__":
+    main()
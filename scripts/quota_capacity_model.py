@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+OUT = Path("output/reports/quota-capacity.json")
+
+RATE_WINDOW_S = 60
+RATE_MAX_PER_WINDOW = 8
+ANONYMOUS_LIFETIME_LIMIT = 1
+TOPUP_ANALYSES = 40
+
+PLANS = ("ANONYMOUS", "FREE", "PRO_ACTIVE", "PRO_CANCELED_GRACE")
+PLAN_LIMITS = np.array([ANONYMOUS_LIFETIME_LIMIT, 10, 100, 100], dtype=np.int64)
+
+ALLOWED = 0
+RATE_LIMITED = 1
+GUEST_LIMIT = 2
+MONTHLY_LIMIT = 3
+OUTCOMES = ("allowed", "rate_limited", "guest_limit", "monthly_limit")
+
+
+JSONL_CHUNK_LINES = 100_000
+
+
+def trace_columns(stamps: np.ndarray, identifiers: np.ndarray, plans: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    try:
+        ts = stamps.astype(np.float64)
+    except ValueError:
+        # ISO 8601: NumPy parses UTC stamps directly once the zone marker is gone.
+        utc = np.char.replace(np.char.replace(stamps, "Z", ""), "+00:00", "")
+        try:
+            ts = utc.astype("datetime64[us]").astype(np.int64) / 1e6
+        except ValueError:
+            ts = np.fromiter((datetime.fromisoformat(str(raw).replace("Z", "+00:00")).timestamp() for raw in stamps), np.float64, stamps.size)
+
+    _, actor = np.unique(identifiers, return_inverse=True)
+    names, plan_index = np.unique(plans, return_inverse=True)
+    names = np.where(names == "", "ANONYMOUS", names)
+    unknown = sorted(set(names.tolist()) - set(PLANS))
+    if unknown:
+        raise ValueError(f"Unknown plan in trace: {', '.join(unknown)}")
+    codes = np.array([PLANS.index(name) for name in names.tolist()], dtype=np.int8)
+    return ts, actor.astype(np.int64), codes[plan_index]
+
+
+def load_trace(path: Path) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    if path.suffix == ".npz":
+        data = np.load(path)
+        return data["ts"].astype(np.float64), data["actor"].astype(np.int64), data["plan"].astype(np.int8)
+
+    if path.suffix == ".jsonl":
+        # JSON still has to be decoded row by row; use CSV or .npz (--save-trace) for large traces.
+        stamps, identifiers, plans = [], [], []
+        with path.open("r", encoding="utf-8") as handle:
+            while True:
+                lines = [line for line in islice(handle, JSONL_CHUNK_LINES) if line.strip()]
+                if not lines:
+                    break
+                rows = json.loads("[" + ",".join(lines) + "]")
+                stamps.append(np.array([row["timestamp"] for row in rows], dtype=str))
+                identifiers.append(np.array([row["identifier"] for row in rows], dtype=str))
+                plans.append(np.array([row.get("plan") or "" for row in rows], dtype=str))
+        if not stamps:
+            return np.zeros(0), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int8)
+        return trace_columns(np.concatenate(stamps), np.concatenate(identifiers), np.concatenate(plans))
+
+    with path.open("r", encoding="utf-8", newline="") as handle:
+        header = [name.strip() for name in next(csv.reader(handle), [])]
+    missing = {"timestamp", "identifier"} - set(header)
+    if missing:
+        raise ValueError(f"Trace {path} is missing column(s): {', '.join(sorted(missing))}")
+    # np.loadtxt parses in C, so CSV traces load without a per-row Python loop.
+    table = np.loadtxt(path, delimiter=",", quotechar='"', dtype=str, skiprows=1, ndmin=2, encoding="utf-8")
+    if table.shape[0] == 0:
+        return np.zeros(0), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int8)
+    plans = table[:, header.index("plan")] if "plan" in header else np.full(table.shape[0], "", dtype=str)
+    return trace_columns(table[:, header.index("timestamp")], table[:, header.index("identifier")], plans)
+
+
+def synthetic_trace(users: dict[str, int], days: int, seed: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    mean_sessions = {"ANONYMOUS": 1.2, "FREE": 4.0, "PRO_ACTIVE": 14.0, "PRO_CANCELED_GRACE": 6.0}
+    actor_plan = np.concatenate([np.full(count, PLANS.index(name), dtype=np.int8) for name, count in users.items()])
+    actor_ids = np.arange(actor_plan.size, dtype=np.int64)
+
+    plan_sessions = np.array([mean_sessions[name] for name in PLANS]) * days / 30
+    sessions_per_actor = rng.poisson(plan_sessions[actor_plan]) + 1
+    session_actor = np.repeat(actor_ids, sessions_per_actor)
+    session_start = rng.uniform(0, days * 86_400, session_actor.size)
+    session_size = rng.geometric(0.3, session_actor.size)
+
+    request_session = np.repeat(np.arange(session_actor.size), session_size)
+    gaps = rng.exponential(9.0, request_session.size)
+    first = np.r_[0, np.cumsum(session_size)[:-1]]
+    offsets = np.cumsum(gaps) - np.repeat(np.cumsum(gaps)[first] - gaps[first], session_size)
+
+    actor = session_actor[request_session]
+    ts = session_start[request_session] + offsets
+    return ts, actor, actor_plan[actor]
+
+
+def fixed_window_allowed(ts: np.ndarray, actor: np.ndarray) -> np.ndarray:
+    n = ts.size
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+
+    span = float(ts.max() - ts.min()) + 2 * RATE_WINDOW_S
+    key = actor.astype(np.float64) * span + (ts - ts.min())
+    actor_end = np.r_[np.flatnonzero(np.diff(actor)) + 1, n]
+    heads = np.r_[0, actor_end[:-1]]
+
+    is_start = np.zeros(n, dtype=bool)
+    frontier = heads
+    limits = actor_end
+    while frontier.size:
+        is_start[frontier] = True
+        nxt = np.searchsorted(key, key[frontier] + RATE_WINDOW_S, side="left")
+        keep = nxt < limits
+        frontier = nxt[keep]
+        limits = limits[keep]
+
+    start_index = np.maximum.accumulate(np.where(is_start, np.arange(n), 0))
+    return (np.arange(n) - start_index + 1) <= RATE_MAX_PER_WINDOW
+
+
+def rank_within(groups: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    counts = np.zeros(groups.size, dtype=np.int64)
+    if not mask.any():
+        return counts
+    selected = groups[mask]
+    running = np.arange(1, selected.size + 1)
+    boundaries = np.r_[True, selected[1:] != selected[:-1]]
+    group_base = np.maximum.accumulate(np.where(boundaries, running - 1, 0))
+    counts[mask] = running - group_base
+    return counts
+
+
+def simulate(
+    ts: np.ndarray,
+    actor: np.ndarray,
+    plan: np.ndarray,
+    topup_rate: float,
+    max_topups: int,
+    seed: int,
+) -> dict:
+    order = np.lexsort((ts, actor))
+    ts, actor, plan = ts[order], actor[order], plan[order]
+    outcome = np.full(ts.size, ALLOWED, dtype=np.int8)
+
+    rate_ok = fixed_window_allowed(ts, actor)
+    outcome[~rate_ok] = RATE_LIMITED
+
+    guest = rate_ok & (plan == 0)
+    guest_rank = rank_within(actor, guest)
+    outcome[guest & (guest_rank > ANONYMOUS_LIFETIME_LIMIT)] = GUEST_LIMIT
+
+    month = (ts // 86_400).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    member = rate_ok & (plan > 0)
+    boundaries = np.r_[True, (np.diff(actor) != 0) | (np.diff(month) != 0)] if ts.size else np.zeros(0, dtype=bool)
+    user_month = np.cumsum(boundaries) - 1
+    member_rank = rank_within(user_month, member)
+
+    groups = int(boundaries.sum())
+    rng = np.random.default_rng(seed)
+    buys = (rng.random(groups) < topup_rate) * max_topups
+    base_limit = np.zeros(groups, dtype=np.int64)
+    np.maximum.at(base_limit, user_month, PLAN_LIMITS[plan])
+    capacity = base_limit + buys * TOPUP_ANALYSES
+
+    over = member & (member_rank > capacity[user_month])
+    outcome[over] = MONTHLY_LIMIT
+
+    demand = np.bincount(user_month[member], minlength=groups)
+    exhausted = demand > base_limit
+    topups_used = np.minimum(buys, np.ceil(np.maximum(demand - base_limit, 0) / TOPUP_ANALYSES)).astype(np.int64)
+    group_plan = np.zeros(groups, dtype=np.int8)
+    group_plan[user_month] = plan
+
+    per_plan = []
+    for code, name in enumerate(PLANS):
+        rows = plan == code
+        if not rows.any():
+            continue
+        counts = np.bincount(outcome[rows], minlength=len(OUTCOMES))
+        entry = {
+            "plan": name,
+            "requests": int(rows.sum()),
+            "actors": int(np.unique(actor[rows]).size),
+            **{label: int(count) for label, count in zip(OUTCOMES, counts)},
+            "rejection_rate": round(float(1 - counts[ALLOWED] / rows.sum()), 4),
+        }
+        if code > 0:
+            in_plan = group_plan == code
+            entry["user_months"] = int(in_plan.sum())
+            entry["exhausted_user_months"] = int((exhausted & in_plan).sum())
+            entry["exhaustion_rate"] = round(float((exhausted & in_plan).sum() / max(in_plan.sum(), 1)), 4)
+            entry["topups_used"] = int(topups_used[in_plan].sum())
+        per_plan.append(entry)
+
+    counts = np.bincount(outcome, minlength=len(OUTCOMES))
+    return {
+        "requests": int(ts.size),
+        "actors": int(np.unique(actor).size),
+        "span_days": round(float((ts.max() - ts.min()) / 86_400), 1) if ts.size else 0.0,
+        "outcomes": {label: int(count) for label, count in zip(OUTCOMES, counts)},
+        "rejection_rate": round(float(1 - counts[ALLOWED] / max(ts.size, 1)), 4),
+        "plans": per_plan,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a request trace against analyze rate limits and plan quotas.")
+    parser.add_argument("--trace", type=Path, help="Recorded trace (.csv/.jsonl with timestamp,identifier,plan or .npz).")
+    parser.add_argument("--users", default="ANONYMOUS=20000,FREE=8000,PRO_ACTIVE=1500,PRO_CANCELED_GRACE=200")
+    parser.add_argument("--days", type=int, default=30, help="Synthetic trace length in days.")
+    parser.add_argument("--topup-rate", type=float, default=0.25, help="Share of exhausted user-months that buy topups.")
+    parser.add_argument("--max-topups", type=int, default=1, help="Topups bought per purchasing user-month.")
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--save-trace", type=Path, help="Write the synthetic trace to .npz for later replays.")
+    parser.add_argument("--out", type=Path, default=OUT, help="Where to write the JSON report.")
+    args = parser.parse_args()
+
+    if args.trace:
+        ts, actor, plan = load_trace(args.trace)
+        source = str(args.trace)
+    else:
+        users = {name: int(count) for name, count in (item.split("=") for item in args.users.split(","))}
+        ts, actor, plan = synthetic_trace(users, args.days, args.seed)
+        source = f"synthetic ({args.users}, {args.days} days, seed {args.seed})"
+        if args.save_trace:
+            args.save_trace.parent.mkdir(parents=True, exist_ok=True)
+            np.savez_compressed(args.save_trace, ts=ts, actor=actor, plan=plan)
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "source": source,
+        "rules": {
+            "rate_window_s": RATE_WINDOW_S,
+            "rate_max_per_window": RATE_MAX_PER_WINDOW,
+            "anonymous_lifetime_limit": ANONYMOUS_LIFETIME_LIMIT,
+            "monthly_limits": {name: int(limit) for name, limit in zip(PLANS[1:], PLAN_LIMITS[1:])},
+            "topup_analyses": TOPUP_ANALYSES,
+            "topup_rate": args.topup_rate,
+            "max_topups": args.max_topups,
+        },
+        **simulate(ts, actor, plan, args.topup_rate, args.max_topups, args.seed),
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"{report['requests']} requests, rejection rate {report['rejection_rate']:.2%}")
+    print(str(args.out.resolve()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import importlib
+import os
+import re
+import time
+import traceback
+from html import escape
+from pathlib import Path
+
+import system_map_content as content
+
+ROOT = Path(__file__).resolve().parent.parent
+OUT_DIR = Path("output/preview")
+NAME = "designdna-system-map"
+WATCH_INTERVAL_S = 0.5
+MD_SPECIAL_RE = re.compile(r"([\\`*_\[\]<>|])")
+
+CSS = """
+body { font: 14px/1.45 -apple-system, "Helvetica Neue", Helvetica, Arial, sans-serif; color: #1f2937; max-width: 8.5in; margin: 2rem auto; padding: 0 1rem; }
+h1 { color: #0f172a; font-size: 2rem; margin-bottom: 0.3rem; }
+h2 { color: #0f172a; margin-top: 2rem; border-top: 1px solid #cbd5e1; padding-top: 1rem; }
+h3 { color: #1e293b; }
+.subtitle { color: #334155; margin: 0.2rem 0; }
+.change { display: inline-block; background: #fef3c7; color: #92400e; padding: 0 0.4rem; }
+pre { background: #f8fafc; border: 1px solid #e2e8f0; padding: 0.5rem; white-space: pre-wrap; font-size: 12px; }
+table { border-collapse: collapse; margin: 0.5rem 0 1rem; font-size: 12px; table-layout: fixed; }
+th, td { border: 1px solid #cbd5e1; padding: 4px 5px; text-align: left; vertical-align: top; overflow-wrap: anywhere; }
+th { background: #e2e8f0; color: #0f172a; }
+tr:nth-child(odd) td { background: #f8fafc; }
+.flow { list-style: none; padding: 0; display: flex; flex-wrap: wrap; gap: 6px 0; }
+.flow li { border: 1px solid #94a3b8; background: #f1f5f9; padding: 3px 8px; font-size: 12px; }
+.flow li + li::before { content: "\\2192"; margin: 0 6px 0 -2px; color: #3b82f6; }
+.bar { display: inline-block; height: 0.7em; background: #3b82f6; margin-right: 6px; }
+figcaption { color: #475569; font-size: 12px; }
+"""
+
+
+def slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def seconds(value: float | None) -> str:
+    return "-" if value is None else f"{value / 1000:.2f} s"
+
+
+def chain_steps(spec: str | list[str]) -> list[str]:
+    if not isinstance(spec, str):
+        return list(spec)
+    return [step.strip() for step in spec.split("->") if step.strip()]
+
+
+def figure_table(figure: content.Figure) -> tuple[str, list[list[str]], list[float]]:
+    data = figure.data
+    if figure.kind == "percentile":
+        percentiles = data["percentiles"]
+        rows = [["Step"] + [f"p{pct}" for pct in percentiles]]
+        rows.extend([entry["label"]] + [seconds(entry.get(f"p{pct}")) for pct in percentiles] for entry in data["entries"])
+        return "Step latency percentiles", rows, [entry.get(f"p{percentiles[-1]}") or 0 for entry in data["entries"]]
+    if figure.kind == "histogram":
+        rows = [["Bin start", "Responses"]]
+        rows.extend([f"{edge / 1000:.1f} s", str(count)] for edge, count in zip(data["edges"], data["counts"]))
+        return "Total pipeline latency distribution", rows, list(data["counts"])
+    if figure.kind == "wait_curve":
+        report = data["report"]
+        rows = [["Workers"] + [f"{rate:g}/min" for rate in report["arrivals_per_min"]]]
+        by_key = {(scenario["workers"], scenario["arrivals_per_min"]): scenario for scenario in report["scenarios"]}
+        for workers in report["workers"]:
+            rows.append(
+                [str(workers)]
+                + [f"{min(by_key[(workers, rate)]['wait_p95_s'], content.WAIT_CHART_CAP_S):.1f} s" for rate in report["arrivals_per_min"]]
+            )
+        return "p95 queue wait by arrival rate", rows, []
+    if figure.kind == "throughput_curve":
+        report = data["report"]
+        rows = [["Workers"] + [f"{rate:g}/min" for rate in report["arrivals_per_min"]]]
+        by_key = {(scenario["workers"], scenario["arrivals_per_min"]): scenario for scenario in report["scenarios"]}
+        for workers in report["workers"]:
+            rows.append([str(workers)] + [f"{by_key[(workers, rate)]['throughput_per_min']:g}/min" for rate in report["arrivals_per_min"]])
+        return "Completed jobs per minute by arrival rate", rows, []
+    if figure.kind == "module_graph":
+        targets: dict[str, list[str]] = {node: [] for node in data["nodes"]}
+        for source, target in data["edges"]:
+            targets[source].append(target)
+        highlight = data.get("highlight") or set()
+        rows = [["Module", "Imports"]]
+        rows.extend(
+            [f"{node} (orchestrator)" if node in highlight else node, ", ".join(targets[node]) or "-"] for node in data["nodes"]
+        )
+        return f"Module graph: {len(data['nodes'])} modules, {len(data['edges'])} edges", rows, []
+    raise ValueError(f"Unsupported figure: {figure.kind}")
+
+
+def html_table(rows: list[list[str]], widths: list[float] | None = None, bars: list[float] | None = None) -> str:
+    parts = ["<table>"]
+    if widths:
+        parts.append("<colgroup>" + "".join(f'<col style="width:{width / content.inch:.2f}in">' for width in widths) + "</colgroup>")
+    peak = max(bars or [0]) or 1
+    for idx, row in enumerate(rows):
+        tag = "th" if idx == 0 else "td"
+        cells = [escape(cell) for cell in row]
+        if bars and idx > 0:
+            cells[-1] = f'<span class="bar" style="width:{bars[idx - 1] / peak * 120:.0f}px"></span>{cells[-1]}'
+        parts.append("<tr>" + "".join(f"<{tag}>{cell}</{tag}>" for cell in cells) + "</tr>")
+    parts.append("</table>")
+    return "".join(parts)
+
+
+def render_html(blocks: list) -> str:
+    title = next((block.text for block in blocks if isinstance(block, content.Text) and block.style == "title"), NAME)
+    out = [
+        "<!doctype html>",
+        '<html lang="en"><head><meta charset="utf-8">',
+        f"<title>{escape(title)}</title>",
+        f"<style>{CSS}</style>",
+        "</head><body>",
+    ]
+    for block in blocks:
+        if isinstance(block, content.Text):
+            text = escape(block.text).replace("\n", "<br>")
+            if block.style == "title":
+                out.append(f"<h1>{text}</h1>")
+            elif block.style == "h1":
+                out.append(f'<h2 id="{slug(block.text)}">{text}</h2>')
+            elif block.style == "h2":
+                out.append(f"<h3>{text}</h3>")
+            elif block.style == "code":
+                out.append(f"<pre>{escape(block.text)}</pre>")
+            elif block.style in ("subtitle", "change"):
+                out.append(f'<p class="{block.style}">{text}</p>')
+            else:
+                out.append(f"<p>{text}</p>")
+        elif isinstance(block, content.Bullets):
+            if block.items:
+                out.append("<ul>" + "".join(f"<li>{escape(item)}</li>" for item in block.items) + "</ul>")
+        elif isinstance(block, content.Table):
+            out.append(html_table(block.rows, block.widths))
+        elif isinstance(block, content.Figure):
+            if block.kind == "flow":
+                steps = chain_steps(block.data["spec"])
+                out.append('<ol class="flow">' + "".join(f"<li>{escape(step)}</li>" for step in steps) + "</ol>")
+                continue
+            caption, rows, bars = figure_table(block)
+            out.append(f"<figure><figcaption>{escape(caption)}</figcaption>{html_table(rows, bars=bars)}</figure>")
+        elif isinstance(block, content.PageBreak):
+            out.append("<hr>")
+    out.append("</body></html>")
+    return "\n".join(out) + "\n"
+
+
+def md_text(text: str) -> str:
+    return MD_SPECIAL_RE.sub(r"\\\1", text).replace("\n", "  \n")
+
+
+def md_table(rows: list[list[str]]) -> str:
+    lines = ["| " + " | ".join(md_text(cell).replace("  \n", "<br>") for cell in row) + " |" for row in rows]
+    lines.insert(1, "|" + " --- |" * len(rows[0]))
+    return "\n".join(lines)
+
+
+def render_markdown(blocks: list) -> str:
+    out = []
+    for block in blocks:
+        if isinstance(block, content.Text):
+            if block.style == "title":
+                out.append(f"# {md_text(block.text)}")
+            elif block.style == "h1":
+                out.append(f"## {md_text(block.text)}")
+            elif block.style == "h2":
+                out.append(f"### {md_text(block.text)}")
+            elif block.style == "code":
+                out.append(f"```\n{block.text}\n```")
+            elif block.style == "subtitle":
+                out.append(f"_{md_text(block.text)}_")
+            elif block.style == "change":
+                out.append(f"> **{md_text(block.text)}**")
+            else:
+                out.append(md_text(block.text))
+        elif isinstance(block, content.Bullets):
+            if block.items:
+                out.append("\n".join(f"- {md_text(item)}" for item in block.items))
+        elif isinstance(block, content.Table):
+            out.append(md_table(block.rows))
+        elif isinstance(block, content.Figure):
+            if block.kind == "flow":
+                steps = chain_steps(block.data["spec"])
+                out.append("\n".join(f"{idx}. {md_text(step)}" for idx, step in enumerate(steps, 1)))
+                continue
+            caption, rows, _ = figure_table(block)
+            out.append(f"_{md_text(caption)}_\n\n{md_table(rows)}")
+        elif isinstance(block, content.PageBreak):
+            out.append("---")
+    return "\n\n".join(out) + "\n"
+
+
+def render(formats: list[str], out_dir: Path) -> list[Path]:
+    blocks = content.build_document()
+    # Render every format before writing any, so a failed build leaves the previous files untouched.
+    outputs = {}
+    if "html" in formats:
+        outputs[out_dir / f"{NAME}.html"] = render_html(blocks)
+    if "markdown" in formats:
+        outputs[out_dir / f"{NAME}.md"] = render_markdown(blocks)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for path, text in outputs.items():
+        path.write_text(text)
+    return list(outputs)
+
+
+def watched_mtimes() -> dict[Path, float]:
+    paths = [Path(content.__file__), *sorted(content.REPORTS_DIR.glob("*.json"))]
+    return {path: path.stat().st_mtime for path in paths if path.exists()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the system map story as HTML/Markdown without ReportLab.")
+    parser.add_argument("--format", choices=["html", "markdown", "both"], default="both")
+    parser.add_argument("--out-dir", type=Path, default=OUT_DIR)
+    parser.add_argument("--watch", action="store_true", help="Re-render when the content module or a report changes.")
+    args = parser.parse_args()
+    args.out_dir = args.out_dir.resolve() if args.out_dir != OUT_DIR else args.out_dir
+    os.chdir(ROOT)
+    formats = ["html", "markdown"] if args.format == "both" else [args.format]
+
+    seen: dict[Path, float] = {}
+    while True:
+        current = watched_mtimes()
+        if current != seen:
+            started = time.perf_counter()
+            try:
+                if seen:
+                    importlib.reload(content)
+                written = render(formats, args.out_dir)
+            except Exception:
+                if not args.watch:
+                    raise
+                # A half-edited content module should not stop the watcher; keep the last good render.
+                traceback.print_exc()
+                print("Preview not updated; waiting for the next change")
+            else:
+                print(f"Rendered preview in {(time.perf_counter() - started) * 1000:.1f} ms")
+                for path in written:
+                    print(str(path.resolve()))
+            seen = current
+        if not args.watch:
+            break
+        time.sleep(WATCH_INTERVAL_S)
+
+
+if __name__ == "__main__":
+    main()
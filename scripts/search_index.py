@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from pathlib import Path
+
+INDEX_VERSION = 2
+
+TOKEN_RE = re.compile(r"[\w/@.:\-\[\]]+")
+PART_RE = re.compile(r"[/._:\-\[\]@]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can for from has if in into is it its of on or so than that the their then this to "
+    "use used uses was when where which while with without you your".split()
+)
+
+
+def terms(text: str) -> set[str]:
+    found = set()
+    for raw in TOKEN_RE.findall(text.lower()):
+        token = raw.strip(".:-[]").rstrip("/")
+        if len(token) > 1 and token not in STOPWORDS:
+            found.add(token)
+        segments = token.strip("/").split("/")
+        for start in range(1, len(segments)):
+            found.add("/".join(segments[start:]))
+        for part in PART_RE.split(token):
+            if len(part) > 1 and part not in STOPWORDS:
+                found.add(part)
+    return found
+
+
+def index_path(pdf: Path) -> Path:
+    return pdf.with_suffix(".index.json")
+
+
+class SearchIndex:
+    def __init__(self, document: str):
+        self.document = document
+        self.sections: list[dict] = []
+        self.anchors: dict[int, list[tuple[dict, dict]]] = {}
+        # Original row index of each row in a table or one of its split parts, by id() of the part.
+        self.rows: dict[int, list[int]] = {}
+        self.keep: list = []
+        self.page = 0
+
+    def begin_section(self, title: str, page: int | None = None, anchor=None):
+        self.sections.append(
+            {"title": title, "first_page": page, "last_page": page, "starts_page": page is not None, "tables": 0, "entries": []}
+        )
+        self.add(title, page, anchor=anchor)
+
+    def add(self, text: str, page: int | None = None, table: int | None = None, row: int | None = None, anchor=None):
+        if not self.sections:
+            self.begin_section(text, page, anchor)
+            return
+        section = self.sections[-1]
+        entry = {"text": text, "page": page, "table": table, "row": row}
+        section["entries"].append(entry)
+        if anchor is not None:
+            if id(anchor) not in self.anchors:
+                self.keep.append(anchor)
+                self.track_splits(anchor)
+            self.anchors.setdefault(id(anchor), []).append((section, entry))
+        elif page is not None:
+            section["last_page"] = page
+
+    def track_splits(self, flowable):
+        # Frames lay out the parts a flowable splits into, never the flowable itself, so parts share its anchors.
+        split = flowable.split
+
+        def tracked(avail_width, avail_height):
+            parts = split(avail_width, avail_height)
+            rows = self.rows.get(id(flowable))
+            repeat = getattr(flowable, "repeatRows", 0)
+            header = [rows[i] for i in (range(repeat) if isinstance(repeat, int) else sorted(repeat))] if rows else []
+            for number, part in enumerate(parts):
+                if part is flowable:
+                    continue
+                self.keep.append(part)
+                self.anchors[id(part)] = self.anchors.setdefault(id(flowable), [])
+                if rows is not None:
+                    count = len(part._cellvalues)
+                    # Later parts repeat the header rows, then continue where the previous part stopped.
+                    self.rows[id(part)] = rows[:count] if number == 0 else header + rows[len(rows) - count + len(header) :]
+                self.track_splits(part)
+            return parts
+
+        flowable.split = tracked
+
+    def add_story(self, story: list, heading_style: str):
+        for flowable in story:
+            if hasattr(flowable, "getPlainText"):
+                text = flowable.getPlainText()
+                if flowable.style.name == heading_style:
+                    self.begin_section(text, anchor=flowable)
+                else:
+                    self.add(text, anchor=flowable)
+                continue
+
+            cells = getattr(flowable, "_cellvalues", None)
+            if cells is None:
+                continue
+            if not self.sections:
+                self.begin_section(self.document)
+            table = self.sections[-1]["tables"]
+            self.sections[-1]["tables"] += 1
+            self.rows[id(flowable)] = list(range(len(cells)))
+            for row, values in enumerate(cells):
+                paragraphs = [cell for cell in values if hasattr(cell, "getPlainText")]
+                if paragraphs:
+                    text = " | ".join(cell.getPlainText() for cell in paragraphs)
+                    self.add(text, table=table, row=row, anchor=flowable)
+
+    def resolve(self, flowable, page: int):
+        anchored = self.anchors.get(id(flowable))
+        if not anchored:
+            return
+        rows = self.rows.get(id(flowable))
+        present = None if rows is None else set(rows)
+        for section, entry in anchored:
+            if present is not None and entry["row"] not in present:
+                continue
+            if entry["page"] is None:
+                entry["page"] = page
+            if section["first_page"] is None:
+                section["first_page"] = page
+                # Nothing indexed was drawn on this page before the section heading.
+                section["starts_page"] = page != self.page
+            section["last_page"] = max(section["last_page"] or page, page)
+        self.page = page
+
+    def fingerprint(self, section: dict) -> str:
+        digest = hashlib.sha256()
+        for entry in section["entries"]:
+            digest.update(f"{entry['table']}:{entry['row']}:{entry['text']}\0".encode())
+        return digest.hexdigest()
+
+    def write(self, path: Path) -> dict:
+        previous = json.loads(path.read_text()) if path.exists() else None
+        if previous is None or previous.get("version") != INDEX_VERSION:
+            previous = {"sections": [], "postings": {}}
+
+        reusable: dict[str, tuple[int, dict]] = {}
+        for old_id, old in enumerate(previous["sections"]):
+            reusable.setdefault(old["fingerprint"], (old_id, old))
+
+        sections = []
+        plan: dict[int, tuple[int, int]] = {}
+        for section_id, section in enumerate(self.sections):
+            fingerprint = self.fingerprint(section)
+            sections.append(
+                {
+                    "title": section["title"],
+                    "pages": [section["first_page"], section["last_page"]],
+                    "starts_page": section["starts_page"],
+                    "fingerprint": fingerprint,
+                }
+            )
+            match = reusable.pop(fingerprint, None)
+            # Pages only shift as a block when the section starts a page in both builds; otherwise reindex it.
+            if match is not None and section["starts_page"] and match[1]["starts_page"]:
+                old_id, old = match
+                plan[old_id] = (section_id, section["first_page"] - old["pages"][0])
+
+        postings: dict[str, set[tuple]] = {}
+        for term, locations in previous["postings"].items():
+            for old_id, page, table, row in locations:
+                if old_id in plan:
+                    section_id, shift = plan[old_id]
+                    postings.setdefault(term, set()).add((section_id, page + shift, table, row))
+
+        reused = {section_id for section_id, _ in plan.values()}
+        for section_id, section in enumerate(self.sections):
+            if section_id in reused:
+                continue
+            for entry in section["entries"]:
+                location = (section_id, entry["page"] or section["first_page"], entry["table"], entry["row"])
+                for term in terms(entry["text"]):
+                    postings.setdefault(term, set()).add(location)
+
+        index = {
+            "version": INDEX_VERSION,
+            "document": self.document,
+            "fields": ["section", "page", "table", "row"],
+            "sections": sections,
+            "postings": {
+                term: sorted(locations, key=lambda item: (item[0], item[1] or 0, -1 if item[2] is None else item[2], item[3] or 0))
+                for term, locations in sorted(postings.items())
+            },
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(index, separators=(",", ":")))
+        return {"terms": len(postings), "sections": len(sections), "reused": len(reused), "bytes": path.stat().st_size}
+
+
+def describe_index(stats: dict) -> str:
+    return (
+        f"Search index: {stats['terms']} terms across {stats['sections']} sections "
+        f"({stats['reused']} reused, {stats['sections'] - stats['reused']} reindexed), {stats['bytes'] / 1024:.1f} KB"
+    )
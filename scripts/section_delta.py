@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from system_map_content import Bullets, Figure, Table, Text
+
+# 2: fingerprints hash the backend-neutral content blocks instead of ReportLab flowables.
+MANIFEST_VERSION = 2
+FRONT_MATTER = "Cover"
+
+ADDED = "added"
+CHANGED = "changed"
+REMOVED = "removed"
+UNCHANGED = "unchanged"
+
+
+@dataclass
+class Section:
+    title: str
+    content: list = field(default_factory=list)
+    digests: list[str | None] = field(default_factory=list)
+
+    @property
+    def blocks(self) -> list[str]:
+        return [digest for digest in self.digests if digest is not None]
+
+    @property
+    def fingerprint(self) -> str:
+        return hashlib.sha256("\n".join(self.blocks).encode()).hexdigest()
+
+
+def manifest_path(pdf: Path) -> Path:
+    return pdf.with_suffix(".sections.json")
+
+
+def encode_value(value):
+    return sorted(value) if isinstance(value, (set, frozenset)) else repr(value)
+
+
+def block_digest(block, ignore) -> str | None:
+    if ignore(block):
+        return None
+    payload = json.dumps([type(block).__name__, vars(block)], sort_keys=True, default=encode_value)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def split_sections(blocks: list, heading_style: str, ignore=lambda block: False) -> list[Section]:
+    # Works on content blocks only, so a delta build can compare sections before rendering any of them.
+    sections = [Section(FRONT_MATTER)]
+    for block in blocks:
+        if isinstance(block, Text) and block.style == heading_style:
+            # The heading is the section key, not content, so renumbering alone is not a change.
+            sections.append(Section(block.text, [block], [None]))
+            continue
+        sections[-1].content.append(block)
+        sections[-1].digests.append(block_digest(block, ignore))
+    return [section for section in sections if section.content]
+
+
+def write_manifest(path: Path, sections: list[Section], generated_at: str):
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "generated_at": generated_at,
+        "sections": [
+            {"title": section.title, "fingerprint": section.fingerprint, "blocks": section.blocks}
+            for section in sections
+        ],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(manifest, separators=(",", ":")))
+
+
+def load_manifest(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    manifest = json.loads(path.read_text())
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+
+def section_key(title: str) -> str:
+    head, _, rest = title.partition(". ")
+    return rest.lower() if head.isdigit() and rest else title.lower()
+
+
+def is_content(block) -> bool:
+    return isinstance(block, (Text, Bullets, Table, Figure))
+
+
+def compare_sections(sections: list[Section], manifest: dict) -> tuple[list[tuple[Section, str, set[str]]], list[str]]:
+    previous = {section_key(entry["title"]): entry for entry in manifest["sections"]}
+    result = []
+    for section in sections:
+        old = previous.pop(section_key(section.title), None)
+        if old is None:
+            result.append((section, ADDED, set(section.blocks)))
+        elif old["fingerprint"] == section.fingerprint:
+            result.append((section, UNCHANGED, set()))
+        else:
+            result.append((section, CHANGED, set(section.blocks) - set(old["blocks"])))
+    return result, [entry["title"] for entry in previous.values()]
+
+
+def marked_blocks(section: Section, changed: set[str], marker) -> list:
+    blocks = []
+    for index, (block, digest) in enumerate(zip(section.content, section.digests)):
+        if index > 0 and digest in changed and is_content(block):
+            blocks.append(marker())
+        blocks.append(block)
+    return blocks
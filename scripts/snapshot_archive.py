@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"DDNASNAP"
+FORMAT_VERSION = 1
+# magic, version, flags, target count, index offset, index length
+HEADER = struct.Struct("<8sHHIQQ")
+ALIGN = 8
+
+# score.json fields stored as columns so reports can aggregate without parsing every target.
+SCORE_COLUMNS = {
+    "runtime_seconds": "<f8",
+    "visual_fidelity_1_to_5": "u1",
+    "component_fidelity_1_to_5": "u1",
+    "token_quality_1_to_5": "u1",
+    "captured_at_ms": "<i8",
+}
+
+
+class ArchiveError(ValueError):
+    pass
+
+
+def is_score_file(name: str) -> bool:
+    return name == "score.json" or name.endswith("-score.json")
+
+
+def score_row(score: dict) -> dict[str, float]:
+    row = {name: score.get(name) or 0 for name in SCORE_COLUMNS}
+    captured = score.get("captured_at")
+    if captured:
+        row["captured_at_ms"] = int(datetime.fromisoformat(captured.replace("Z", "+00:00")).timestamp() * 1000)
+    return row
+
+
+def read_header(handle) -> tuple[int, int, int]:
+    raw = handle.read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise ArchiveError("Snapshot archive is truncated")
+    magic, version, _flags, count, index_offset, index_length = HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise ArchiveError("Not a snapshot archive")
+    if version != FORMAT_VERSION:
+        raise ArchiveError(f"Unsupported snapshot archive version {version}")
+    return count, index_offset, index_length
+
+
+def empty_index() -> dict:
+    return {"targets": {}, "blobs": {}, "scores": {"count": 0, "slugs": [], "columns": {}, "offset": 0, "length": 0}}
+
+
+class SnapshotArchive:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.handle = self.path.open("rb")
+        try:
+            count, index_offset, index_length = read_header(self.handle)
+        except ArchiveError:
+            self.handle.close()
+            raise
+        self.map = mmap.mmap(self.handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index = json.loads(zlib.decompress(self.map[index_offset : index_offset + index_length]))
+        self.index_length = index_length
+        if count != len(self.index["targets"]):
+            raise ArchiveError("Snapshot archive header and index disagree")
+
+    def __enter__(self) -> SnapshotArchive:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.map.close()
+        self.handle.close()
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self.index["targets"]
+
+    def slugs(self) -> list[str]:
+        return sorted(self.index["targets"])
+
+    def files(self, slug: str) -> dict[str, dict]:
+        if slug not in self.index["targets"]:
+            raise KeyError(slug)
+        return self.index["targets"][slug]["files"]
+
+    def read(self, slug: str, name: str) -> bytes:
+        digest = self.files(slug)[name]["sha256"]
+        offset, length, size = self.index["blobs"][digest]
+        data = zlib.decompress(self.map[offset : offset + length])
+        if len(data) != size:
+            raise ArchiveError(f"Corrupt blob for {slug}/{name}")
+        return data
+
+    def text(self, slug: str, name: str) -> str:
+        return self.read(slug, name).decode("utf-8")
+
+    def json(self, slug: str, name: str):
+        return json.loads(self.read(slug, name))
+
+    def scores(self) -> tuple[list[str], dict[str, np.ndarray]]:
+        scores = self.index["scores"]
+        # Copied out of the map: the columns are small, and live views would keep close() from unmapping.
+        columns = {
+            name: np.frombuffer(self.map, dtype=np.dtype(dtype), count=scores["count"], offset=offset).copy()
+            for name, (dtype, offset) in scores["columns"].items()
+        }
+        return scores["slugs"], columns
+
+    def stats(self) -> dict[str, int]:
+        size = os.fstat(self.handle.fileno()).st_size
+        blobs = sum(length for _, length, _ in self.index["blobs"].values())
+        raw = sum(size for _, _, size in self.index["blobs"].values())
+        live = HEADER.size + blobs + self.index["scores"]["length"] + self.index_length
+        return {"targets": len(self.index["targets"]), "blobs": len(self.index["blobs"]), "bytes": size, "raw_bytes": raw, "dead_bytes": size - live}
+
+
+def pad(handle):
+    handle.write(b"\0" * (-handle.tell() % ALIGN))
+
+
+def write_scores(handle, index: dict, rows: dict[str, dict]):
+    slugs = sorted(rows)
+    columns = {}
+    start = handle.tell()
+    for name, dtype in SCORE_COLUMNS.items():
+        pad(handle)
+        columns[name] = [dtype, handle.tell()]
+        handle.write(np.array([rows[slug][name] for slug in slugs], dtype=np.dtype(dtype)).tobytes())
+    index["scores"] = {"count": len(slugs), "slugs": slugs, "columns": columns, "offset": start, "length": handle.tell() - start}
+
+
+def append_targets(
+    path: Path,
+    targets: dict[str, dict[str, tuple[bytes, dict]]],
+    remove: set[str] | frozenset[str] = frozenset(),
+    level: int = 6,
+) -> dict[str, int]:
+    # targets maps slug -> file name -> (content, extra index fields). Blobs already in the archive are
+    # reused by hash, and the header is rewritten last, so an interrupted append keeps the previous index.
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        with SnapshotArchive(path) as archive:
+            index = archive.index
+            rows = {slug: score_row(archive.json(slug, name)) for slug in index["targets"] for name in archive.files(slug) if is_score_file(name)}
+        handle = path.open("r+b")
+        handle.seek(0, os.SEEK_END)
+    else:
+        index, rows = empty_index(), {}
+        handle = path.open("w+b")
+        handle.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, 0, 0, 0))
+
+    written = 0
+    with handle:
+        for slug in remove:
+            index["targets"].pop(slug, None)
+            rows.pop(slug, None)
+        for slug, files in targets.items():
+            entries = {}
+            rows.pop(slug, None)
+            for name, (content, extra) in sorted(files.items()):
+                digest = hashlib.sha256(content).hexdigest()
+                if digest not in index["blobs"]:
+                    packed = zlib.compress(content, level)
+                    index["blobs"][digest] = [handle.tell(), len(packed), len(content)]
+                    handle.write(packed)
+                    written += 1
+                entries[name] = {"sha256": digest, **extra}
+                if is_score_file(name):
+                    rows[slug] = score_row(json.loads(content))
+            index["targets"][slug] = {"files": entries}
+
+        live = {entry["sha256"] for target in index["targets"].values() for entry in target["files"].values()}
+        index["blobs"] = {digest: blob for digest, blob in index["blobs"].items() if digest in live}
+        write_scores(handle, index, {slug: rows.get(slug, score_row({})) for slug in index["targets"]})
+
+        packed_index = zlib.compress(json.dumps(index, separators=(",", ":")).encode("utf-8"), level)
+        index_offset = handle.tell()
+        handle.write(packed_index)
+        handle.flush()
+        os.fsync(handle.fileno())
+        handle.seek(0)
+        handle.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(index["targets"]), index_offset, len(packed_index)))
+        handle.flush()
+        os.fsync(handle.fileno())
+    return {"blobs_written": written, "targets": len(index["targets"])}
+
+
+def compact(path: Path, level: int = 6) -> dict[str, int]:
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.unlink(missing_ok=True)
+    with SnapshotArchive(path) as archive:
+        targets = {
+            slug: {
+                name: (archive.read(slug, name), {key: value for key, value in entry.items() if key != "sha256"})
+                for name, entry in archive.files(slug).items()
+            }
+            for slug in archive.slugs()
+        }
+    result = append_targets(tmp, targets, level=level)
+    os.replace(tmp, path)
+    return result
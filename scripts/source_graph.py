@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+OUT = Path("output/reports/source-graph.json")
+CACHE = Path("output/cache/source-scan.json")
+CACHE_VERSION = 1
+SOURCE_ROOT = Path("src")
+ALIAS = "@/"
+EXTENSIONS = (".ts", ".tsx")
+RESOLVE_SUFFIXES = ("", ".ts", ".tsx", "/index.ts", "/index.tsx")
+
+IMPORT_RE = re.compile(
+    r"""^\s*(?:import|export)\s+(?:type\s+)?(?:[\w*{}\s,$]+?\s+from\s+)?["']([^"']+)["']""",
+    re.MULTILINE,
+)
+DYNAMIC_IMPORT_RE = re.compile(r"""\bimport\(\s*["']([^"']+)["']\s*\)""")
+EXPORT_DECL_RE = re.compile(
+    r"^export\s+(default\s+)?(?:declare\s+)?(?:async\s+)?(?:abstract\s+)?"
+    r"(function\*?|const|let|var|class|type|interface|enum)\s+([\w$]+)",
+    re.MULTILINE,
+)
+EXPORT_DEFAULT_RE = re.compile(r"^export\s+default\s+(?!function|async|class|abstract)", re.MULTILINE)
+EXPORT_LIST_RE = re.compile(r"^export\s+(?:type\s+)?\{([^}]*)\}(?!\s*from)", re.MULTILINE)
+
+
+def scan_source(text: str) -> dict:
+    specifiers = sorted(set(IMPORT_RE.findall(text)) | set(DYNAMIC_IMPORT_RE.findall(text)))
+
+    exports = [name for _, _, name in EXPORT_DECL_RE.findall(text)]
+    if EXPORT_DEFAULT_RE.search(text):
+        exports.append("default")
+    for group in EXPORT_LIST_RE.findall(text):
+        for item in group.split(","):
+            item = item.strip().removeprefix("type ").strip()
+            if item:
+                exports.append(item.split(" as ")[-1].strip())
+
+    lines = text.splitlines()
+    in_block = False
+    code = 0
+    for line in lines:
+        stripped = line.strip()
+        if in_block:
+            if "*/" in stripped:
+                in_block = False
+            continue
+        if not stripped or stripped.startswith("//"):
+            continue
+        if stripped.startswith("/*"):
+            in_block = "*/" not in stripped
+            continue
+        code += 1
+
+    return {"lines": len(lines), "code_lines": code, "exports": exports, "specifiers": specifiers}
+
+
+def scan_file(path: str) -> dict:
+    return scan_source(Path(path).read_text(encoding="utf-8", errors="replace"))
+
+
+def blob_hashes(paths: list[str]) -> list[str]:
+    result = subprocess.run(
+        ["git", "hash-object", "--stdin-paths"],
+        input="\n".join(paths) + "\n",
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.split()
+
+
+def resolve(specifier: str, importer: str, known: set[str], root: Path = SOURCE_ROOT) -> str | None:
+    if specifier.startswith(ALIAS):
+        base = (root / specifier[len(ALIAS):]).as_posix()
+    elif specifier.startswith("."):
+        base = os.path.normpath(os.path.join(os.path.dirname(importer), specifier)).replace(os.sep, "/")
+    else:
+        return None
+    for suffix in RESOLVE_SUFFIXES:
+        if base + suffix in known:
+            return base + suffix
+    return base
+
+
+def package_name(specifier: str) -> str:
+    parts = specifier.split("/")
+    return "/".join(parts[:2]) if specifier.startswith("@") else parts[0]
+
+
+def is_test(path: str) -> bool:
+    return "/__tests__/" in path or ".test." in path or ".spec." in path
+
+
+def build_graph(files: dict[str, dict], root: Path = SOURCE_ROOT) -> dict:
+    known = set(files)
+    edges: set[tuple[str, str]] = set()
+    rows = []
+    external: dict[str, int] = {}
+
+    for path, scan in sorted(files.items()):
+        internal = set()
+        packages = set()
+        for specifier in scan["specifiers"]:
+            target = resolve(specifier, path, known, root)
+            if target is None:
+                packages.add(package_name(specifier))
+            elif target in known and target != path:
+                internal.add(target)
+        if not is_test(path):
+            edges.update((path, target) for target in internal)
+            for name in packages:
+                external[name] = external.get(name, 0) + 1
+        rows.append(
+            {
+                "path": path,
+                "test": is_test(path),
+                "lines": scan["lines"],
+                "code_lines": scan["code_lines"],
+                "exports": scan["exports"],
+                "imports": sorted(internal),
+                "packages": sorted(packages),
+            }
+        )
+
+    fan_in = {path: 0 for path in files}
+    fan_out = {path: 0 for path in files}
+    for source, target in edges:
+        fan_out[source] += 1
+        fan_in[target] += 1
+    for row in rows:
+        row["fan_in"] = fan_in[row["path"]]
+        row["fan_out"] = fan_out[row["path"]]
+
+    return {
+        "files": rows,
+        "edges": sorted([source, target] for source, target in edges),
+        "external_packages": dict(sorted(external.items(), key=lambda item: (-item[1], item[0]))),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan src/ TypeScript files for imports, exports, and size.")
+    parser.add_argument("--root", type=Path, default=SOURCE_ROOT)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 2, help="Worker processes for parsing.")
+    parser.add_argument("--cache", type=Path, default=CACHE)
+    parser.add_argument("--out", type=Path, default=OUT, help="Where to write the JSON report.")
+    args = parser.parse_args()
+
+    paths = sorted(path.as_posix() for path in args.root.rglob("*") if path.suffix in EXTENSIONS and path.is_file())
+    hashes = blob_hashes(paths) if paths else []
+
+    cache = json.loads(args.cache.read_text()) if args.cache.exists() else {}
+    if cache.get("version") != CACHE_VERSION:
+        cache = {"version": CACHE_VERSION, "blobs": {}}
+    blobs = cache["blobs"]
+
+    missing = [(path, blob) for path, blob in zip(paths, hashes) if blob not in blobs]
+    if missing:
+        with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+            chunksize = max(1, len(missing) // (args.jobs * 4))
+            scans = executor.map(scan_file, [path for path, _ in missing], chunksize=chunksize)
+            for (_, blob), scan in zip(missing, scans):
+                blobs[blob] = scan
+
+    live = set(hashes)
+    cache["blobs"] = {blob: scan for blob, scan in blobs.items() if blob in live}
+    args.cache.parent.mkdir(parents=True, exist_ok=True)
+    args.cache.write_text(json.dumps(cache, separators=(",", ":")))
+
+    graph = build_graph({path: cache["blobs"][blob] for path, blob in zip(paths, hashes)}, args.root)
+    report = {
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "root": args.root.as_posix(),
+        "file_count": len(paths),
+        "scanned": len(missing),
+        **graph,
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"{len(paths)} files, {len(missing)} parsed, {len(paths) - len(missing)} from cache")
+    print(str(args.out.resolve()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import uuid
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+OUT = Path("output/reports/storage-footprint.json")
+SYNTHETIC_DIR = Path("output/storage")
+
+BUCKET = "captures"
+# fileSizeLimit passed to createBucket in src/lib/worker.ts.
+FILE_SIZE_LIMIT = 20 * 1024 * 1024
+# ARTIFACT_TTL_HOURS default (src/lib/env.ts) and the vercel.json cron schedule "0 0 * * *".
+TTL_HOURS = 24
+CRON_HOURS = 24
+TTL_SCENARIOS = (24, 72, 168, 720)
+CRON_SCENARIOS = (1, 6, 24, 168)
+HORIZON_DAYS = 90
+TREND_DAYS = 28
+CHUNK_ROWS = 65_536
+# Users tracked by the heavy-hitter summary; memory stays fixed however many users the bucket holds.
+USER_SLOTS = 2_000
+TOP_USERS = 10
+
+AGE_BINS_H = (1, 6, 24, 48, 168, 720, 2160)
+AGE_LABELS = ("< 1 h", "1-6 h", "6-24 h", "1-2 d", "2-7 d", "7-30 d", "30-90 d", "> 90 d")
+KINDS = ("screenshot.png", "trace.html")
+OTHER_KIND = "other"
+
+STATUSES = ("queued", "running", "completed", "failed")
+COMPLETED = STATUSES.index("completed")
+MISSING = -1
+
+# How each object relates to src/lib/cleanup.ts, which only removes paths listed on extraction_artifacts
+# rows (written when an extraction completes) once the extraction's expires_at has passed.
+CLASSES = ("live", "expired_pending", "expired_missed", "orphan_incomplete", "orphan_no_row", "unrecognized")
+CLASS_LABELS = {
+    "live": "Live (not yet expired)",
+    "expired_pending": "Expired, waiting for the next cron run",
+    "expired_missed": "Expired before the last cron run, still present",
+    "orphan_incomplete": "Extraction never completed (no artifact row, never cleaned)",
+    "orphan_no_row": "No extraction row",
+    "unrecognized": "Path not userId/extractionId/file",
+}
+
+
+def open_text(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return path.open("r", encoding="utf-8", newline="")
+
+
+def iter_rows(path: Path):
+    with open_text(path) as handle:
+        if {".jsonl", ".ndjson"} & set(path.suffixes):
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(handle)
+
+
+def parse_time(value) -> float:
+    if isinstance(value, str) and ("-" in value or "T" in value):
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    return float(value)
+
+
+def id_key(value: str) -> int:
+    hexed = value.replace("-", "")
+    try:
+        return int(hexed[:16], 16)
+    except ValueError:
+        return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "little")
+
+
+def object_size(row: dict) -> int:
+    if row.get("size") not in (None, ""):
+        return int(row["size"])
+    metadata = row.get("metadata") or {}
+    if isinstance(metadata, str):
+        metadata = json.loads(metadata) if metadata else {}
+    return int(metadata.get("size") or metadata.get("contentLength") or 0)
+
+
+class ExtractionIndex:
+    def __init__(self, keys: np.ndarray, expires: np.ndarray, status: np.ndarray):
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.expires = expires[order]
+        self.status = status[order]
+
+    @classmethod
+    def load(cls, path: Path) -> tuple[ExtractionIndex, dict]:
+        keys, expires, status = array("Q"), array("d"), array("b")
+        daily: dict[int, list[int]] = {}
+        latest = 0.0
+        for row in iter_rows(path):
+            created = parse_time(row["created_at"])
+            code = STATUSES.index(row["status"]) if row.get("status") in STATUSES else COMPLETED
+            keys.append(id_key(str(row["id"])))
+            expires.append(parse_time(row["expires_at"]))
+            status.append(code)
+            counts = daily.setdefault(int(created // 86_400), [0, 0])
+            counts[0 if code == COMPLETED else 1] += 1
+            latest = max(latest, created)
+        index = cls(
+            np.frombuffer(keys, dtype=np.uint64).copy(),
+            np.frombuffer(expires, dtype=np.float64).copy(),
+            np.frombuffer(status, dtype=np.int8).copy(),
+        )
+        return index, {"rows": len(keys), "daily": daily, "latest": latest}
+
+    def lookup(self, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        if not self.keys.size:
+            return np.full(keys.size, MISSING, dtype=np.int8), np.zeros(keys.size)
+        pos = np.minimum(np.searchsorted(self.keys, keys), self.keys.size - 1)
+        found = self.keys[pos] == keys
+        return np.where(found, self.status[pos], MISSING).astype(np.int8), np.where(found, self.expires[pos], 0.0)
+
+
+class HeavyHitters:
+    # Mergeable Misra-Gries summary over bytes: estimates undercount by at most `error`.
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: dict[str, int] = {}
+        self.error = 0
+
+    def merge(self, chunk: Counter):
+        counts = self.counts
+        for user, value in chunk.items():
+            counts[user] = counts.get(user, 0) + value
+        if len(counts) > self.capacity:
+            threshold = sorted(counts.values(), reverse=True)[self.capacity]
+            self.error += threshold
+            self.counts = {user: value - threshold for user, value in counts.items() if value > threshold}
+
+    def top(self, limit: int) -> list[tuple[str, int]]:
+        return sorted(self.counts.items(), key=lambda item: -item[1])[:limit]
+
+
+class ListingStats:
+    def __init__(self, as_of: float, cron_hours: int, history_hours: int):
+        self.as_of = as_of
+        self.last_tick = last_cron_tick(as_of, cron_hours)
+        self.history_hours = history_hours
+        self.objects = np.zeros((len(CLASSES), len(AGE_LABELS)), dtype=np.int64)
+        self.bytes = np.zeros((len(CLASSES), len(AGE_LABELS)), dtype=np.int64)
+        self.kind_objects = np.zeros(len(KINDS) + 1, dtype=np.int64)
+        self.kind_bytes = np.zeros(len(KINDS) + 1, dtype=np.int64)
+        # Bytes of cleanable objects by age in hours; the last slot collects everything older.
+        self.cleanable_by_hour = np.zeros(history_hours + 1, dtype=np.float64)
+        self.completed_screenshots = 0
+        self.over_limit = 0
+        self.largest = 0
+        self.users = HeavyHitters(USER_SLOTS)
+
+    def add_chunk(self, index: ExtractionIndex, keys, sizes, created, kinds, recognized, user_bytes: Counter):
+        keys = np.frombuffer(keys, dtype=np.uint64)
+        sizes = np.frombuffer(sizes, dtype=np.int64)
+        created = np.frombuffer(created, dtype=np.float64)
+        kinds = np.frombuffer(kinds, dtype=np.int8)
+        recognized = np.frombuffer(recognized, dtype=np.bool_)
+
+        status, expires = index.lookup(keys)
+        classes = np.full(keys.size, CLASSES.index("live"), dtype=np.int8)
+        completed = status == COMPLETED
+        expired = completed & (expires < self.as_of)
+        classes[expired] = CLASSES.index("expired_pending")
+        classes[expired & (expires < self.last_tick)] = CLASSES.index("expired_missed")
+        classes[(status != COMPLETED) & (status != MISSING)] = CLASSES.index("orphan_incomplete")
+        classes[status == MISSING] = CLASSES.index("orphan_no_row")
+        classes[~recognized] = CLASSES.index("unrecognized")
+
+        age_h = np.maximum(self.as_of - created, 0) / 3600
+        bins = np.digitize(age_h, AGE_BINS_H)
+        flat = classes.astype(np.int64) * len(AGE_LABELS) + bins
+        cells = self.objects.size
+        self.objects += np.bincount(flat, minlength=cells).reshape(self.objects.shape)
+        self.bytes += np.bincount(flat, weights=sizes, minlength=cells).astype(np.int64).reshape(self.bytes.shape)
+        self.kind_objects += np.bincount(kinds, minlength=self.kind_objects.size)
+        self.kind_bytes += np.bincount(kinds, weights=sizes, minlength=self.kind_bytes.size).astype(np.int64)
+
+        cleanable = classes <= CLASSES.index("expired_missed")
+        hours = np.minimum(age_h[cleanable].astype(np.int64), self.history_hours)
+        self.cleanable_by_hour += np.bincount(hours, weights=sizes[cleanable], minlength=self.cleanable_by_hour.size)
+        self.completed_screenshots += int(np.count_nonzero(cleanable & (kinds == 0)))
+        self.over_limit += int(np.count_nonzero(sizes > FILE_SIZE_LIMIT))
+        self.largest = max(self.largest, int(sizes.max(initial=0)))
+        self.users.merge(user_bytes)
+
+
+def scan_listing(path: Path, index: ExtractionIndex, stats: ListingStats, bucket: str) -> int:
+    rows = 0
+    kind_codes = {name: code for code, name in enumerate(KINDS)}
+
+    def fresh():
+        return array("Q"), array("q"), array("d"), array("b"), array("b"), Counter()
+
+    chunk = fresh()
+    for row in iter_rows(path):
+        if row.get("bucket_id") not in (None, "", bucket):
+            continue
+        name = str(row["name"])
+        parts = name.split("/")
+        size = object_size(row)
+        recognized = len(parts) == 3 and all(parts)
+        keys, sizes, created, kinds, flags, users = chunk
+        keys.append(id_key(parts[1]) if recognized else 0)
+        sizes.append(size)
+        created.append(parse_time(row.get("created_at") or row.get("updated_at") or stats.as_of))
+        kinds.append(kind_codes.get(parts[-1], len(KINDS)))
+        flags.append(recognized)
+        users[parts[0] if recognized else "(unrecognized)"] += size
+        rows += 1
+        if len(keys) >= CHUNK_ROWS:
+            stats.add_chunk(index, *chunk)
+            chunk = fresh()
+    if len(chunk[0]):
+        stats.add_chunk(index, *chunk)
+    return rows
+
+
+def last_cron_tick(at: float, cron_hours: int) -> float:
+    period = cron_hours * 3600
+    return at - at % period
+
+
+def daily_rates(daily: dict[int, list[int]], as_of: float, days: int) -> tuple[np.ndarray, np.ndarray]:
+    # Whole days only: the day containing as_of is still filling up.
+    last = int(as_of // 86_400) - 1
+    window = range(last - days + 1, last + 1)
+    completed = np.array([daily.get(day, [0, 0])[0] for day in window], dtype=np.float64)
+    other = np.array([daily.get(day, [0, 0])[1] for day in window], dtype=np.float64)
+    return completed, other
+
+
+def project(
+    cleanable_by_hour: np.ndarray,
+    hourly_bytes: np.ndarray,
+    orphan_start: float,
+    hourly_orphan_bytes: np.ndarray,
+    as_of: float,
+    ttl_hours: int,
+    cron_hours: int,
+) -> dict:
+    history = cleanable_by_hour.size - 1
+    horizon = hourly_bytes.size
+    # Arrivals by hour from the oldest tracked hour (-history) to the end of the horizon.
+    arrivals = np.concatenate([cleanable_by_hour[::-1], hourly_bytes])
+    cumulative = np.concatenate([[0.0], np.cumsum(arrivals)])
+    start_hour = int(as_of // 3600)
+    t = np.arange(horizon + 1)
+    # Latest cron run at or before each hour; it has removed everything older than the TTL at that moment.
+    # Until the first run after as_of, everything in the listing is still there.
+    last_run = t - (start_hour + t) % cron_hours
+    cutoff = np.where(last_run > 0, np.clip(last_run - ttl_hours + history + 1, 0, t + history + 1), 0)
+    stored = cumulative[t + history + 1] - cumulative[cutoff]
+    orphans = orphan_start + np.concatenate([[0.0], np.cumsum(hourly_orphan_bytes)])
+    total = stored + orphans
+    last_week = total[-24 * 7 :]
+    return {
+        "ttl_hours": ttl_hours,
+        "cron_hours": cron_hours,
+        "start_bytes": int(total[0]),
+        "peak_bytes": int(total.max()),
+        "final_week_mean_bytes": int(last_week.mean()),
+        "final_week_peak_bytes": int(last_week.max()),
+        "orphan_bytes_end": int(orphans[-1]),
+        "daily_end_bytes": [int(value) for value in total[::24]],
+    }
+
+
+def synthetic_dumps(directory: Path, days: int, per_day: float, growth: float, seed: int) -> tuple[Path, Path]:
+    # Written as CSV and JSONL so the synthetic run exercises the same streaming readers as real exports.
+    rng = np.random.default_rng(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    extractions_path = directory / "synthetic-extractions.csv"
+    listing_path = directory / "synthetic-listing.jsonl"
+    start = (datetime.now(timezone.utc).timestamp() // 86_400 - days) * 86_400
+    as_of = start + days * 86_400 - 3 * 3600
+    users = max(50, int(per_day * days / 6))
+
+    def stamp(value: float) -> str:
+        return datetime.fromtimestamp(value, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+    serial = 0
+    with extractions_path.open("w", newline="") as extractions_handle, listing_path.open("w") as listing_handle:
+        writer = csv.writer(extractions_handle)
+        writer.writerow(["id", "user_id", "status", "created_at", "expires_at"])
+        for day in range(days):
+            count = rng.poisson(per_day * (1 + growth) ** day)
+            created = np.sort(start + day * 86_400 + rng.uniform(0, 86_400, count))
+            created = created[created < as_of]
+            owners = (rng.zipf(1.6, created.size) - 1) % users
+            outcome = rng.choice(3, created.size, p=[0.9, 0.08, 0.02])
+            screenshots = np.minimum(rng.lognormal(np.log(1.4e6), 0.6, created.size), FILE_SIZE_LIMIT).astype(np.int64)
+            traces = rng.lognormal(np.log(2.5e5), 0.8, created.size).astype(np.int64)
+            kept = rng.random(created.size)
+            for when, owner, result, screenshot, trace, keep in zip(created, owners, outcome, screenshots, traces, kept):
+                serial += 1
+                extraction = str(uuid.UUID(int=(serial << 64) | (serial * 0x9E3779B97F4A7C15 & (2**64 - 1))))
+                user = str(uuid.UUID(int=(int(owner) << 96) | 0x4000_8000_0000_0000_0000))
+                expires = when + TTL_HOURS * 3600
+                running = as_of - when < 600
+                status = "running" if running else ("completed" if result != 1 else "failed")
+                writer.writerow([extraction, user, status, stamp(when), stamp(expires)])
+
+                objects = []
+                if status == "completed":
+                    cleaned = last_cron_tick(as_of, CRON_HOURS) > expires and keep > 0.005
+                    if not cleaned:
+                        objects = [("screenshot.png", screenshot, "image/png"), ("trace.html", trace, "text/html")]
+                elif status == "failed" and keep < 0.35:
+                    objects = [("screenshot.png", screenshot, "image/png")]
+                for name, size, mimetype in objects:
+                    row = {
+                        "name": f"{user}/{extraction}/{name}",
+                        "bucket_id": BUCKET,
+                        "created_at": stamp(when + 30),
+                        "metadata": {"size": int(size), "mimetype": mimetype},
+                    }
+                    listing_handle.write(json.dumps(row) + "\n")
+    return listing_path, extractions_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Captures bucket footprint by age and user, with retention projections.")
+    parser.add_argument("--listing", type=Path, help="storage.objects dump (.csv/.jsonl, optionally .gz): name, size or metadata, created_at.")
+    parser.add_argument("--extractions", type=Path, help="extractions dump (.csv/.jsonl, optionally .gz): id, status, created_at, expires_at.")
+    parser.add_argument("--as-of", help="Listing time (ISO or epoch); defaults to the newest extraction created_at.")
+    parser.add_argument("--bucket", default=BUCKET)
+    parser.add_argument("--ttl-hours", type=int, nargs="+", default=list(TTL_SCENARIOS), help="Retention windows to simulate.")
+    parser.add_argument("--cron-hours", type=int, nargs="+", default=list(CRON_SCENARIOS), help="Cleanup intervals to simulate.")
+    parser.add_argument("--horizon-days", type=int, default=HORIZON_DAYS)
+    parser.add_argument("--trend-days", type=int, default=TREND_DAYS, help="Recent whole days used to fit the extraction rate.")
+    parser.add_argument("--growth", type=float, help="Override the fitted trend with this % growth in extractions per 30 days.")
+    parser.add_argument("--synthetic-days", type=int, default=45, help="Synthetic dump length when no dumps are given.")
+    parser.add_argument("--synthetic-per-day", type=float, default=600, help="Synthetic extractions per day at the start.")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", type=Path, default=OUT, help="Where to write the JSON report.")
+    args = parser.parse_args()
+
+    if bool(args.listing) != bool(args.extractions):
+        parser.error("--listing and --extractions go together")
+    if args.listing:
+        listing_path, extractions_path = args.listing, args.extractions
+        source = f"{listing_path} + {extractions_path}"
+    else:
+        listing_path, extractions_path = synthetic_dumps(SYNTHETIC_DIR, args.synthetic_days, args.synthetic_per_day, 0.01, args.seed)
+        source = f"synthetic ({args.synthetic_days} days from {args.synthetic_per_day:g}/day, +1%/day, seed {args.seed})"
+
+    index, extractions = ExtractionIndex.load(extractions_path)
+    as_of = parse_time(args.as_of) if args.as_of else extractions["latest"]
+    history_hours = max(args.ttl_hours) + max(args.cron_hours)
+    stats = ListingStats(as_of, CRON_HOURS, history_hours)
+    rows = scan_listing(listing_path, index, stats, args.bucket)
+
+    completed, other = daily_rates(extractions["daily"], as_of, args.trend_days)
+    days = np.arange(completed.size, dtype=np.float64)
+    slope = float(np.polyfit(days, completed, 1)[0]) if completed.size > 1 and completed.any() else 0.0
+    rate_now = float(completed[-7:].mean()) if completed.size else 0.0
+    future_days = np.arange(1, args.horizon_days + 1, dtype=np.float64)
+    if args.growth is not None:
+        per_day = rate_now * (1 + args.growth / 100) ** (future_days / 30)
+    else:
+        per_day = np.maximum(rate_now + slope * future_days, 0)
+    failed_share = float(other.sum() / max(1.0, completed.sum() + other.sum()))
+
+    cleanable_bytes = int(stats.bytes[: CLASSES.index("expired_missed") + 1].sum())
+    orphan_bytes = int(stats.bytes[CLASSES.index("orphan_incomplete") :].sum())
+    bytes_per_extraction = cleanable_bytes / max(1, stats.completed_screenshots)
+    incomplete_rows = extractions["rows"] - sum(counts[0] for counts in extractions["daily"].values())
+    orphan_per_incomplete = int(stats.bytes[CLASSES.index("orphan_incomplete")].sum()) / max(1, incomplete_rows)
+
+    hourly_extractions = np.repeat(per_day / 24, 24)
+    hourly_bytes = hourly_extractions * bytes_per_extraction
+    hourly_orphans = hourly_extractions * failed_share / max(1e-9, 1 - failed_share) * orphan_per_incomplete
+    scenarios = [
+        project(stats.cleanable_by_hour, hourly_bytes, orphan_bytes, hourly_orphans, as_of, ttl, cron)
+        for ttl in args.ttl_hours
+        for cron in args.cron_hours
+    ]
+
+    classes = [
+        {
+            "class": name,
+            "label": CLASS_LABELS[name],
+            "objects": int(stats.objects[code].sum()),
+            "bytes": int(stats.bytes[code].sum()),
+        }
+        for code, name in enumerate(CLASSES)
+    ]
+    report = {
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "source": source,
+        "as_of": datetime.fromtimestamp(as_of, timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "bucket": args.bucket,
+        "current": {"ttl_hours": TTL_HOURS, "cron_hours": CRON_HOURS},
+        "objects": rows,
+        "bytes": int(stats.bytes.sum()),
+        "over_limit_objects": stats.over_limit,
+        "largest_object_bytes": stats.largest,
+        "by_age": [
+            {"label": label, "objects": int(stats.objects[:, col].sum()), "bytes": int(stats.bytes[:, col].sum())}
+            for col, label in enumerate(AGE_LABELS)
+        ],
+        "by_kind": [
+            {"kind": kind, "objects": int(stats.kind_objects[code]), "bytes": int(stats.kind_bytes[code])}
+            for code, kind in enumerate(KINDS + (OTHER_KIND,))
+        ],
+        "classes": classes,
+        "top_users": [{"user": user, "bytes_at_least": value} for user, value in stats.users.top(TOP_USERS)],
+        "user_bytes_error": stats.users.error,
+        "extractions": {
+            "rows": extractions["rows"],
+            "completed_per_day_recent": round(rate_now, 1),
+            "completed_per_day_trend": round(slope, 2),
+            "failed_or_pending_share": round(failed_share, 4),
+            "bytes_per_completed": int(bytes_per_extraction),
+            "orphan_bytes_per_incomplete": int(orphan_per_incomplete),
+        },
+        "horizon_days": args.horizon_days,
+        "growth_override_pct_per_30d": args.growth,
+        "scenarios": scenarios,
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2) + "\n")
+
+    gib = 1024**3
+    print(f"{rows} objects, {report['bytes'] / gib:.2f} GiB in {args.bucket} as of {report['as_of']} ({source})")
+    for entry in classes:
+        if entry["objects"]:
+            print(f"  {entry['label']}: {entry['objects']} objects, {entry['bytes'] / gib:.2f} GiB")
+    current = next((entry for entry in scenarios if (entry["ttl_hours"], entry["cron_hours"]) == (TTL_HOURS, CRON_HOURS)), None)
+    if current:
+        print(f"Current rules after {args.horizon_days} days: {current['final_week_peak_bytes'] / gib:.2f} GiB peak in the final week")
+    print(str(args.out.resolve()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import socket
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import SplitResult, urlsplit
+
+from http_pool import DEFAULT_PORTS, ConnectionPool
+
+URLS = Path("test/fixtures/urls.json")
+OUT = Path("output/reports/url-preflight.json")
+CACHE = Path("output/cache/robots-cache.json")
+CACHE_VERSION = 1
+
+AGENT = "DesignDNA"
+BLOCKED_HOSTNAMES = frozenset({"localhost", "127.0.0.1", "::1"})
+URL_SCHEME_RE = re.compile(r"^[a-z][a-z0-9+.-]*:", re.IGNORECASE)
+ROBOTS_TIMEOUT_S = 5.0
+ROBOTS_TTL_S = 3600
+# Robots outcomes that come from the site itself and are worth keeping across runs.
+CACHED_ROBOTS = frozenset({"ok", "missing"})
+
+
+class PreflightError(Exception):
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+# --- src/lib/url-security.ts ---
+
+
+def normalize_url(raw: str) -> SplitResult:
+    trimmed = raw.strip()
+    if not trimmed:
+        raise PreflightError("INVALID_URL", "URL is invalid")
+
+    candidate = trimmed if URL_SCHEME_RE.match(trimmed) else f"https://{trimmed}"
+    try:
+        parsed = urlsplit(candidate)
+        parsed.port
+    except ValueError:
+        raise PreflightError("INVALID_URL", "URL is invalid") from None
+
+    if parsed.scheme.lower() not in DEFAULT_PORTS:
+        raise PreflightError("INVALID_URL", "Only http and https URLs are supported")
+    if not parsed.hostname:
+        raise PreflightError("INVALID_URL", "URL is invalid")
+    if parsed.hostname in BLOCKED_HOSTNAMES:
+        raise PreflightError("TARGET_BLOCKED", "Blocked hostname")
+    if parsed.hostname.endswith(".local"):
+        raise PreflightError("TARGET_BLOCKED", "Blocked local domain")
+    return parsed
+
+
+def origin(parsed: SplitResult) -> str:
+    scheme = parsed.scheme.lower()
+    host = f"[{parsed.hostname}]" if ":" in parsed.hostname else parsed.hostname
+    port = parsed.port
+    return f"{scheme}://{host}" if port in (None, DEFAULT_PORTS[scheme]) else f"{scheme}://{host}:{port}"
+
+
+def url_string(parsed: SplitResult) -> str:
+    query = f"?{parsed.query}" if parsed.query else ""
+    fragment = f"#{parsed.fragment}" if parsed.fragment else ""
+    return f"{origin(parsed)}{parsed.path or '/'}{query}{fragment}"
+
+
+def is_private_ipv4(ip: str) -> bool:
+    parts = ip.split(".")
+    if len(parts) < 2 or not parts[0].isdigit() or not parts[1].isdigit():
+        return True
+    a, b = int(parts[0]), int(parts[1])
+    return a in (10, 127) or (a == 169 and b == 254) or (a == 172 and 16 <= b <= 31) or (a == 192 and b == 168)
+
+
+def is_private_ipv6(ip: str) -> bool:
+    lowered = ip.lower()
+    return lowered == "::1" or lowered.startswith(("fc", "fd", "fe80"))
+
+
+def assert_public_ip(ip: str):
+    if ":" in ip:
+        if is_private_ipv6(ip):
+            raise PreflightError("TARGET_BLOCKED", "Target resolves to a private IPv6 address")
+    elif is_private_ipv4(ip):
+        raise PreflightError("TARGET_BLOCKED", "Target resolves to a private IPv4 address")
+
+
+async def system_resolve(host: str) -> list[str]:
+    infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    return sorted({info[4][0] for info in infos})
+
+
+# --- src/lib/robots.ts ---
+
+
+@dataclass
+class RobotsRule:
+    user_agents: list[str] = field(default_factory=list)
+    allow: list[str] = field(default_factory=list)
+    disallow: list[str] = field(default_factory=list)
+
+
+def matches_agent(agents: list[str]) -> bool:
+    return any(agent == "*" or AGENT.lower().startswith(agent.lower()) for agent in agents)
+
+
+def parse_robots(content: str) -> list[RobotsRule]:
+    rules: list[RobotsRule] = []
+    current: RobotsRule | None = None
+    for raw_line in re.split(r"\r?\n", content):
+        line = raw_line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        raw_key, _, value = line.partition(":")
+        key = raw_key.strip().lower()
+        value = value.strip()
+        if not value:
+            continue
+
+        if key == "user-agent":
+            if current is None or current.allow or current.disallow:
+                current = RobotsRule()
+                rules.append(current)
+            current.user_agents.append(value)
+        elif current is not None and key == "allow":
+            current.allow.append(value)
+        elif current is not None and key == "disallow":
+            current.disallow.append(value)
+    return rules
+
+
+def is_match(pathname: str, rule_path: str) -> bool:
+    if not rule_path:
+        return False
+    normalized = re.sub(r"\*+", "*", rule_path)
+    if normalized == "/":
+        return True
+    if normalized.endswith("$"):
+        return pathname == normalized[:-1]
+    if "*" in normalized:
+        return re.match(re.escape(normalized).replace(r"\*", ".*"), pathname) is not None
+    return pathname.startswith(normalized)
+
+
+def resolve_allowed(pathname: str, rule: RobotsRule) -> bool:
+    best_disallow = max((len(path) for path in rule.disallow if is_match(pathname, path)), default=-1)
+    best_allow = max((len(path) for path in rule.allow if is_match(pathname, path)), default=-1)
+    return best_allow >= best_disallow or best_disallow == -1
+
+
+def robots_allows(rules: list[RobotsRule], parsed: SplitResult) -> bool:
+    matching = [rule for rule in rules if matches_agent(rule.user_agents)]
+    if not matching:
+        return True
+    pathname = (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+    return any(resolve_allowed(pathname, rule) for rule in matching)
+
+
+# --- batch checker ---
+
+
+class RobotsCache:
+    def __init__(self, pool: ConnectionPool, ttl: float = ROBOTS_TTL_S, entries: dict[str, dict] | None = None):
+        self.pool = pool
+        self.ttl = ttl
+        self.entries = entries or {}
+        self.pending: dict[str, asyncio.Task] = {}
+        self.fetched = 0
+        self.hits = 0
+
+    @classmethod
+    def load(cls, path: Path, pool: ConnectionPool, ttl: float = ROBOTS_TTL_S) -> RobotsCache:
+        cache = json.loads(path.read_text()) if path.exists() else {}
+        entries = cache.get("entries", {}) if cache.get("version") == CACHE_VERSION else {}
+        return cls(pool, ttl, entries)
+
+    def save(self, path: Path):
+        entries = {key: entry for key, entry in self.entries.items() if entry["status"] in CACHED_ROBOTS}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"version": CACHE_VERSION, "entries": entries}, separators=(",", ":")))
+
+    async def rules_for(self, site: str) -> tuple[str, list[RobotsRule]]:
+        entry = self.entries.get(site)
+        if entry is not None and time.time() - entry["fetched_at"] < self.ttl:
+            self.hits += 1
+        else:
+            task = self.pending.get(site)
+            if task is None:
+                task = asyncio.create_task(self.fetch(site))
+                self.pending[site] = task
+                task.add_done_callback(lambda _: self.pending.pop(site, None))
+            entry = await task
+        return entry["status"], [RobotsRule(**rule) for rule in entry["rules"]]
+
+    async def fetch(self, site: str) -> dict:
+        self.fetched += 1
+        rules: list[RobotsRule] = []
+        try:
+            response = await asyncio.wait_for(self.pool.fetch(f"{site}/robots.txt"), ROBOTS_TIMEOUT_S)
+        except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError) as error:
+            # Fail open for transient DNS/network issues, like robots.ts.
+            status = f"unavailable ({type(error).__name__})"
+        else:
+            if response.status == 404:
+                status = "missing"
+            elif not 200 <= response.status < 300:
+                status = f"http {response.status}"
+            else:
+                status = "ok"
+                rules = parse_robots(response.body.decode("utf-8", errors="replace"))
+        entry = {"fetched_at": time.time(), "status": status, "rules": [asdict(rule) for rule in rules]}
+        self.entries[site] = entry
+        return entry
+
+
+class PreflightChecker:
+    def __init__(self, pool: ConnectionPool, robots: RobotsCache, resolve=system_resolve, concurrency: int = 256, probe: bool = False):
+        self.pool = pool
+        self.robots = robots
+        self.resolve = resolve
+        self.limit = asyncio.Semaphore(concurrency)
+        self.probe = probe
+        self.lookups: dict[str, asyncio.Task] = {}
+
+    async def addresses(self, host: str) -> list[str]:
+        task = self.lookups.get(host)
+        if task is None:
+            task = self.lookups[host] = asyncio.create_task(self.resolve(host))
+        return await task
+
+    async def check(self, raw: str) -> dict:
+        result = {"url": raw, "normalized": None, "verdict": "allowed", "code": None, "reason": None, "addresses": [], "robots": None}
+        async with self.limit:
+            try:
+                parsed = normalize_url(raw)
+                result["normalized"] = url_string(parsed)
+                # analyze-service runs the address and robots checks together with Promise.all.
+                lookup, (status, rules) = await asyncio.gather(
+                    self.addresses(parsed.hostname), self.robots.rules_for(origin(parsed))
+                )
+                result["addresses"] = lookup
+                result["robots"] = status
+                if not lookup:
+                    raise PreflightError("TARGET_BLOCKED", "Unable to resolve target hostname")
+                for address in lookup:
+                    assert_public_ip(address)
+                if not robots_allows(rules, parsed):
+                    raise PreflightError("TARGET_BLOCKED", "robots.txt disallows this path")
+            except PreflightError as error:
+                result.update(verdict="rejected", code=error.code, reason=str(error))
+                return result
+            except OSError as error:
+                # A failed lookup is not an ExtractionError in url-security.ts, so the API reports it as internal.
+                result.update(verdict="rejected", code="INTERNAL_ERROR", reason=str(error) or type(error).__name__)
+                return result
+
+            if self.probe:
+                try:
+                    response = await asyncio.wait_for(self.pool.fetch(result["normalized"], "HEAD"), ROBOTS_TIMEOUT_S)
+                    result["http_status"] = response.status
+                except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError) as error:
+                    result["http_status"] = None
+                    result["probe_error"] = str(error) or type(error).__name__
+        return result
+
+    async def check_all(self, urls: list[str]) -> list[dict]:
+        return await asyncio.gather(*(self.check(url) for url in urls))
+
+
+def load_urls(paths: list[Path]) -> list[str]:
+    urls = []
+    for path in paths:
+        if path.suffix == ".json":
+            urls.extend(item["url"] if isinstance(item, dict) else item for item in json.loads(path.read_text()))
+        else:
+            urls.extend(line.strip() for line in path.read_text().splitlines() if line.strip() and not line.startswith("#"))
+    return urls
+
+
+async def run(urls: list[str], args: argparse.Namespace) -> tuple[list[dict], dict]:
+    pool = ConnectionPool(per_host=args.per_host, user_agent=AGENT)
+    robots = RobotsCache.load(args.cache, pool, args.robots_ttl)
+    checker = PreflightChecker(pool, robots, concurrency=args.concurrency, probe=args.probe)
+    try:
+        results = await checker.check_all(urls)
+    finally:
+        await pool.close()
+    robots.save(args.cache)
+    stats = {
+        "robots_fetched": robots.fetched,
+        "robots_cache_hits": robots.hits,
+        "connections_opened": pool.opened,
+        "connections_reused": pool.reused,
+    }
+    return results, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-screen capture URLs with the analyze URL and robots.txt rules.")
+    parser.add_argument("urls", nargs="*", type=Path, default=[URLS], help="JSON URL lists or text files, one URL per line.")
+    parser.add_argument("--concurrency", type=int, default=256, help="URLs checked at the same time.")
+    parser.add_argument("--per-host", type=int, default=4, help="Open connections allowed per host.")
+    parser.add_argument("--robots-ttl", type=float, default=ROBOTS_TTL_S, help="Seconds a cached robots.txt stays valid.")
+    parser.add_argument("--probe", action="store_true", help="Also send a HEAD request to every allowed URL.")
+    parser.add_argument("--fail-on-reject", action="store_true", help="Exit non-zero when any URL would be rejected.")
+    parser.add_argument("--cache", type=Path, default=CACHE)
+    parser.add_argument("--out", type=Path, default=OUT, help="Where to write the JSON report.")
+    args = parser.parse_args()
+
+    urls = load_urls(args.urls)
+    started = time.perf_counter()
+    results, stats = asyncio.run(run(urls, args))
+    elapsed = time.perf_counter() - started
+
+    rejected = [result for result in results if result["verdict"] == "rejected"]
+    by_code: dict[str, int] = {}
+    for result in rejected:
+        by_code[result["code"]] = by_code.get(result["code"], 0) + 1
+    report = {
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "sources": [path.as_posix() for path in args.urls],
+        "parameters": {"concurrency": args.concurrency, "per_host": args.per_host, "robots_ttl_s": args.robots_ttl, "probe": args.probe},
+        "totals": {"urls": len(results), "allowed": len(results) - len(rejected), "rejected": len(rejected), "by_code": by_code},
+        "elapsed_s": round(elapsed, 3),
+        **stats,
+        "results": results,
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2) + "\n")
+
+    for result in rejected:
+        print(f"rejected {result['code']}: {result['url']} ({result['reason']})")
+    print(
+        f"{len(results)} URLs in {elapsed:.2f} s: {len(results) - len(rejected)} allowed, {len(rejected)} rejected; "
+        f"robots.txt {stats['robots_fetched']} fetched, {stats['robots_cache_hits']} from cache"
+    )
+    print(str(args.out.resolve()))
+    if rejected and args.fail_on_reject:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
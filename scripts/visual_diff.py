@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from snapshot_archive import is_score_file
+
+REGRESSION_DIR = Path("test/regression")
+OUT = Path("output/reports/visual-diff.json")
+HEATMAP_DIR = Path("output/visual-diff")
+CACHE = Path("output/cache/visual-diff.json")
+CACHE_VERSION = 1
+REFERENCE_NAME = "reference.png"
+CANDIDATE_NAME = "candidate.png"
+TILE = 32
+
+# SSIM stabilizers for 8-bit luma (K1 = 0.01, K2 = 0.03).
+C1 = (0.01 * 255) ** 2
+C2 = (0.03 * 255) ** 2
+# Mean tile similarity needed for each visual_fidelity_1_to_5 score, best first.
+FIDELITY_BANDS = ((0.95, 5), (0.85, 4), (0.70, 3), (0.50, 2))
+LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def load_rgb(path: Path) -> np.ndarray:
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def align(reference: np.ndarray, candidate: np.ndarray, tile: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    height, width = reference.shape[:2]
+    if candidate.shape[1] != width:
+        scaled = round(candidate.shape[0] * width / candidate.shape[1])
+        candidate = np.asarray(Image.fromarray(candidate).resize((width, max(1, scaled)), Image.LANCZOS))
+
+    rows = max(height, candidate.shape[0])
+    padded_height = -(-rows // tile) * tile
+    padded_width = -(-width // tile) * tile
+
+    def pad(image: np.ndarray) -> np.ndarray:
+        out = np.full((padded_height, padded_width, 3), 255, dtype=np.uint8)
+        out[: image.shape[0], : image.shape[1]] = image
+        return out
+
+    # A tile row that only one screenshot reaches is missing content, not a match on white padding.
+    covered = np.arange(padded_height // tile) * tile < min(height, candidate.shape[0])
+    return pad(reference), pad(candidate), covered
+
+
+def tiles(image: np.ndarray, tile: int) -> np.ndarray:
+    rows, cols = image.shape[0] // tile, image.shape[1] // tile
+    return image.reshape(rows, tile, cols, tile, -1).transpose(0, 2, 1, 3, 4).reshape(rows, cols, -1)
+
+
+def tile_hashes(image: np.ndarray, tile: int) -> np.ndarray:
+    blocks = tiles(image, tile).view(np.uint32 if (tile * tile * 3) % 4 == 0 else np.uint8)
+    weights = np.random.default_rng(0x5EED).integers(1, 2**63, size=blocks.shape[-1], dtype=np.uint64) | np.uint64(1)
+    hashes = np.empty(blocks.shape[:2], dtype=np.uint64)
+    # One tile row at a time keeps the uint64 working copy small on long full-page screenshots.
+    for row in range(blocks.shape[0]):
+        hashes[row] = blocks[row].astype(np.uint64) @ weights
+    return hashes
+
+
+def tile_scores(reference: np.ndarray, candidate: np.ndarray, changed: np.ndarray, tile: int) -> tuple[np.ndarray, np.ndarray]:
+    ssim = np.ones(changed.shape, dtype=np.float32)
+    diff = np.zeros(changed.shape, dtype=np.float32)
+    if not changed.any():
+        return ssim, diff
+
+    ref_tiles = tiles(reference, tile)[changed].reshape(-1, tile * tile, 3).astype(np.float32)
+    cand_tiles = tiles(candidate, tile)[changed].reshape(-1, tile * tile, 3).astype(np.float32)
+    diff[changed] = np.abs(ref_tiles - cand_tiles).mean(axis=(1, 2)) / 255
+
+    x = ref_tiles @ LUMA
+    y = cand_tiles @ LUMA
+    mu_x, mu_y = x.mean(axis=1), y.mean(axis=1)
+    var_x, var_y = x.var(axis=1), y.var(axis=1)
+    cov = ((x - mu_x[:, None]) * (y - mu_y[:, None])).mean(axis=1)
+    score = ((2 * mu_x * mu_y + C1) * (2 * cov + C2)) / ((mu_x**2 + mu_y**2 + C1) * (var_x + var_y + C2))
+    ssim[changed] = np.clip(score, 0, 1)
+    return ssim, diff
+
+
+def fidelity(similarity: float) -> int:
+    for floor, score in FIDELITY_BANDS:
+        if similarity >= floor:
+            return score
+    return 1
+
+
+def heatmap(reference: np.ndarray, similarity: np.ndarray, tile: int, path: Path):
+    base = np.repeat((reference @ LUMA)[..., None], 3, axis=2) * 0.55 + 255 * 0.45
+    alpha = np.kron(1 - similarity, np.ones((tile, tile), dtype=np.float32))[..., None] * 0.85
+    red = np.array([220, 38, 38], dtype=np.float32)
+    overlay = base * (1 - alpha) + red * alpha
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.fromarray(overlay.astype(np.uint8)).save(path, optimize=True)
+
+
+def compare(reference_path: str, candidate_path: str, heatmap_path: str | None, tile: int = TILE) -> dict:
+    reference = load_rgb(Path(reference_path))
+    candidate = load_rgb(Path(candidate_path))
+    height, width = reference.shape[:2]
+    reference, candidate, covered = align(reference, candidate, tile)
+
+    identical = (tile_hashes(reference, tile) == tile_hashes(candidate, tile)) & covered[:, None]
+    changed = ~identical & covered[:, None]
+    ssim, diff = tile_scores(reference, candidate, changed, tile)
+    # SSIM only sees luma, so a recolored flat area would still score high; weight it by the RGB difference.
+    tile_similarity = ssim * (1 - diff)
+    tile_similarity[~covered] = 0
+
+    similarity = float(tile_similarity.mean())
+    if heatmap_path:
+        heatmap(reference, tile_similarity, tile, Path(heatmap_path))
+    worst = np.argsort(tile_similarity, axis=None)[:5]
+    return {
+        "size": [width, height],
+        "tiles": int(tile_similarity.size),
+        "identical_tiles": int(identical.sum()),
+        "missing_tiles": int((~covered).sum() * tile_similarity.shape[1]),
+        "changed_fraction": round(float((tile_similarity < 1).mean()), 4),
+        "similarity": round(similarity, 4),
+        "ssim": round(float(np.where(covered[:, None], ssim, 0).mean()), 4),
+        "mean_abs_diff": round(float(np.where(covered[:, None], diff, 1).mean()), 4),
+        "worst_tiles": [
+            {"x": int(col) * tile, "y": int(row) * tile, "similarity": round(float(tile_similarity[row, col]), 3)}
+            for row, col in zip(*np.unravel_index(worst, tile_similarity.shape))
+        ],
+        "visual_fidelity_1_to_5": fidelity(similarity),
+    }
+
+
+def file_digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def find_pairs(root: Path, reference_name: str, candidate_name: str) -> list[tuple[str, Path, Path]]:
+    pairs = []
+    for folder in sorted(path for path in root.iterdir() if path.is_dir()):
+        reference, candidate = folder / reference_name, folder / candidate_name
+        if reference.exists() and candidate.exists():
+            pairs.append((folder.name, reference, candidate))
+    return pairs
+
+
+def find_score(folder: Path) -> Path | None:
+    # Same rule as the snapshot archive: score.json, or a prefixed one such as vv-score.json.
+    matches = sorted(path for path in folder.iterdir() if path.is_file() and is_score_file(path.name))
+    return matches[0] if matches else None
+
+
+def update_score(path: Path, value: int, overwrite: bool) -> bool:
+    score = json.loads(path.read_text())
+    if score.get("visual_fidelity_1_to_5") and not overwrite:
+        return False
+    score["visual_fidelity_1_to_5"] = value
+    path.write_text(json.dumps(score, indent=2) + "\n")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tile-hash visual diff of regression screenshots with SSIM-style scores.")
+    parser.add_argument("--root", type=Path, default=REGRESSION_DIR, help="Folder of <slug>/ regression targets.")
+    parser.add_argument("--pair", nargs=2, type=Path, metavar=("REFERENCE", "CANDIDATE"), help="Compare one pair instead.")
+    parser.add_argument("--reference-name", default=REFERENCE_NAME)
+    parser.add_argument("--candidate-name", default=CANDIDATE_NAME)
+    parser.add_argument("--tile", type=int, default=TILE, help="Tile edge in pixels.")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 2, help="Worker processes.")
+    parser.add_argument("--write-scores", action="store_true", help="Fill visual_fidelity_1_to_5 in each score.json (or <prefix>-score.json).")
+    parser.add_argument("--overwrite", action="store_true", help="Replace non-zero (manual) fidelity scores too.")
+    parser.add_argument("--cache", type=Path, default=CACHE)
+    parser.add_argument("--out", type=Path, default=OUT, help="Where to write the JSON report.")
+    args = parser.parse_args()
+
+    if args.pair:
+        pairs = [(args.pair[0].stem, *args.pair)]
+    else:
+        pairs = find_pairs(args.root, args.reference_name, args.candidate_name)
+    if not pairs:
+        print(f"No {args.reference_name}/{args.candidate_name} pairs under {args.root}")
+
+    cache = json.loads(args.cache.read_text()) if args.cache.exists() else {}
+    if cache.get("version") != CACHE_VERSION:
+        cache = {"version": CACHE_VERSION, "results": {}}
+
+    keys = {}
+    missing = []
+    for slug, reference, candidate in pairs:
+        keys[slug] = f"{args.tile}:{file_digest(reference)}:{file_digest(candidate)}"
+        heatmap_path = HEATMAP_DIR / f"{slug}.png"
+        if keys[slug] not in cache["results"] or not heatmap_path.exists():
+            missing.append((slug, reference, candidate, heatmap_path))
+
+    if missing:
+        with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(missing)))) as executor:
+            futures = {
+                slug: executor.submit(compare, str(reference), str(candidate), str(heatmap_path), args.tile)
+                for slug, reference, candidate, heatmap_path in missing
+            }
+            for slug, future in futures.items():
+                cache["results"][keys[slug]] = future.result()
+
+    live = set(keys.values())
+    cache["results"] = {key: value for key, value in cache["results"].items() if key in live}
+    args.cache.parent.mkdir(parents=True, exist_ok=True)
+    args.cache.write_text(json.dumps(cache, separators=(",", ":")))
+
+    targets = []
+    for slug, reference, candidate in pairs:
+        result = cache["results"][keys[slug]]
+        entry = {
+            "slug": slug,
+            "reference": reference.as_posix(),
+            "candidate": candidate.as_posix(),
+            "heatmap": (HEATMAP_DIR / f"{slug}.png").as_posix(),
+            **result,
+        }
+        score_path = find_score(reference.parent) if args.write_scores and not args.pair else None
+        if score_path:
+            entry["score_written"] = update_score(score_path, result["visual_fidelity_1_to_5"], args.overwrite)
+        targets.append(entry)
+        print(
+            f"{slug}: similarity {result['similarity']:.3f}, {result['changed_fraction'] * 100:.1f}% tiles changed, "
+            f"fidelity {result['visual_fidelity_1_to_5']}/5"
+        )
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "root": args.root.as_posix(),
+        "tile": args.tile,
+        "bands": [{"min_similarity": floor, "score": score} for floor, score in FIDELITY_BANDS],
+        "compared": len(missing),
+        "targets": targets,
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"{len(pairs)} targets, {len(missing)} compared, {len(pairs) - len(missing)} from cache")
+    print(str(args.out.resolve()))
+
+
+if __name__ == "__main__":
+    main()